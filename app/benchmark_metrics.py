@@ -0,0 +1,236 @@
+"""
+benchmark_metrics.py
+Benchmark-relative metrics for every fund at once.
+
+Each fund's `benchmark` text (from the scheme summaries) is mapped to an
+index series in the NSE/BSE index store (app.index_history). Fund NAVs and
+benchmark closes are aligned on one trading-day grid, turned into two
+(days x funds) return matrices, and every metric is a column-wise
+reduction over those matrices - no per-fund Python loop.
+
+Metrics (trailing BENCHMARK_WINDOW_YEARS, daily returns, annualised x252):
+    alpha               Jensen's alpha over RISK_FREE_RATE, decimal
+    beta, correlation, r_squared
+    tracking_error      decimal
+    information_ratio   active return / tracking error
+    treynor_ratio       excess return / beta
+    up_capture          % of the benchmark's mean up-day return captured
+    down_capture        % of the benchmark's mean down-day return captured
+    win_rate            % of days the fund beat the benchmark
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+
+from app.index_history import index_close_series, load_catalog
+
+TRADING_DAYS = 252
+RISK_FREE_RATE = 0.065          # same default as calculate_sharpe_ratio
+BENCHMARK_WINDOW_YEARS = 3
+MIN_OVERLAP_DAYS = 250          # aligned return pairs needed for a fund
+MAX_FILL_DAYS = 5               # NAV / index carried forward at most this many grid days
+BENCHMARK_MATCH_MIN_SCORE = 90
+
+BENCHMARK_METRIC_KEYS = [
+    "alpha", "beta", "r_squared", "correlation", "information_ratio", "treynor_ratio",
+    "tracking_error", "up_capture", "down_capture", "win_rate",
+]
+
+# Words that differ between how AMCs write a benchmark and how NSE/BSE name the index
+_NOISE = re.compile(r"\b(TRI|TOTAL RETURNS? INDEX|TR|S&P|INDEX)\b")
+_NON_ALNUM = re.compile(r"[^A-Z0-9]+")
+
+
+# ==================== BENCHMARK -> INDEX ====================
+
+def normalize_index_name(name: str) -> str:
+    """'Nifty 50 TRI' / 'NIFTY 50 Total Return Index' -> 'NIFTY 50'"""
+    if not name:
+        return ""
+    name = _NOISE.sub(" ", str(name).upper())
+    return _NON_ALNUM.sub(" ", name).strip()
+
+
+def build_index_lookup(catalog: dict = None) -> dict:
+    """{normalized index name: 'source:code'} for every stored index (NSE wins ties)."""
+    catalog = load_catalog() if catalog is None else catalog
+    lookup = {}
+    for key, entry in sorted(catalog.items(), key=lambda kv: kv[1]["source"] != "nse"):
+        lookup.setdefault(normalize_index_name(entry["index_name"]), key)
+    return lookup
+
+
+def match_benchmark(benchmark, lookup: dict):
+    """First part of a benchmark text ('A, B' / list) that resolves to a stored index, else None."""
+    if not benchmark or not lookup:
+        return None
+    parts = benchmark if isinstance(benchmark, list) else re.split(r"[,;/]|\bAND\b", str(benchmark))
+    for part in parts:
+        name = normalize_index_name(part)
+        if not name:
+            continue
+        if name in lookup:
+            return lookup[name]
+        best = process.extractOne(name, lookup.keys(), scorer=fuzz.token_sort_ratio,
+                                  score_cutoff=BENCHMARK_MATCH_MIN_SCORE)
+        if best:
+            return lookup[best[0]]
+    return None
+
+
+# ==================== ALIGNMENT ====================
+
+def nav_matrix(nav_frames: dict, funds: list, start) -> pd.DataFrame:
+    """
+    (dates x funds) NAVs from `start` on, built from one long frame: each
+    distinct date string is parsed once for all funds, then a single pivot.
+    """
+    lengths = [len(nav_frames[f]) for f in funds]
+    long = pd.DataFrame({
+        "fund": np.repeat(np.arange(len(funds)), lengths),
+        "date": np.concatenate([np.asarray(nav_frames[f]["date"]) for f in funds]),
+        "nav": pd.to_numeric(np.concatenate([np.asarray(nav_frames[f]["nav"]) for f in funds]),
+                             errors="coerce"),
+    })
+    if not pd.api.types.is_datetime64_any_dtype(long["date"]):
+        codes, uniques = pd.factorize(long["date"])
+        parsed = pd.to_datetime(pd.Series(uniques), format="%d-%m-%Y", errors="coerce").to_numpy()
+        long["date"] = parsed[codes]
+
+    long = long[(long["date"] >= start) & (long["nav"] > 0)]
+    wide = (long.drop_duplicates(["fund", "date"], keep="last")
+                .pivot(index="date", columns="fund", values="nav")
+                .reindex(columns=range(len(funds))))
+    wide.columns = funds
+    return wide
+
+
+def align_returns(nav_frames: dict, fund_index: dict, index_series: dict):
+    """
+    (funds, R, M): R and M are (days x funds) daily return arrays for the
+    fund and its benchmark on one grid, NaN where either side is missing.
+    """
+    funds = [f for f in nav_frames if fund_index.get(f) in index_series]
+    if not funds:
+        return [], np.empty((0, 0)), np.empty((0, 0))
+
+    index_keys = sorted({fund_index[f] for f in funds})
+    indices = pd.concat({k: index_series[k] for k in index_keys}, axis=1).sort_index()
+    end = indices.index.max()
+    start = end - pd.DateOffset(years=BENCHMARK_WINDOW_YEARS)
+    grid = indices.index[(indices.index >= start)]
+
+    # One reindex per matrix, not per fund; NAVs from a little before the
+    # window so the first grid day can carry forward
+    idx_prices = indices.reindex(grid).ffill(limit=MAX_FILL_DAYS)
+    navs = nav_matrix(nav_frames, funds, start - pd.Timedelta(days=2 * MAX_FILL_DAYS))
+    navs = navs.reindex(navs.index.union(grid)).ffill(limit=MAX_FILL_DAYS).reindex(grid)
+
+    fund_prices = navs.to_numpy(dtype=float)
+    bench_prices = idx_prices.to_numpy(dtype=float)[:, [index_keys.index(fund_index[f]) for f in funds]]
+
+    R = fund_prices[1:] / fund_prices[:-1] - 1.0
+    M = bench_prices[1:] / bench_prices[:-1] - 1.0
+    invalid = ~(np.isfinite(R) & np.isfinite(M))
+    R[invalid] = np.nan
+    M[invalid] = np.nan
+    return funds, R, M
+
+
+# ==================== METRICS ====================
+
+def _masked_mean(x, mask, n):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(mask, x, 0.0).sum(axis=0) / n
+
+
+def benchmark_metrics_from_returns(R: np.ndarray, M: np.ndarray) -> dict:
+    """Column-wise metrics for (days x funds) return matrices (NaN = no pair that day)."""
+    valid = ~np.isnan(R)
+    n = valid.sum(axis=0).astype(float)
+    Rz, Mz = np.where(valid, R, 0.0), np.where(valid, M, 0.0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_r = Rz.sum(axis=0) / n
+        mean_m = Mz.sum(axis=0) / n
+        dr = np.where(valid, R - mean_r, 0.0)
+        dm = np.where(valid, M - mean_m, 0.0)
+        cov = (dr * dm).sum(axis=0) / (n - 1)
+        var_r = (dr ** 2).sum(axis=0) / (n - 1)
+        var_m = (dm ** 2).sum(axis=0) / (n - 1)
+
+        beta = cov / var_m
+        correlation = cov / np.sqrt(var_r * var_m)
+
+        rf_daily = RISK_FREE_RATE / TRADING_DAYS
+        alpha = ((mean_r - rf_daily) - beta * (mean_m - rf_daily)) * TRADING_DAYS
+
+        active = np.where(valid, R - M, 0.0)
+        mean_active = active.sum(axis=0) / n
+        active_var = (np.where(valid, active - mean_active, 0.0) ** 2).sum(axis=0) / (n - 1)
+        tracking_error = np.sqrt(active_var) * np.sqrt(TRADING_DAYS)
+        information_ratio = mean_active * TRADING_DAYS / tracking_error
+        treynor_ratio = (mean_r * TRADING_DAYS - RISK_FREE_RATE) / beta
+
+        up, down = valid & (Mz > 0), valid & (Mz < 0)
+        up_capture = _masked_mean(Rz, up, up.sum(axis=0)) / _masked_mean(Mz, up, up.sum(axis=0)) * 100
+        down_capture = _masked_mean(Rz, down, down.sum(axis=0)) / _masked_mean(Mz, down, down.sum(axis=0)) * 100
+        win_rate = (valid & (Rz > Mz)).sum(axis=0) / n * 100
+
+    return {
+        "alpha": alpha,
+        "beta": beta,
+        "r_squared": correlation ** 2,
+        "correlation": correlation,
+        "information_ratio": information_ratio,
+        "treynor_ratio": treynor_ratio,
+        "tracking_error": tracking_error,
+        "up_capture": up_capture,
+        "down_capture": down_capture,
+        "win_rate": win_rate,
+        "overlap_days": n,
+    }
+
+
+def compute_benchmark_metrics(nav_frames: dict, benchmarks: dict, catalog: dict = None) -> dict:
+    """
+    Args:
+        nav_frames: {fund_id: DataFrame with 'date' and 'nav'}
+        benchmarks: {fund_id: benchmark text from the scheme summary}
+
+    Returns:
+        {fund_id: {"benchmark_index": "source:code", "benchmark_overlap_days": int, <BENCHMARK_METRIC_KEYS>}}
+        for every fund whose benchmark maps to a stored index with
+        MIN_OVERLAP_DAYS of aligned returns. Metrics that are undefined
+        (e.g. zero variance) are None.
+    """
+    catalog = load_catalog() if catalog is None else catalog
+    lookup = build_index_lookup(catalog)
+    fund_index = {f: match_benchmark(benchmarks.get(f), lookup) for f in nav_frames}
+
+    index_series = {}
+    for key in {k for k in fund_index.values() if k}:
+        entry = catalog[key]
+        series = index_close_series(entry["source"], entry["index_code"])
+        if series is not None and not series.empty:
+            index_series[key] = series
+
+    funds, R, M = align_returns(nav_frames, fund_index, index_series)
+    if not funds:
+        return {}
+
+    columns = benchmark_metrics_from_returns(R, M)
+    results = {}
+    for j, fund in enumerate(funds):
+        overlap = int(columns["overlap_days"][j])
+        if overlap < MIN_OVERLAP_DAYS:
+            continue
+        values = {}
+        for key in BENCHMARK_METRIC_KEYS:
+            v = float(columns[key][j])
+            values[key] = v if np.isfinite(v) else None
+        results[fund] = {"benchmark_index": fund_index[fund], "benchmark_overlap_days": overlap, **values}
+    return results
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from app import pdf_text
+from app.doc_extractor import INPUT_SUMMARY_PDF_DIR, MAX_DOC_CHARS, extract_from_isin_block
+
+# ---------------------------------------------------------
+# Benchmark PDF text backends on the summary PDF corpus
+#
+#   python -m app.benchmark_pdf_text [pdf_dir] [limit]
+#
+# For every installed backend:
+#   full     - every page (the old behaviour)
+#   summary  - first MAX_DOC_CHARS + ISIN/AMFI pages (what doc_extractor uses)
+# and reports ms per document plus how often the ISIN block still parses.
+# ---------------------------------------------------------
+
+
+def bench(pdfs, fn):
+    times, chars, isin_hits = [], 0, 0
+    for pdf in pdfs:
+        start = time.perf_counter()
+        try:
+            text = fn(pdf)
+        except Exception:
+            text = ""
+        times.append((time.perf_counter() - start) * 1000)
+        chars += len(text)
+        if extract_from_isin_block(text)[1]:
+            isin_hits += 1
+    return times, chars, isin_hits
+
+
+def main():
+    pdf_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else INPUT_SUMMARY_PDF_DIR
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    pdfs = sorted(pdf_dir.glob("*.pdf"))[:limit]
+    logging.getLogger("mf_advisor.doc_extractor").setLevel(logging.WARNING)
+    if not pdfs:
+        print(f"No PDFs in {pdf_dir}")
+        return
+
+    print(f"📄 {len(pdfs)} PDFs from {pdf_dir}  (MAX_DOC_CHARS={MAX_DOC_CHARS})\n")
+    print(f"{'backend':<12}{'mode':<9}{'mean ms':>9}{'p50 ms':>9}{'p95 ms':>9}{'chars/doc':>11}{'ISIN ok':>9}")
+
+    results = []
+    for backend in pdf_text.available_backends():
+        modes = {
+            "full": lambda p: pdf_text.extract_text(p, backend=backend),
+            "summary": lambda p: pdf_text.extract_summary_text(p, MAX_DOC_CHARS, backend=backend),
+        }
+        for mode, fn in modes.items():
+            results.append((backend, mode) + bench(pdfs, fn))
+
+    baseline = next((statistics.mean(t) for b, m, t, _, _ in results if (b, m) == ("pypdf", "full")), None)
+    for backend, mode, times, chars, isin_hits in results:
+        mean = statistics.mean(times)
+        p95 = sorted(times)[int(0.95 * (len(times) - 1))]
+        speedup = f"  {baseline / mean:.1f}x vs pypdf full" if baseline else ""
+        print(f"{backend:<12}{mode:<9}{mean:>9.1f}{statistics.median(times):>9.1f}{p95:>9.1f}"
+              f"{chars // len(pdfs):>11}{isin_hits:>6}/{len(pdfs)}{speedup}")
+
+
+if __name__ == "__main__":
+    main()
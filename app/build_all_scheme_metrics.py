@@ -3,6 +3,8 @@ import logging
 from pathlib import Path
 import pandas as pd
 from app.metrics import compute_metrics_for_nav
+from app.benchmark_metrics import compute_benchmark_metrics
+from app.build_parent_nav_dataset import load_parent_nav, nav_frame
 
 # ---------------------------------------------------
 # Category Classification Helper
@@ -70,11 +72,15 @@ DATA_DIR = BASE_DIR / "data"
 
 MASTERLIST_FILE = DATA_DIR / "parent_masterlist.json"
 NAV_DATA_FILE = DATA_DIR / "parent_scheme_nav.json"
+SUMMARIES_FILE = DATA_DIR / "scheme_summary_extract" / "all_scheme_summaries.json"
 OUTPUT_FILE = DATA_DIR / "all_scheme_metrics.json"
 
 # Minimum NAV records required for reliable metrics
 MIN_NAV_RECORDS_REQUIRED = 50
 
+# parent_scheme_nav.json holds published NAVs only; fill calendar days on read
+NAV_READ_FFILL = True
+
 # ---------------------------------------------------
 # Logging
 # ---------------------------------------------------
@@ -168,27 +174,40 @@ def create_empty_metrics(reason: str) -> dict:
 
 def load_nav_data_lookup():
     """
-    Load all_scheme_full_details.json and index by scheme_code
+    Load parent_scheme_nav.json and index by scheme_code
     Returns: dict {scheme_code: scheme_data}
     """
     logger.info("Loading parent_scheme_nav.json...")
     
-    with open(NAV_DATA_FILE, "r", encoding="utf-8") as f:
-        all_schemes = json.load(f)
-    
-    logger.info(f"Found {len(all_schemes)} total schemes (including closed funds)")
-    
-    # Create lookup dictionary
-    nav_lookup = {}
-    for scheme_data in all_schemes:
-        scheme_code = scheme_data.get("meta", {}).get("scheme_code")
-        if scheme_code:
-            nav_lookup[str(scheme_code)] = scheme_data
+    nav_lookup = load_parent_nav(NAV_DATA_FILE)
     
     logger.info(f"Created lookup index with {len(nav_lookup)} schemes")
     return nav_lookup
 
 
+# ---------------------------------------------------
+# Helper: Benchmark Text per Parent Scheme
+# ---------------------------------------------------
+
+def load_benchmarks():
+    """
+    Load the benchmark field from all_scheme_summaries.json
+    Returns: dict {parent_name: benchmark}
+    """
+    if not SUMMARIES_FILE.exists():
+        logger.warning(f"{SUMMARIES_FILE} not found - benchmark metrics will stay null")
+        return {}
+    
+    with open(SUMMARIES_FILE, "r", encoding="utf-8") as f:
+        summaries = json.load(f)
+    
+    return {
+        parent_name: info.get("data", {}).get("benchmark")
+        for parent_name, info in summaries.items()
+        if info.get("data", {}).get("benchmark")
+    }
+
+
 # ---------------------------------------------------
 # Core: Calculate Metrics for Parent Schemes Only
 # ---------------------------------------------------
@@ -214,9 +233,11 @@ def build_all_scheme_metrics():
     nav_lookup = load_nav_data_lookup()
     
     output = {}
+    nav_frames = {}  # parent_name -> NAV DataFrame, for the batch benchmark pass
     stats = {
         'total_parents': len(masterlist),
         'processed_with_metrics': 0,
+        'with_benchmark_metrics': 0,
         'insufficient_data': 0,
         'no_nav_data': 0,
         'calculation_failed': 0,
@@ -277,6 +298,7 @@ def build_all_scheme_metrics():
             continue
         
         nav_data = scheme_data.get("data", [])
+        nav_records = nav_data
         meta = scheme_data.get("meta", {})
         
         # Parse category
@@ -312,18 +334,12 @@ def build_all_scheme_metrics():
         
         # Try to calculate metrics
         try:
-            # Convert to DataFrame
-            nav_records = [
-                {
-                    "date": row["date"],
-                    "nav": float(row["nav"])
-                }
-                for row in nav_data
-                if row.get("nav")
-            ]
+            # Published NAVs only are stored; calendar days are forward-filled
+            # here because the rolling / absolute-return windows count days
+            nav_df = nav_frame(scheme_data, ffill=NAV_READ_FFILL)
             
-            if len(nav_records) < MIN_NAV_RECORDS_REQUIRED:
-                logger.warning(f"  ⚠️ Too few valid NAV records ({len(nav_records)} after filtering)")
+            if len(nav_df) < MIN_NAV_RECORDS_REQUIRED:
+                logger.warning(f"  ⚠️ Too few valid NAV records ({len(nav_df)} after filtering)")
                 
                 output[parent_name] = {
                     "parent_scheme_name": parent_name,
@@ -336,17 +352,15 @@ def build_all_scheme_metrics():
                     "sub_category": sub_category,
                     "data_start_date": nav_records[0]["date"] if nav_records else None,
                     "data_end_date": nav_records[-1]["date"] if nav_records else None,
-                    "total_nav_records": len(nav_records),
+                    "total_nav_records": len(nav_df),
                     "total_variants": len(variants),
-                    "metrics": create_empty_metrics(f"insufficient_valid_data_{len(nav_records)}_records")
+                    "metrics": create_empty_metrics(f"insufficient_valid_data_{len(nav_df)}_records")
                 }
                 stats['insufficient_data'] += 1
                 continue
             
-            nav_df = pd.DataFrame(nav_records)
-            
             # Calculate metrics
-            logger.info(f"  ✓ Calculating metrics ({len(nav_records)} NAV records)")
+            logger.info(f"  ✓ Calculating metrics ({len(nav_df)} NAV records)")
             metrics = compute_metrics_for_nav(nav_df)
             
             # Store result
@@ -361,12 +375,13 @@ def build_all_scheme_metrics():
                 "sub_category": sub_category,
                 "data_start_date": nav_records[0]["date"],
                 "data_end_date": nav_records[-1]["date"],
-                "total_nav_records": len(nav_records),
+                "total_nav_records": len(nav_df),
                 "total_variants": len(variants),
                 "metrics": metrics
             }
             
             stats['processed_with_metrics'] += 1
+            nav_frames[parent_name] = nav_df
             cagr = metrics.get('cagr')
             cagr_display = f"{cagr*100:.2f}%" if cagr is not None else "N/A"
             logger.info(f"  ✅ Success - CAGR: {cagr_display}")
@@ -391,6 +406,15 @@ def build_all_scheme_metrics():
             }
             stats['calculation_failed'] += 1
     
+    # Benchmark-relative metrics: one matrix pass over all funds
+    logger.info(f"\nComputing benchmark metrics for {len(nav_frames)} schemes...")
+    benchmark_results = compute_benchmark_metrics(nav_frames, load_benchmarks())
+    for parent_name, result in benchmark_results.items():
+        output[parent_name]["benchmark_index"] = result.pop("benchmark_index")
+        output[parent_name]["benchmark_overlap_days"] = result.pop("benchmark_overlap_days")
+        output[parent_name]["metrics"].update(result)
+    stats['with_benchmark_metrics'] = len(benchmark_results)
+    
     # Save output
     logger.info(f"\nSaving metrics to {OUTPUT_FILE}...")
     
@@ -403,6 +427,7 @@ def build_all_scheme_metrics():
     logger.info("="*60)
     logger.info(f"Total parent schemes: {stats['total_parents']}")
     logger.info(f"✅ Processed with metrics: {stats['processed_with_metrics']}")
+    logger.info(f"📏 With benchmark metrics: {stats['with_benchmark_metrics']}")
     logger.info(f"⚠️  Insufficient data: {stats['insufficient_data']}")
     logger.info(f"⚠️  No NAV data found: {stats['no_nav_data']}")
     logger.info(f"❌ Calculation failed: {stats['calculation_failed']}")
@@ -4,6 +4,10 @@ from pathlib import Path
 import re
 from collections import defaultdict
 
+from rapidfuzz import fuzz
+
+from app.get_scheme_details import iter_nav_schemes
+
 # ---------------------------------------------------------
 # Paths
 # ---------------------------------------------------------
@@ -12,7 +16,6 @@ BASE_DIR = Path(__file__).resolve().parents[1]
 DATA_DIR = BASE_DIR / "data"
 
 SUMMARIES_FILE = DATA_DIR / "scheme_summary_extract" / "all_scheme_summaries.json"
-ALL_NAV_FILE = DATA_DIR / "all_scheme_full_details.json"
 OUTPUT_FILE = DATA_DIR / "parent_masterlist.json"
 
 # ---------------------------------------------------------
@@ -170,15 +173,14 @@ def select_canonical_code(variants: list) -> str:
 
 def load_nav_data():
     """
-    Load all_scheme_full_details.json
+    Load the NAV store (meta only; NAV points are not needed here)
     Returns: 
     - lookup: {code: scheme_info}
     - all_schemes: full list for name searching
     """
-    logger.info("Loading all_scheme_full_details.json...")
+    logger.info("Loading NAV store metadata...")
     
-    with open(ALL_NAV_FILE, 'r', encoding='utf-8') as f:
-        all_schemes = json.load(f)
+    all_schemes = [{'meta': scheme.get('meta', {})} for scheme in iter_nav_schemes()]
     
     logger.info(f"Loaded {len(all_schemes)} schemes from NAV data")
     
@@ -200,40 +202,102 @@ def load_nav_data():
     return lookup, all_schemes
 
 
+# ---------------------------------------------------------
+# Helper: Normalised Name Index
+#
+# Every NAV scheme name is normalised once and its tokens posted:
+#   postings[token]  -> schemes containing the token
+#   by_rarest[token] -> schemes whose rarest token it is
+# A parent name contained in a scheme name has all its tokens in that
+# scheme, so the postings of the parent's rarest token cover it. A scheme
+# name contained in the parent has its own rarest token among the
+# parent's tokens, so by_rarest covers those. Only these candidates get
+# the containment check and a rapidfuzz score.
+# ---------------------------------------------------------
+
+def build_name_index(all_schemes: list) -> dict:
+    entries = []
+    postings = defaultdict(list)
+
+    for scheme in all_schemes:
+        meta = scheme.get('meta', {})
+        scheme_name = meta.get('scheme_name', '')
+        scheme_code = meta.get('scheme_code')
+        if not scheme_name or not scheme_code:
+            continue
+
+        norm = normalize_for_matching(scheme_name)
+        if not norm:
+            continue
+
+        i = len(entries)
+        tokens = set(norm.split())
+        entries.append((norm, tokens, meta))
+        for token in tokens:
+            postings[token].append(i)
+
+    by_rarest = defaultdict(list)
+    for i, (_, tokens, _) in enumerate(entries):
+        by_rarest[min(tokens, key=lambda t: (len(postings[t]), t))].append(i)
+
+    logger.info(f"Indexed {len(entries)} scheme names ({len(postings)} tokens)")
+
+    return {'entries': entries, 'postings': postings, 'by_rarest': by_rarest}
+
+
+def name_candidates(norm: str, name_index: dict) -> list:
+    """Indexes of schemes that can contain, or be contained in, a normalised name (store order)."""
+    tokens = set(norm.split())
+    postings = name_index['postings']
+
+    if any(t not in postings for t in tokens):
+        contains = set()
+    else:
+        contains = set(postings[min(tokens, key=lambda t: len(postings[t]))])
+
+    contained = {i for t in tokens for i in name_index['by_rarest'].get(t, ())}
+
+    return sorted(contains | contained)
+
+
 # ---------------------------------------------------------
 # Helper: Search NAV Data by Parent Name
 # ---------------------------------------------------------
 
-def search_nav_by_parent_name(parent_name: str, all_schemes: list) -> list:
+def search_nav_by_parent_name(parent_name: str, name_index: dict) -> list:
     """
-    Search all_scheme_full_details for schemes matching parent name
-    Returns list of matching variants with codes
+    Search the NAV name index for schemes matching parent name
+    Returns list of matching variants with codes, closest names first
     """
     logger.info(f"  🔍 Searching NAV data by name: {parent_name}")
     
     matches = []
     
-    for scheme in all_schemes:
-        meta = scheme.get('meta', {})
-        scheme_name = meta.get('scheme_name', '')
-        scheme_code = meta.get('scheme_code')
-        
-        if not scheme_name or not scheme_code:
-            continue
+    norm_parent = normalize_for_matching(parent_name)
+    if not norm_parent:
+        logger.warning(f"  ✗ No matches found in NAV data for: {parent_name}")
+        return matches
+    
+    for i in name_candidates(norm_parent, name_index):
+        norm, _, meta = name_index['entries'][i]
         
-        # Check if scheme name matches parent name
-        if names_match(parent_name, scheme_name):
+        # Same rule as names_match(): one normalised name contains the other
+        if norm_parent in norm or norm in norm_parent:
             matches.append({
-                'scheme_name': scheme_name,
-                'amfi_code': str(scheme_code),
+                'scheme_name': meta.get('scheme_name'),
+                'amfi_code': str(meta.get('scheme_code')),
                 'fund_house': meta.get('fund_house'),
-                'match_type': 'name_search'
+                'match_type': 'name_search',
+                'match_score': round(fuzz.token_sort_ratio(norm_parent, norm), 1)
             })
     
+    # Stable: equal scores keep NAV store order
+    matches.sort(key=lambda m: -m['match_score'])
+    
     if matches:
         logger.info(f"  ✓ Found {len(matches)} matching variants by name search")
         for match in matches:
-            logger.info(f"    - {match['amfi_code']}: {match['scheme_name']}")
+            logger.info(f"    - {match['amfi_code']}: {match['scheme_name']} ({match['match_score']})")
     else:
         logger.warning(f"  ✗ No matches found in NAV data for: {parent_name}")
     
@@ -255,6 +319,7 @@ def build_parent_masterlist():
     
     # Load NAV data
     nav_lookup, all_nav_schemes = load_nav_data()
+    name_index = build_name_index(all_nav_schemes)
     
     # Load summaries
     logger.info("\nLoading all_scheme_summaries.json...")
@@ -330,7 +395,7 @@ def build_parent_masterlist():
             logger.warning(f"  ⚠ No AMFI codes in summary, searching by name...")
             stats['amfi_from_name_search'] += 1
             
-            matches = search_nav_by_parent_name(parent_name, all_nav_schemes)
+            matches = search_nav_by_parent_name(parent_name, name_index)
             if matches:
                 variants = matches
         
@@ -339,7 +404,7 @@ def build_parent_masterlist():
             logger.warning(f"  ⚠ All {len(valid_codes_from_summary)} AMFI codes invalid, searching by name...")
             stats['partial_fallback'] += 1
             
-            matches = search_nav_by_parent_name(parent_name, all_nav_schemes)
+            matches = search_nav_by_parent_name(parent_name, name_index)
             if matches:
                 variants = matches
         
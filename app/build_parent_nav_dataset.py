@@ -2,14 +2,16 @@
 
 import json
 import logging
-from sys import audit
-import ijson
-from datetime import datetime, timedelta
+import os
 from pathlib import Path
 from collections import Counter
-from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
 from tqdm import tqdm
 
+from app.get_scheme_details import NAV_STORE_FILE, iter_nav_schemes, open_nav_store
+
 
 # ---------------------------------------------------------
 # CONFIG
@@ -19,17 +21,14 @@ BASE_DIR = Path(__file__).resolve().parents[1]
 DATA_DIR = BASE_DIR / "data"
 
 PARENT_MASTER_FILE = DATA_DIR / "parent_masterlist.json"
-FULL_NAV_FILE = DATA_DIR / "all_scheme_full_details.json"
 OUTPUT_FILE = DATA_DIR / "parent_scheme_nav.json"
 
-THREADS = 6   # ← Adjust based on CPU cores
-
 
 # ---------------------------------------------------------
 # Logging
 # ---------------------------------------------------------
 
-logging.basicConfig(level=logging.INFO, format="%(message)s")
+# Configured in __main__ only: build_all_scheme_metrics imports nav_frame from here
 logger = logging.getLogger(__name__)
 
 DATE_FMT = "%d-%m-%Y"
@@ -62,42 +61,114 @@ def audit_and_load_canonical_codes():
 
 
 # ---------------------------------------------------------
-# NAV Fill (Worker Task)
+# NAV Normalisation (all schemes at once, columnar)
+#
+# The stored file keeps only published NAV points (deduplicated, newest
+# first). Calendar-day forward fill is a read-time option: nav_frame().
 # ---------------------------------------------------------
 
-def process_scheme(scheme):
-
-    data = scheme.get("data", [])
-
-    if not data:
-        return scheme
-
-    parsed = [
-        (datetime.strptime(r["date"], DATE_FMT), r["nav"])
-        for r in data
-    ]
-    parsed.sort(key=lambda x: x[0])
-
-    filled = []
-    cur_date, cur_nav = parsed[0]
-    filled.append((cur_date, cur_nav))
-
-    for next_date, next_nav in parsed[1:]:
-
-        d = cur_date + timedelta(days=1)
-        while d < next_date:
-            filled.append((d, cur_nav))
-            d += timedelta(days=1)
+def parse_nav_dates(values):
+    """
+    'dd-mm-yyyy' strings -> datetime64[ns] array (NaT for bad values).
+    Fast path reorders to ISO and lets numpy parse in C; any malformed
+    value sends the whole batch through pandas with errors="coerce".
+    """
+    try:
+        iso = np.array([f"{v[6:10]}-{v[3:5]}-{v[0:2]}" for v in values], dtype="datetime64[D]")
+        if all(len(v) == 10 and v[2] == "-" and v[5] == "-" for v in values):
+            return iso.astype("datetime64[ns]")
+    except (TypeError, ValueError):
+        pass
+    return pd.to_datetime(pd.Series(values, dtype=object), format=DATE_FMT, errors="coerce").to_numpy()
+
+
+def normalize_nav_points(schemes):
+    """
+    Clean every scheme's data in one pass over flat arrays: each distinct
+    date string is parsed once (fixed DATE_FMT), invalid dates/NAVs are
+    dropped, duplicate dates keep the first (newest) point.
+    Sets scheme["data"] in place; returns the number of dropped points.
+    """
+    lengths = np.array([len(s.get("data") or []) for s in schemes])
+    rows = [r for s in schemes for r in (s.get("data") or [])]
+    if not rows:
+        return 0
+
+    fund = np.repeat(np.arange(len(schemes)), lengths)
+    codes, uniques = pd.factorize(np.array([r.get("date") for r in rows], dtype=object))
+    parsed = parse_nav_dates(uniques)
+    dates = np.append(parsed, np.datetime64("NaT", "ns"))[codes]   # code -1 (missing) -> NaT
+    navs = np.array([r.get("nav") for r in rows], dtype=object)
+    nav_values = pd.to_numeric(pd.Series(navs), errors="coerce").to_numpy()
+
+    keep = ~pd.isna(dates) & np.isfinite(nav_values) & (nav_values > 0)
+    idx = np.flatnonzero(keep)
+    # Per scheme, newest first; stable so the first of two same-date points wins
+    order = idx[np.lexsort((-dates[idx].astype("int64"), fund[idx]))]
+    order = order[np.r_[True, (fund[order][1:] != fund[order][:-1]) | (dates[order][1:] != dates[order][:-1])]]
+
+    date_str = uniques.astype(object)[codes[order]]
+    nav_out = navs[order]
+    bounds = np.searchsorted(fund[order], np.arange(len(schemes) + 1))
+    for i, scheme in enumerate(schemes):
+        lo, hi = bounds[i], bounds[i + 1]
+        scheme["data"] = [{"date": d, "nav": n} for d, n in zip(date_str[lo:hi], nav_out[lo:hi])]
+
+    return len(rows) - len(order)
+
+
+def nav_frame(scheme, ffill=False):
+    """
+    DataFrame[date, nav] (oldest first) for one scheme from this dataset.
+    ffill=True adds every calendar day between the first and last NAV,
+    carrying the previous NAV forward (what the old stored file held).
+    """
+    data = scheme.get("data") or []
+    df = pd.DataFrame({
+        "date": parse_nav_dates([r["date"] for r in data]),
+        "nav": pd.to_numeric([r["nav"] for r in data], errors="coerce"),
+    }).dropna().drop_duplicates("date").sort_values("date")
+    if ffill and len(df) > 1:
+        df = (df.set_index("date")
+                .reindex(pd.date_range(df["date"].iloc[0], df["date"].iloc[-1], freq="D", name="date"))
+                .ffill()
+                .reset_index())
+    return df.reset_index(drop=True)
+
+
+def load_parent_nav(path=OUTPUT_FILE):
+    """{scheme_code: scheme} from parent_scheme_nav.json."""
+    with open(path, "r", encoding="utf-8") as f:
+        schemes = json.load(f)
+    return {
+        str(s.get("meta", {}).get("scheme_code")): s
+        for s in schemes
+        if s.get("meta", {}).get("scheme_code")
+    }
 
-        filled.append((next_date, next_nav))
-        cur_date, cur_nav = next_date, next_nav
 
-    scheme["data"] = [
-        {"date": d.strftime(DATE_FMT), "nav": nav}
-        for d, nav in reversed(filled)
-    ]
+# ---------------------------------------------------------
+# NAV Store Lookup
+# ---------------------------------------------------------
 
-    return scheme
+def iter_canonical_schemes(codes):
+    """
+    (code, scheme) for each canonical code: seeks through the NAV store's
+    offset index, so only parent schemes are ever parsed. Falls back to one
+    streaming pass over the legacy JSON array.
+    """
+    if NAV_STORE_FILE.exists():
+        store = open_nav_store()
+        for code in sorted(codes):
+            scheme = store.get(code)
+            if scheme is not None:
+                yield code, scheme
+        return
+
+    for scheme in iter_nav_schemes():
+        code = str(scheme.get("meta", {}).get("scheme_code"))
+        if code in codes:
+            yield code, scheme
 
 
 # ---------------------------------------------------------
@@ -113,54 +184,42 @@ def build_dataset():
     failed = []
     duplicate_nav = []
 
-    futures = []
-
-    with ThreadPoolExecutor(max_workers=THREADS) as executor:
-        with open(OUTPUT_FILE, "w", encoding="utf-8") as out:
-
-            out.write("[\n")
-
-            with open(FULL_NAV_FILE, "rb") as f:
-
-                # Submit work
-                for scheme in ijson.items(f, "item"):
-
-                    code = str(scheme.get("meta", {}).get("scheme_code"))
-
-                    if code not in canonical_codes:
-                        continue
+    schemes = []
+    for code, scheme in iter_canonical_schemes(canonical_codes):
 
-                    if code in found:
-                        duplicate_nav.append(code)
-                        continue
+        if code in found:
+            duplicate_nav.append(code)
+            continue
 
-                    future = executor.submit(process_scheme, scheme)
-                    futures.append((code, future))
-                    found.add(code)
+        schemes.append((code, scheme))
+        found.add(code)
 
-                # Collect results with progress bar
-                first = True
-                with tqdm(total=len(futures),
-                          desc="Processing Parents",
-                          unit="scheme") as bar:
+    had_data = [bool(scheme.get("data")) for _, scheme in schemes]
+    dropped = normalize_nav_points([scheme for _, scheme in schemes])
 
-                    for code, future in futures:
-                        try:
-                            scheme = future.result()
+    tmp = OUTPUT_FILE.with_name(OUTPUT_FILE.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as out:
 
-                            if not first:
-                                out.write(",\n")
+        out.write("[\n")
+        first = True
 
-                            json.dump(scheme, out)
-                            first = False
+        for (code, scheme), has_data in tqdm(zip(schemes, had_data), total=len(schemes),
+                                             desc="Writing Parents", unit="scheme"):
+            # Every point was unparseable
+            if has_data and not scheme["data"]:
+                failed.append(code)
+                continue
 
-                        except Exception:
-                            failed.append(code)
+            if not first:
+                out.write(",\n")
 
-                        bar.update(1)
+            # dumps (C encoder) + one write; json.dump to a file encodes in pure Python
+            out.write(json.dumps(scheme))
+            first = False
 
-            out.write("\n]")
+        out.write("\n]")
 
+    os.replace(tmp, OUTPUT_FILE)
 
     not_found = canonical_codes - found
 
@@ -189,6 +248,7 @@ def build_dataset():
     logger.info(f"Written Successfully      : {len(found)}")
     logger.info(f"Not Found In NAV          : {len(not_found)}")
     logger.info(f"Failed Processing         : {len(failed)}")
+    logger.info(f"Dropped NAV Points        : {dropped}")
     logger.info(f"Duplicate In NAV          : {len(duplicate_nav)}")
 
     # 🔹 Print Lists
@@ -211,4 +271,5 @@ def build_dataset():
 # ---------------------------------------------------------
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     build_dataset()
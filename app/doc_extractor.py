@@ -1,13 +1,20 @@
+import os
+import sys
 import json
+import time
+import random
+import asyncio
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 import traceback
 import re
 from datetime import datetime, timezone
 
-from pypdf import PdfReader
-from app.openai_client import OpenAIClient
+from app import pdf_text
+from app.openai_client import OpenAIClient, get_async_client
+from app.extraction_cache import ExtractionCache, prompt_version, sha256_file
 
 # -------------------------------------------------------------------
 # Paths & Configuration
@@ -17,10 +24,28 @@ BASE_DIR = Path(__file__).resolve().parents[1]
 
 INPUT_SUMMARY_PDF_DIR = BASE_DIR / "data" / "summary_scheme_pdf"
 OUTPUT_SUMMARY_DIR = BASE_DIR / "data" / "scheme_summary_extract"
+# {parent_scheme_name: per-PDF output}, read by masterlist / metrics / merge
+SUMMARIES_FILE = OUTPUT_SUMMARY_DIR / "all_scheme_summaries.json"
 
 OUTPUT_SUMMARY_DIR.mkdir(parents=True, exist_ok=True)
 
 MAX_DOC_CHARS = 12000
+EXTRACTION_MODEL = "gpt-4.1-mini"
+PDF_TEXT_BACKEND = pdf_text.default_backend()   # pymupdf when installed
+TEXT_EXTRACTOR = f"{PDF_TEXT_BACKEND}-v2"         # bump when extract_pdf_text changes
+SYSTEM_MESSAGE = "Return strict JSON only"
+
+# Pipeline: PDF text in a process pool, LLM calls in a bounded async pool
+PDF_WORKERS = min(8, os.cpu_count() or 2)
+LLM_CONCURRENCY = 16
+LLM_REQUESTS_PER_MIN = 500
+LLM_TOKENS_PER_MIN = 2_000_000
+LLM_MAX_OUTPUT_TOKENS = 1000   # rate-limit estimate only
+LLM_MAX_RETRIES = 5
+WRITE_BATCH_SIZE = 25
+
+BATCH_DIR = BASE_DIR / "data" / "summary_batch"
+BATCH_STATE_FILE = BATCH_DIR / "batch_state.json"
 
 # -------------------------------------------------------------------
 # Logging
@@ -256,6 +281,22 @@ ETF expense rule:
     Do NOT use "Regular".
 
 
+--------------------------------------------------
+AUM / FUND MANAGER RULES
+--------------------------------------------------
+
+- aum must be the fund's total AUM in Rs crore as a numeric string
+  (strip "Rs", "₹", "Cr", "crore" and commas). Use the latest
+  "As on" figure. Convert lakh to crore only if the PDF states lakh.
+
+- fund_managers must be a LIST of:
+  {
+    "name": "manager name",
+    "managing_since": "date as written, e.g. Apr 2020 or 01-04-2020"
+  }
+  managing_since is null when the PDF does not state it.
+
+
 --------------------------------------------------
 GENERAL RULES
 --------------------------------------------------
@@ -277,27 +318,50 @@ FIELDS TO EXTRACT
 - asset_allocation
 - benchmark
 - fund_managers
+- aum
 - annual_expense
 - exit_load
 - amfi_codes
 - isins
 """
 
+# Changes whenever the prompt or the truncation changes -> only the LLM stage re-runs
+PROMPT_VERSION = prompt_version(SYSTEM_MESSAGE, SUMMARY_EXTRACTION_PROMPT, MAX_DOC_CHARS)
+
+EXTRACTION_CACHE = ExtractionCache()
+
 # -------------------------------------------------------------------
 # PDF Utilities
 # -------------------------------------------------------------------
 
 def extract_pdf_text(pdf_path: Path) -> str:
-    reader = PdfReader(str(pdf_path))
-    text = []
-    for page in reader.pages:
-        try:
-            t = page.extract_text()
-            if t:
-                text.append(t)
-        except Exception:
-            pass
-    return "\n".join(text)
+    # Only the first MAX_DOC_CHARS reach the prompt; later pages are read
+    # only when they hold the ISIN / AMFI tables (for the regex fallbacks)
+    return pdf_text.extract_summary_text(pdf_path, max_chars=MAX_DOC_CHARS, backend=PDF_TEXT_BACKEND)
+
+
+def load_pdf_text(pdf_path: Path, pdf_sha: str) -> str:
+    """PDF text from the content-addressed cache, extracting on a miss."""
+    text = EXTRACTION_CACHE.get_text(pdf_sha, TEXT_EXTRACTOR)
+    if text is None:
+        text = extract_pdf_text(pdf_path)
+        if text.strip():
+            EXTRACTION_CACHE.put_text(pdf_sha, TEXT_EXTRACTOR, text)
+    return text
+
+
+def extraction_key(pdf_sha: str) -> str:
+    return ExtractionCache.llm_key(pdf_sha, TEXT_EXTRACTOR, PROMPT_VERSION, EXTRACTION_MODEL)
+
+
+def cache_llm_output(pdf_sha: str, pdf_name: str, content: str):
+    EXTRACTION_CACHE.put_llm(extraction_key(pdf_sha), content, {
+        "source_file": pdf_name,
+        "pdf_sha256": pdf_sha,
+        "text_extractor": TEXT_EXTRACTOR,
+        "prompt_version": PROMPT_VERSION,
+        "model": EXTRACTION_MODEL,
+    })
 
 # -------------------------------------------------------------------
 # Regex fallback extractors
@@ -363,27 +427,17 @@ def infer_fund_options(raw_options, amfi_codes, isins, full_text):
 # Core Processing
 # -------------------------------------------------------------------
 
-def process_single_summary_pdf(pdf_path: Path):
-    output_path = OUTPUT_SUMMARY_DIR / f"{pdf_path.stem}.json"
-    logger.info("Processing summary PDF: %s", pdf_path.name)
-
-    text = extract_pdf_text(pdf_path)
-    if not text.strip():
-        raise RuntimeError("No text extracted")
-
-    client = OpenAIClient().client
+def build_extraction_messages(text: str):
     prompt = SUMMARY_EXTRACTION_PROMPT + "\n\n" + text[:MAX_DOC_CHARS]
+    return [
+        {"role": "system", "content": SYSTEM_MESSAGE},
+        {"role": "user", "content": prompt},
+    ]
 
-    response = client.chat.completions.create(
-        model="gpt-4.1-mini",
-        temperature=0,
-        messages=[
-            {"role": "system", "content": "Return strict JSON only"},
-            {"role": "user", "content": prompt},
-        ],
-    )
 
-    extracted = safe_json_loads(response.choices[0].message.content)
+def build_summary_output(pdf_name: str, pdf_sha: str, text: str, llm_content: str) -> Dict[str, Any]:
+    """LLM JSON + regex fallbacks -> the per-PDF output document."""
+    extracted = safe_json_loads(llm_content)
 
     extracted["annual_expense"] = normalize_annual_expense(
         extracted.get("annual_expense")
@@ -405,53 +459,369 @@ def process_single_summary_pdf(pdf_path: Path):
    )
 
 
-    output = {
+    return {
         "parent_scheme_name": extracted.get("fund_name"),
-        "source_file": pdf_path.name,
+        "source_file": pdf_name,
         "source": "summary_pdf",
         "data": extracted,
         "fund_options_inferred": fund_options,
         "extracted_at": datetime.now(timezone.utc).isoformat(),
+        "source_sha256": pdf_sha,
+        "extraction_key": extraction_key(pdf_sha),
     }
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
 
-    logger.info("Saved → %s", output_path.name)
+def write_summary_outputs(outputs: List[Dict[str, Any]]):
+    """Write a batch of per-PDF outputs (atomic replace, one call per batch)."""
+    for output in outputs:
+        output_path = OUTPUT_SUMMARY_DIR / f"{Path(output['source_file']).stem}.json"
+        tmp_path = output_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(output, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, output_path)
+    if outputs:
+        logger.info("Saved batch of %d → %s", len(outputs), OUTPUT_SUMMARY_DIR.name)
+
+
+def combine_summary_outputs():
+    """
+    Rebuild SUMMARIES_FILE from every per-PDF output. Two PDFs naming the
+    same parent scheme: the later extraction wins.
+    """
+    combined, unnamed = {}, 0
+    for path in sorted(OUTPUT_SUMMARY_DIR.glob("*.json")):
+        if path == SUMMARIES_FILE:
+            continue
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                output = json.load(f)
+        except Exception:
+            logger.error("Unreadable summary output: %s", path.name)
+            continue
+        name = (output.get("parent_scheme_name") or "").strip()
+        if not name:
+            unnamed += 1
+            continue
+        previous = combined.get(name)
+        if previous is None or (output.get("extracted_at") or "") >= (previous.get("extracted_at") or ""):
+            combined[name] = output
+
+    tmp_path = SUMMARIES_FILE.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(combined, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, SUMMARIES_FILE)
+    logger.info("Combined %d parent schemes → %s (%d outputs without a fund name)",
+                len(combined), SUMMARIES_FILE.name, unnamed)
+
+
+def process_single_summary_pdf(pdf_path: Path):
+    logger.info("Processing summary PDF: %s", pdf_path.name)
+
+    pdf_sha = sha256_file(pdf_path)
+    text = load_pdf_text(pdf_path, pdf_sha)
+    if not text.strip():
+        raise RuntimeError("No text extracted")
+
+    content = EXTRACTION_CACHE.get_llm(extraction_key(pdf_sha))
+    if content is None:
+        client = OpenAIClient().client
+
+        response = client.chat.completions.create(
+            model=EXTRACTION_MODEL,
+            temperature=0,
+            messages=build_extraction_messages(text),
+        )
+        content = response.choices[0].message.content
+        cache_llm_output(pdf_sha, pdf_path.name, content)
+
+    output = build_summary_output(pdf_path.name, pdf_sha, text, content)
+    write_summary_outputs([output])
+
+# -------------------------------------------------------------------
+# Async LLM pool (bounded concurrency + rate limit + retry)
+# -------------------------------------------------------------------
+
+class AsyncRateLimiter:
+    """Requests/min and tokens/min buckets shared by all LLM workers."""
+
+    def __init__(self, requests_per_min: int, tokens_per_min: int):
+        self.rpm = requests_per_min
+        self.tpm = tokens_per_min
+        self.requests = float(requests_per_min)
+        self.tokens = float(tokens_per_min)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self.updated
+        self.updated = now
+        self.requests = min(self.rpm, self.requests + elapsed * self.rpm / 60)
+        self.tokens = min(self.tpm, self.tokens + elapsed * self.tpm / 60)
+
+    async def acquire(self, tokens: int):
+        tokens = min(tokens, self.tpm)
+        async with self.lock:
+            while True:
+                self._refill()
+                if self.requests >= 1 and self.tokens >= tokens:
+                    self.requests -= 1
+                    self.tokens -= tokens
+                    return
+                wait = max((1 - self.requests) * 60 / self.rpm,
+                           (tokens - self.tokens) * 60 / self.tpm, 0.05)
+                await asyncio.sleep(wait)
+
+
+def is_retryable(exc: Exception) -> bool:
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    name = type(exc).__name__
+    return "Timeout" in name or "Connection" in name or isinstance(exc, (TimeoutError, ConnectionError))
+
+
+async def call_llm_with_retry(client, messages, limiter: AsyncRateLimiter, semaphore: asyncio.Semaphore) -> str:
+    est_tokens = sum(len(m["content"]) for m in messages) // 4 + LLM_MAX_OUTPUT_TOKENS
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        await limiter.acquire(est_tokens)
+        try:
+            async with semaphore:
+                response = await client.chat.completions.create(
+                    model=EXTRACTION_MODEL,
+                    temperature=0,
+                    messages=messages,
+                )
+            return response.choices[0].message.content
+        except Exception as e:
+            if attempt >= LLM_MAX_RETRIES or not is_retryable(e):
+                raise
+            delay = random.uniform(0, min(60, 2 ** attempt))
+            logger.warning("LLM call failed (%s), retry %d in %.1fs", type(e).__name__, attempt + 1, delay)
+            await asyncio.sleep(delay)
 
 # -------------------------------------------------------------------
 # Batch Runner
 # -------------------------------------------------------------------
 
-def run_summary_extraction():
-    pdfs = sorted(INPUT_SUMMARY_PDF_DIR.glob("*.pdf"))
+def output_is_current(out: Path, pdf: Path, pdf_sha: str) -> bool:
+    """
+    Keyed outputs are current when their extraction_key matches. Outputs
+    written before extraction keys existed carry none; they are kept as
+    long as they are newer than their PDF (a re-downloaded PDF, or a
+    deleted output, sends them back through the LLM).
+    """
+    if not out.exists():
+        return False
+    try:
+        with open(out, "r", encoding="utf-8") as f:
+            key = json.load(f).get("extraction_key")
+    except Exception:
+        return False
+    if key is None:
+        return out.stat().st_mtime >= pdf.stat().st_mtime
+    return key == extraction_key(pdf_sha)
 
-    total, processed, skipped, failed = 0, 0, 0, 0
 
+def pending_summary_pdfs() -> List[Tuple[Path, str]]:
+    """(pdf, sha256) for PDFs whose output is missing or from other bytes / prompt / model."""
+    pdfs = sorted(INPUT_SUMMARY_PDF_DIR.glob("*.pdf"))
     logger.info("Found %d summary PDFs", len(pdfs))
 
+    pending = []
     for pdf in pdfs:
-        total += 1
-        out = OUTPUT_SUMMARY_DIR / f"{pdf.stem}.json"
+        pdf_sha = sha256_file(pdf)
+        if output_is_current(OUTPUT_SUMMARY_DIR / f"{pdf.stem}.json", pdf, pdf_sha):
+            continue
+        pending.append((pdf, pdf_sha))
+    return pending
+
+
+async def run_pipeline(pdfs: List[Tuple[Path, str]]) -> Dict[str, int]:
+    """
+    PDF text (process pool) -> LLM (bounded async pool) -> batched writes.
+    Stages overlap: a PDF's LLM call starts as soon as its text is ready.
+    Both stages are served from EXTRACTION_CACHE when their inputs are unchanged.
+    """
+    counts = {"processed": 0, "cached": 0, "failed": 0}
+    loop = asyncio.get_running_loop()
+    client = get_async_client()
+    limiter = AsyncRateLimiter(LLM_REQUESTS_PER_MIN, LLM_TOKENS_PER_MIN)
+    semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+    write_queue: asyncio.Queue = asyncio.Queue()
+
+    async def writer():
+        batch = []
+        while True:
+            output = await write_queue.get()
+            if output is not None:
+                batch.append(output)
+            if batch and (output is None or len(batch) >= WRITE_BATCH_SIZE):
+                await asyncio.to_thread(write_summary_outputs, batch)
+                batch = []
+            if output is None:
+                return
+
+    async def handle(pdf: Path, pdf_sha: str, pool: ProcessPoolExecutor):
         try:
-            if out.exists() and out.stat().st_mtime >= pdf.stat().st_mtime:
-                skipped += 1
-                continue
-            process_single_summary_pdf(pdf)
-            processed += 1
+            text = await loop.run_in_executor(pool, load_pdf_text, pdf, pdf_sha)
+            if not text.strip():
+                raise RuntimeError("No text extracted")
+            content = EXTRACTION_CACHE.get_llm(extraction_key(pdf_sha))
+            if content is None:
+                content = await call_llm_with_retry(client, build_extraction_messages(text), limiter, semaphore)
+                cache_llm_output(pdf_sha, pdf.name, content)
+            else:
+                counts["cached"] += 1
+            await write_queue.put(build_summary_output(pdf.name, pdf_sha, text, content))
+            counts["processed"] += 1
         except Exception:
-            failed += 1
+            counts["failed"] += 1
             logger.error("Failed processing %s", pdf.name)
             traceback.print_exc()
 
+    writer_task = asyncio.create_task(writer())
+    with ProcessPoolExecutor(max_workers=PDF_WORKERS) as pool:
+        await asyncio.gather(*(handle(pdf, pdf_sha, pool) for pdf, pdf_sha in pdfs))
+    await write_queue.put(None)
+    await writer_task
+    return counts
+
+
+def run_summary_extraction():
+    pdfs = sorted(INPUT_SUMMARY_PDF_DIR.glob("*.pdf"))
+    pending = pending_summary_pdfs()
+    started = time.time()
+
+    counts = asyncio.run(run_pipeline(pending)) if pending else {"processed": 0, "cached": 0, "failed": 0}
+
     logger.info(
-        "Summary extraction completed | total=%d | processed=%d | skipped=%d | failed=%d",
-        total, processed, skipped, failed
+        "Summary extraction completed | total=%d | processed=%d (llm cache hits=%d) | skipped=%d | failed=%d | %.1fs",
+        len(pdfs), counts["processed"], counts["cached"], len(pdfs) - len(pending), counts["failed"],
+        time.time() - started
+    )
+    combine_summary_outputs()
+
+# -------------------------------------------------------------------
+# Provider Batch API (overnight runs, ~50% cheaper, 24h window)
+# -------------------------------------------------------------------
+
+def extract_texts(pdfs: List[Tuple[Path, str]]) -> Dict[str, str]:
+    with ProcessPoolExecutor(max_workers=PDF_WORKERS) as pool:
+        texts = pool.map(load_pdf_text, [p for p, _ in pdfs], [sha for _, sha in pdfs], chunksize=4)
+        return {pdf.name: text for (pdf, _), text in zip(pdfs, texts) if text.strip()}
+
+
+def submit_summary_batch():
+    pending = pending_summary_pdfs()
+    if not pending:
+        logger.info("Nothing to submit")
+        return
+
+    texts = extract_texts(pending)
+    shas = {pdf.name: pdf_sha for pdf, pdf_sha in pending}
+
+    # LLM cache hits don't need the batch at all
+    cached = [(name, shas[name]) for name in texts if EXTRACTION_CACHE.get_llm(extraction_key(shas[name])) is not None]
+    write_summary_outputs([
+        build_summary_output(name, pdf_sha, texts[name], EXTRACTION_CACHE.get_llm(extraction_key(pdf_sha)))
+        for name, pdf_sha in cached
+    ])
+    to_submit = {name: shas[name] for name in texts if name not in dict(cached)}
+    if not to_submit:
+        logger.info("All %d pending PDFs served from the extraction cache", len(cached))
+        return
+
+    BATCH_DIR.mkdir(parents=True, exist_ok=True)
+    requests_file = BATCH_DIR / "requests.jsonl"
+    with open(requests_file, "w", encoding="utf-8") as f:
+        for pdf_name in to_submit:
+            f.write(json.dumps({
+                "custom_id": pdf_name,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {"model": EXTRACTION_MODEL, "temperature": 0, "messages": build_extraction_messages(texts[pdf_name])},
+            }, ensure_ascii=False) + "\n")
+
+    client = OpenAIClient().client
+    with open(requests_file, "rb") as f:
+        input_file = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
     )
 
+    with open(BATCH_STATE_FILE, "w", encoding="utf-8") as f:
+        json.dump({
+            "batch_id": batch.id,
+            "submitted_at": datetime.now(timezone.utc).isoformat(),
+            "pdfs": to_submit,
+        }, f, indent=2)
+    logger.info("Submitted batch %s with %d PDFs, %d from cache (collect with: batch-collect)",
+                batch.id, len(to_submit), len(cached))
+
+
+def collect_summary_batch():
+    if not BATCH_STATE_FILE.exists():
+        logger.info("No submitted batch")
+        return
+    with open(BATCH_STATE_FILE, "r", encoding="utf-8") as f:
+        state = json.load(f)
+
+    client = OpenAIClient().client
+    batch = client.batches.retrieve(state["batch_id"])
+    if batch.status != "completed":
+        logger.info("Batch %s status: %s (%s)", batch.id, batch.status, batch.request_counts)
+        return
+
+    results = {}
+    for line in client.files.content(batch.output_file_id).text.splitlines():
+        row = json.loads(line)
+        body = (row.get("response") or {}).get("body") or {}
+        if body.get("choices"):
+            pdf_name = row["custom_id"]
+            results[pdf_name] = body["choices"][0]["message"]["content"]
+            cache_llm_output(state["pdfs"][pdf_name], pdf_name, results[pdf_name])
+        else:
+            logger.error("Batch item failed: %s %s", row["custom_id"], row.get("error"))
+
+    outputs, processed = [], 0
+    for pdf_name, content in results.items():
+        try:
+            pdf_sha = state["pdfs"][pdf_name]
+            text = load_pdf_text(INPUT_SUMMARY_PDF_DIR / pdf_name, pdf_sha)
+            outputs.append(build_summary_output(pdf_name, pdf_sha, text, content))
+            processed += 1
+        except Exception:
+            logger.error("Failed processing %s", pdf_name)
+        if len(outputs) >= WRITE_BATCH_SIZE:
+            write_summary_outputs(outputs)
+            outputs = []
+    write_summary_outputs(outputs)
+
+    BATCH_STATE_FILE.unlink()
+    logger.info("Batch collected | processed=%d | failed=%d", processed, len(state["pdfs"]) - processed)
+    combine_summary_outputs()
+
 # -------------------------------------------------------------------
 # Entry Point
 # -------------------------------------------------------------------
 
+def main():
+    mode = sys.argv[1].lower() if len(sys.argv) > 1 else "online"
+    if mode == "online":
+        run_summary_extraction()
+    elif mode == "batch-submit":
+        submit_summary_batch()
+    elif mode == "batch-collect":
+        collect_summary_batch()
+    elif mode == "combine":
+        combine_summary_outputs()
+    else:
+        print("Usage: python -m app.doc_extractor [online|batch-submit|batch-collect|combine]")
+        sys.exit(1)
+
+
 if __name__ == "__main__":
-    run_summary_extraction()
+    main()
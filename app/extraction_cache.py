@@ -0,0 +1,86 @@
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# -------------------------------------------------------------------
+# Content-addressed cache for summary PDF extraction
+#
+#   text/<pdf_sha256>.<extractor>.txt.gz   PDF text   (PDF bytes + text extractor)
+#   llm/<key>.json                         LLM output (PDF bytes + extractor + prompt version + model)
+#
+# Re-downloading an unchanged PDF hits both stages; a new prompt or model
+# only re-runs the LLM stage; a new text extractor re-runs both.
+#
+# Summary outputs from before extraction keys (no "extraction_key") are
+# not re-extracted while they are newer than their PDF - see
+# doc_extractor.output_is_current. Delete one to force it through the LLM.
+# -------------------------------------------------------------------
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+EXTRACTION_CACHE_DIR = BASE_DIR / "data" / "extraction_cache"
+
+
+def sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def prompt_version(*parts: Any) -> str:
+    """Short hash of everything that shapes the LLM input (prompt text, truncation, ...)."""
+    h = hashlib.sha256("\x00".join(str(p) for p in parts).encode("utf-8"))
+    return h.hexdigest()[:12]
+
+
+def _atomic_write(path: Path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class ExtractionCache:
+    def __init__(self, root: Path = EXTRACTION_CACHE_DIR):
+        self.root = Path(root)
+        self.text_dir = self.root / "text"
+        self.llm_dir = self.root / "llm"
+
+    # ---------------- text stage ----------------
+
+    def _text_path(self, pdf_sha: str, extractor: str) -> Path:
+        return self.text_dir / f"{pdf_sha}.{extractor}.txt.gz"
+
+    def get_text(self, pdf_sha: str, extractor: str) -> Optional[str]:
+        path = self._text_path(pdf_sha, extractor)
+        if not path.exists():
+            return None
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return f.read()
+
+    def put_text(self, pdf_sha: str, extractor: str, text: str):
+        _atomic_write(self._text_path(pdf_sha, extractor), gzip.compress(text.encode("utf-8")))
+
+    # ---------------- LLM stage ----------------
+
+    @staticmethod
+    def llm_key(pdf_sha: str, extractor: str, prompt_ver: str, model: str) -> str:
+        return hashlib.sha256(f"{pdf_sha}|{extractor}|{prompt_ver}|{model}".encode("utf-8")).hexdigest()
+
+    def get_llm(self, key: str) -> Optional[str]:
+        path = self.llm_dir / f"{key}.json"
+        if not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)["content"]
+
+    def put_llm(self, key: str, content: str, meta: Dict[str, Any]):
+        record = {**meta, "content": content, "cached_at": datetime.now(timezone.utc).isoformat()}
+        _atomic_write(self.llm_dir / f"{key}.json",
+                      json.dumps(record, ensure_ascii=False, indent=2).encode("utf-8"))
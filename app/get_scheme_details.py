@@ -2,70 +2,201 @@ import os
 import sys
 import json
 import time
-import requests
-from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import random
+import asyncio
+import httpx
+import ijson
+from collections import defaultdict
+from datetime import date, datetime, timedelta
 from pathlib import Path
 
+from app.record_store import RecordReader, RecordWriter, remove as remove_records
+
 BASE_LIST_URL = "https://api.mfapi.in/mf"
 BASE_SCHEME_URL = "https://api.mfapi.in/mf/{code}"
+BASE_LATEST_URL = "https://api.mfapi.in/mf/{code}/latest"
 
-SLEEP_BETWEEN_CALLS = 0.05
 BATCH_SIZE = 100
 PER_REQUEST_TIMEOUT = 20
-MAX_RETRIES_PER_SCHEME = 3
-RETRY_BACKOFF_SECONDS = [120, 240, 360]  # 2, 4, 6 minutes
-MAX_WORKERS = 8
+MAX_RETRIES_PER_SCHEME = 5
+RETRY_BACKOFF_BASE = 2       # seconds; full jitter, doubles per attempt
+RETRY_BACKOFF_CAP = 120      # seconds
+CONCURRENCY = int(os.environ.get("MFAPI_CONCURRENCY", "32"))
+
+# Adaptive (AIMD) request rate shared by all in-flight fetches
+RATE_START = 20.0            # requests / second
+RATE_MIN = 1.0
+RATE_MAX = float(os.environ.get("MFAPI_MAX_RATE", "80"))
+RATE_INCREASE = 0.5          # + per success
+RATE_DECREASE = 0.5          # x on 429 / 5xx / timeout
+RATE_DECREASE_COOLDOWN = 2.0 # seconds; concurrent failures count as one event
+
 BASE_DIR = Path(__file__).resolve().parents[1]
 DATA_DIR = BASE_DIR / "data"
-FINAL_JSON = os.path.join(DATA_DIR, "all_scheme_full_details.json")
-TEMP_JSON = os.path.join(DATA_DIR, "all_scheme_full_details_temp.json")
+# One scheme object per line + offset index (app/record_store.py)
+NAV_STORE_FILE = DATA_DIR / "all_scheme_full_details.ndjson"
+# JSON array written before the record store; read once to migrate
+LEGACY_FINAL_JSON = DATA_DIR / "all_scheme_full_details.json"
 FAILED_CODES_FILE = os.path.join(DATA_DIR, "failed_scheme_codes.json")
+# Incremental mode: last stored NAV date per scheme + NAV points not yet merged into the store
+NAV_STATE_FILE = os.path.join(DATA_DIR, "nav_fetch_state.json")
+NAV_DELTAS_FILE = DATA_DIR / "all_scheme_nav_deltas.ndjson"
 
 
 def fetch_all_schemes():
-    resp = requests.get(BASE_LIST_URL, timeout=PER_REQUEST_TIMEOUT)
+    resp = httpx.get(BASE_LIST_URL, timeout=PER_REQUEST_TIMEOUT)
     resp.raise_for_status()
     return resp.json()
 
 
-def fetch_scheme_details_with_retry(code, name):
-    url = BASE_SCHEME_URL.format(code=code)
+# ---------------------------------------------------------
+# Async fetcher
+# ---------------------------------------------------------
+
+class AdaptiveRateLimiter:
+    """
+    Global pacing for all workers: additive increase on success,
+    multiplicative decrease on throttling / server errors, and a shared
+    pause when the server sends Retry-After.
+    """
+
+    def __init__(self, rate=RATE_START, max_rate=RATE_MAX):
+        self.rate = rate
+        self.max_rate = max_rate
+        self.next_slot = 0.0
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot, self.paused_until)
+            self.next_slot = slot + 1.0 / self.rate
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def on_success(self):
+        self.rate = min(self.max_rate, self.rate + RATE_INCREASE)
+
+    def on_throttle(self, retry_after=None):
+        now = time.monotonic()
+        if now - self.last_decrease >= RATE_DECREASE_COOLDOWN:
+            self.rate = max(RATE_MIN, self.rate * RATE_DECREASE)
+            self.last_decrease = now
+        if retry_after:
+            self.paused_until = max(self.paused_until, now + retry_after)
+
+
+def _retry_after_seconds(resp):
+    try:
+        return float(resp.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+async def fetch_scheme_details_async(client, limiter, code, name, url=None):
+    """Scheme JSON, or None after MAX_RETRIES_PER_SCHEME attempts / a non-retryable HTTP error."""
+    url = url or BASE_SCHEME_URL.format(code=code)
     last_exc = None
 
     for attempt in range(1, MAX_RETRIES_PER_SCHEME + 1):
+        await limiter.acquire()
         try:
-            resp = requests.get(url, timeout=PER_REQUEST_TIMEOUT)
+            resp = await client.get(url)
+            if resp.status_code == 429 or resp.status_code >= 500:
+                limiter.on_throttle(_retry_after_seconds(resp))
+                raise httpx.HTTPStatusError(f"HTTP {resp.status_code}", request=resp.request, response=resp)
             resp.raise_for_status()
             js = resp.json()
+            limiter.on_success()
             js["_list_schemeCode"] = code
             js["_list_schemeName"] = name
             return js
-        except (requests.exceptions.ConnectTimeout,
-                requests.exceptions.ReadTimeout,
-                requests.exceptions.ConnectionError) as e:
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 429 and e.response.status_code < 500:
+                print(f"[WARN] HTTP error for scheme {code}: {e}")
+                return None
+            last_exc = e
+        except (httpx.TimeoutException, httpx.TransportError, ValueError) as e:
+            limiter.on_throttle()
             last_exc = e
-            print(f"[WARN] Network/timeout for scheme {code} "
-                  f"(attempt {attempt}/{MAX_RETRIES_PER_SCHEME}): {e}")
-            if attempt < MAX_RETRIES_PER_SCHEME:
-                wait_sec = RETRY_BACKOFF_SECONDS[attempt - 1]
-                print(f"[INFO] Waiting {wait_sec/60:.1f} minutes before retry of {code}...")
-                time.sleep(wait_sec)
-        except requests.exceptions.HTTPError as e:
-            print(f"[WARN] HTTP error for scheme {code}: {e}")
-            return None
+
+        if attempt < MAX_RETRIES_PER_SCHEME:
+            # Full jitter; the coroutine yields, other fetches keep going
+            wait_sec = random.uniform(0, min(RETRY_BACKOFF_CAP, RETRY_BACKOFF_BASE * 2 ** attempt))
+            print(f"[WARN] {type(last_exc).__name__} for scheme {code} "
+                  f"(attempt {attempt}/{MAX_RETRIES_PER_SCHEME}), retry in {wait_sec:.1f}s")
+            await asyncio.sleep(wait_sec)
 
     print(f"[ERROR] Giving up on scheme {code} after {MAX_RETRIES_PER_SCHEME} attempts: {last_exc}")
     return None
 
 
-def backup_existing_final():
-    if not os.path.exists(FINAL_JSON):
+async def _fetch_schemes(items, on_result):
+    limiter = AdaptiveRateLimiter()
+    limits = httpx.Limits(max_connections=CONCURRENCY, max_keepalive_connections=CONCURRENCY)
+    queue = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+
+    async with httpx.AsyncClient(timeout=PER_REQUEST_TIMEOUT, limits=limits) as client:
+        async def worker():
+            while True:
+                try:
+                    code, name, *url = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                details = await fetch_scheme_details_async(client, limiter, code, name, *url)
+                on_result(code, details)
+
+        await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+    print(f"[INFO] Final request rate: {limiter.rate:.1f}/s")
+
+
+def fetch_schemes(items, on_result):
+    """
+    Fetch [(code, name), ...] concurrently over one keep-alive pool
+    (items may carry a third element: the URL to GET instead of the full history).
+    on_result(code, details_or_None) is called as each scheme finishes.
+    """
+    started = time.time()
+    asyncio.run(_fetch_schemes(items, on_result))
+    print(f"[INFO] Fetched {len(items)} schemes in {time.time() - started:.1f}s")
+
+
+def scheme_key(scheme):
+    code = scheme.get("_list_schemeCode") or (scheme.get("meta") or {}).get("scheme_code")
+    return str(code)
+
+
+def open_nav_store():
+    """RecordReader over the NAV store; .get(code) reads one scheme without parsing the rest."""
+    return RecordReader(NAV_STORE_FILE, key=scheme_key)
+
+
+def iter_nav_schemes():
+    """Stream every scheme object from the NAV store (or the legacy JSON array)."""
+    if NAV_STORE_FILE.exists():
+        yield from open_nav_store()
+    elif LEGACY_FINAL_JSON.exists():
+        with open(LEGACY_FINAL_JSON, "rb") as f:
+            yield from ijson.items(f, "item", use_float=True)
+    else:
+        raise FileNotFoundError(f"{NAV_STORE_FILE} does not exist. Run in 'full' mode first.")
+
+
+def ensure_nav_store():
+    """Migrate the legacy JSON array into the record store the first time it is needed."""
+    if NAV_STORE_FILE.exists():
         return
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_name = os.path.join(DATA_DIR, f"all_scheme_full_details_{ts}.json")
-    print(f"[INFO] Backing up existing file to {backup_name}")
-    os.rename(FINAL_JSON, backup_name)
+    if not LEGACY_FINAL_JSON.exists():
+        raise RuntimeError(f"Main output {NAV_STORE_FILE} does not exist. Run in 'full' mode first.")
+    print(f"[INFO] Migrating {LEGACY_FINAL_JSON} -> {NAV_STORE_FILE}")
+    with RecordWriter(NAV_STORE_FILE, key=scheme_key) as store:
+        for scheme in iter_nav_schemes():
+            store.write(scheme)
+    print(f"[INFO] Migrated {store.count} schemes")
 
 
 def write_failed_codes(codes):
@@ -94,117 +225,43 @@ def run_full():
     total = len(schemes)
     print(f"[INFO] Total schemes: {total}")
 
-    backup_existing_final()
-
-    with open(TEMP_JSON, "w", encoding="utf-8") as f:
-        f.write("[\n")
-
-    written = 0
-    batch = []
     failed_codes = set()
+    state = {}
 
     try:
-        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            future_to_code = {}
-
-            for s in schemes:
-                code = s.get("schemeCode")
-                name = s.get("schemeName", "")
-                if not code:
-                    continue
-                fut = executor.submit(fetch_scheme_details_with_retry, code, name)
-                future_to_code[fut] = code
-
-            total_tasks = len(future_to_code)
-
-            for idx, future in enumerate(as_completed(future_to_code), start=1):
-                code = future_to_code[future]
-                details = future.result()
+        # The previous store stays in place until the new one is complete and fsynced
+        with RecordWriter(NAV_STORE_FILE, key=scheme_key) as store:
+            def on_result(code, details):
                 if not details:
                     failed_codes.add(code)
-                else:
-                    batch.append(details)
-
-                if len(batch) >= BATCH_SIZE or idx == total_tasks:
-                    with open(TEMP_JSON, "a", encoding="utf-8") as f:
-                        for i, rec in enumerate(batch):
-                            if written > 0 or i > 0:
-                                f.write(",\n")
-                            json.dump(rec, f, ensure_ascii=False)
-                            written += 1
-                    print(f"[INFO] Written {written} scheme objects so far...")
-                    batch.clear()
-                    time.sleep(SLEEP_BETWEEN_CALLS)
-
-        with open(TEMP_JSON, "a", encoding="utf-8") as f:
-            f.write("\n]\n")
-
-        # Save failed codes (single file)
-        write_failed_codes(list(failed_codes))
-
-        # Promote temp -> final
-        if os.path.exists(FINAL_JSON):
-            ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-            extra_backup = os.path.join(DATA_DIR, f"all_scheme_full_details_extra_{ts}.json")
-            print(f"[INFO] Extra backup of unexpected final file to {extra_backup}")
-            os.rename(FINAL_JSON, extra_backup)
-
-        os.rename(TEMP_JSON, FINAL_JSON)
-        print(f"[INFO] Done. Final JSON written to {FINAL_JSON}")
+                    return
+                store.write(details)
+                state[str(code)] = nav_state_entry(details)
+                if store.count % BATCH_SIZE == 0:
+                    print(f"[INFO] Written {store.count} scheme objects so far...")
+
+            items = [(s["schemeCode"], s.get("schemeName", "")) for s in schemes if s.get("schemeCode")]
+            fetch_schemes(items, on_result)
 
     except Exception as e:
         print(f"[ERROR] Run failed: {e}")
-        print(f"[INFO] Leaving temp file at {TEMP_JSON} for inspection.")
+        print(f"[INFO] Previous {NAV_STORE_FILE} left untouched.")
         raise
 
+    print(f"[INFO] Done. {store.count} scheme objects written to {NAV_STORE_FILE}")
 
-def append_batch_to_final(batch, appended_count):
-    """Append a batch of scheme objects to existing FINAL_JSON (JSON array)."""
-    if not batch:
-        return appended_count
-
-    with open(FINAL_JSON, "r+", encoding="utf-8") as f:
-        f.seek(0, os.SEEK_END)
-        pos = f.tell()
-
-        # Find last non-whitespace char
-        while pos > 0:
-            pos -= 1
-            f.seek(pos, os.SEEK_SET)
-            ch = f.read(1)
-            if not ch.isspace():
-                break
-
-        if ch != ']':
-            raise RuntimeError("Unexpected JSON format in final file; expected array ending with ']'")
-
-        # Truncate closing bracket
-        f.seek(pos, os.SEEK_SET)
-        f.truncate()
-
-        # Check if there is at least one element already
-        f.seek(0)
-        content = f.read().strip()
-        has_content = len(content) > 1  # at least '[' + something
-
-        # Append new elements
-        f.seek(0, os.SEEK_END)
-        for i, rec in enumerate(batch):
-            if has_content or i > 0 or appended_count > 0:
-                f.write(",\n")
-            json.dump(rec, f, ensure_ascii=False)
-            appended_count += 1
+    # Save failed codes (single file)
+    write_failed_codes(list(failed_codes))
 
-        f.write("\n]\n")
-
-    return appended_count
+    # Fresh store: start incremental tracking from here
+    save_nav_state(state)
+    remove_records(NAV_DELTAS_FILE)
 
 
 def run_retry():
     print("[INFO] RETRY mode: processing only failed scheme codes and appending to existing output")
 
-    if not os.path.exists(FINAL_JSON):
-        raise RuntimeError(f"Main output {FINAL_JSON} does not exist. Run in 'full' mode first.")
+    ensure_nav_store()
 
     failed_codes = load_failed_codes()
     if not failed_codes:
@@ -217,38 +274,28 @@ def run_retry():
     schemes = fetch_all_schemes()
     code_to_name = {s.get("schemeCode"): s.get("schemeName", "") for s in schemes}
 
-    batch = []
-    appended = 0
     still_failed = set(failed_codes)  # start with all; remove successes
+    state = load_nav_state() if os.path.exists(NAV_STATE_FILE) else None
 
     try:
-        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            future_to_code = {}
-
-            for code in failed_codes:
-                name = code_to_name.get(code, "")
-                fut = executor.submit(fetch_scheme_details_with_retry, code, name)
-                future_to_code[fut] = code
-
-            total_tasks = len(future_to_code)
-
-            for idx, future in enumerate(as_completed(future_to_code), start=1):
-                code = future_to_code[future]
-                details = future.result()
-                if details:
-                    batch.append(details)
-                    # success: remove from still_failed
-                    if code in still_failed:
-                        still_failed.remove(code)
-
-                if len(batch) >= BATCH_SIZE or idx == total_tasks:
-                    appended = append_batch_to_final(batch, appended)
-                    print(f"[INFO] Appended {appended} retried scheme objects so far...")
-                    batch.clear()
-                    time.sleep(SLEEP_BWEEN_CALLS)
+        # Appends are committed together; a crash leaves the store as it was
+        with RecordWriter(NAV_STORE_FILE, key=scheme_key, append=True) as store:
+            def on_result(code, details):
+                if not details:
+                    return
+                store.write(details)
+                # success: remove from still_failed
+                still_failed.discard(code)
+                if state is not None:
+                    state[str(code)] = nav_state_entry(details)
+
+            fetch_schemes([(code, code_to_name.get(code, "")) for code in failed_codes], on_result)
+        print(f"[INFO] Appended {len(failed_codes) - len(still_failed)} retried scheme objects")
 
         # Update failed codes file: only remaining failed
         write_failed_codes(list(still_failed))
+        if state is not None:
+            save_nav_state(state)
         print("[INFO] Retry run completed")
 
     except Exception as e:
@@ -256,16 +303,238 @@ def run_retry():
         raise
 
 
+# ---------------------------------------------------------
+# Incremental mode
+#
+# NAV_STATE_FILE keeps {code: {last_date, name, status}} so a daily run
+# never has to re-read the store or re-download full histories:
+#   1. every known, still-listed scheme is probed via /mf/{code}/latest
+#      (one NAV point, a few hundred bytes)
+#   2. if the latest point is the only one missing it is kept as is;
+#      if business days were skipped, the full history is fetched and only
+#      points newer than last_date are kept
+#   3. codes new to the list get a full fetch; codes gone from the list
+#      are marked closed
+# Newer points are appended to NAV_DELTAS_FILE (one scheme object per
+# line, same shape as NAV store entries, data = new points only);
+# 'compact' merges them into NAV_STORE_FILE.
+# ---------------------------------------------------------
+
+def parse_nav_date(value):
+    return datetime.strptime(value, "%d-%m-%Y").date()
+
+
+def last_nav_date(details):
+    """Newest 'dd-mm-yyyy' date in a scheme object (None when it has no NAV points)."""
+    dates = [p["date"] for p in details.get("data") or [] if p.get("date")]
+    return max(dates, key=parse_nav_date) if dates else None
+
+
+def nav_state_entry(details, status="active"):
+    return {
+        "last_date": last_nav_date(details),
+        "name": details.get("_list_schemeName") or (details.get("meta") or {}).get("scheme_name", ""),
+        "status": status,
+    }
+
+
+def build_nav_state_from_store():
+    """One-off scan of the store for stores written before state tracking existed."""
+    state = {}
+    if not NAV_STORE_FILE.exists() and not LEGACY_FINAL_JSON.exists():
+        return state
+    print(f"[INFO] Building {NAV_STATE_FILE} from the NAV store (one-off)")
+    for scheme in iter_nav_schemes():
+        state[scheme_key(scheme)] = nav_state_entry(scheme)
+    return state
+
+
+def load_nav_state():
+    if not os.path.exists(NAV_STATE_FILE):
+        return build_nav_state_from_store()
+    with open(NAV_STATE_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_nav_state(state):
+    tmp = NAV_STATE_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp, NAV_STATE_FILE)
+    print(f"[INFO] NAV state saved for {len(state)} schemes: {NAV_STATE_FILE}")
+
+
+def weekdays_between(start, end):
+    """Mon-Fri dates strictly between two dates."""
+    day, count = start + timedelta(days=1), 0
+    while day < end:
+        if day.weekday() < 5:
+            count += 1
+        day += timedelta(days=1)
+    return count
+
+
+def newer_points(details, last_date):
+    if not last_date:
+        return list(details.get("data") or [])
+    last = parse_nav_date(last_date)
+    return [p for p in details.get("data") or [] if p.get("date") and parse_nav_date(p["date"]) > last]
+
+
+def append_deltas(records):
+    with RecordWriter(NAV_DELTAS_FILE, append=True) as deltas:
+        for rec in records:
+            deltas.write(rec)
+
+
+def run_incremental():
+    print("[INFO] INCREMENTAL mode: fetching only NAV points newer than the store")
+
+    state = load_nav_state()
+    if not state:
+        raise RuntimeError(f"No NAV state or {NAV_STORE_FILE}. Run in 'full' mode first.")
+
+    schemes = fetch_all_schemes()
+    listed = {str(s["schemeCode"]): s.get("schemeName", "") for s in schemes if s.get("schemeCode")}
+    list_codes = {str(s["schemeCode"]): s["schemeCode"] for s in schemes if s.get("schemeCode")}
+    today = date.today().strftime("%d-%m-%Y")
+
+    new_codes = [code for code in listed if code not in state]
+    new_codes_set = set(new_codes)
+    closed_codes = [code for code, st in state.items()
+                    if code not in listed and st.get("status") != "closed"]
+    known_codes = [code for code in listed if code in state]
+    print(f"[INFO] Listed: {len(listed)}  known: {len(known_codes)}  "
+          f"new: {len(new_codes)}  closed since last run: {len(closed_codes)}")
+
+    for code in closed_codes:
+        state[code]["status"] = "closed"
+        state[code]["closed_on"] = today
+
+    batch = []
+    batch_state = []          # (code, state fields) applied once the batch is on disk
+    needs_full = []
+    failed = set()
+    stats = {"unchanged": 0, "update": 0, "new": 0, "points": 0}
+
+    def mark_active(code, fields):
+        entry = state.setdefault(code, {})
+        entry.update(fields)
+        entry.pop("closed_on", None)
+
+    def flush():
+        append_deltas(batch)
+        for code, fields in batch_state:
+            mark_active(code, fields)
+        batch.clear()
+        batch_state.clear()
+
+    def keep(code, details, kind):
+        last_date = state.get(code, {}).get("last_date") if kind == "update" else None
+        points = newer_points(details, last_date)
+        stats[kind] += 1
+        fields = {"name": listed.get(code, state.get(code, {}).get("name", "")), "status": "active"}
+        if not points and kind != "new":
+            mark_active(code, fields)
+            return
+        if points:
+            fields["last_date"] = last_nav_date({"data": points})
+        batch.append({**details, "data": points, "_delta": kind})
+        batch_state.append((code, fields))
+        stats["points"] += len(points)
+        if len(batch) >= BATCH_SIZE:
+            flush()
+
+    def on_probe(code, details):
+        code = str(code)
+        if not details:
+            failed.add(code)
+            return
+        last_date = state[code].get("last_date")
+        latest = last_nav_date(details)
+        if not latest or (last_date and parse_nav_date(latest) <= parse_nav_date(last_date)):
+            stats["unchanged"] += 1
+            state[code]["status"] = "active"
+        elif last_date and weekdays_between(parse_nav_date(last_date), parse_nav_date(latest)) == 0:
+            keep(code, details, "update")
+        else:
+            needs_full.append(code)
+
+    def on_full(code, details):
+        code = str(code)
+        if not details:
+            failed.add(code)
+            return
+        keep(code, details, "new" if code in new_codes_set else "update")
+
+    try:
+        fetch_schemes([(list_codes[code], listed[code], BASE_LATEST_URL.format(code=code))
+                       for code in known_codes], on_probe)
+        print(f"[INFO] Full history needed for {len(needs_full)} gapped + {len(new_codes)} new schemes")
+        if needs_full or new_codes:
+            fetch_schemes([(list_codes[code], listed[code]) for code in needs_full + new_codes], on_full)
+        if batch:
+            flush()
+    finally:
+        # last_date only moves once its deltas are committed: points of a
+        # batch lost in a crash are fetched again on the next run
+        save_nav_state(state)
+
+    print(f"[INFO] Unchanged: {stats['unchanged']}  updated: {stats['update']}  new: {stats['new']}  "
+          f"points appended: {stats['points']}  failed (retried next run): {len(failed)}")
+    if closed_codes:
+        print(f"[INFO] Closed schemes: {', '.join(sorted(closed_codes)[:20])}"
+              f"{' ...' if len(closed_codes) > 20 else ''}")
+    print(f"[INFO] Deltas in {NAV_DELTAS_FILE}; run 'compact' to merge into {NAV_STORE_FILE}")
+
+
+def merge_nav_points(scheme, deltas):
+    """Delta points (oldest delta first) prepended newest-first onto a scheme object, de-duplicated by date."""
+    merged, seen = [], set()
+    for points in [d["data"] for d in reversed(deltas)] + [scheme.get("data") or []]:
+        for p in points:
+            if p.get("date") not in seen:
+                seen.add(p.get("date"))
+                merged.append(p)
+    merged.sort(key=lambda p: parse_nav_date(p["date"]), reverse=True)
+    latest = deltas[-1]
+    return {**scheme, "meta": latest.get("meta") or scheme.get("meta"), "data": merged}
+
+
+def run_compact():
+    print("[INFO] COMPACT mode: merging NAV deltas into the main file")
+
+    if not NAV_DELTAS_FILE.exists():
+        print("[INFO] No deltas to merge.")
+        return
+    ensure_nav_store()
+
+    pending = defaultdict(list)
+    for rec in RecordReader(NAV_DELTAS_FILE):
+        rec.pop("_delta", None)
+        pending[scheme_key(rec)].append(rec)
+    print(f"[INFO] Deltas for {len(pending)} schemes")
+
+    # Rewritten into a temp file and renamed over the store on commit
+    with RecordWriter(NAV_STORE_FILE, key=scheme_key) as store:
+        for scheme in open_nav_store():
+            deltas = pending.pop(scheme_key(scheme), None)
+            store.write(merge_nav_points(scheme, deltas) if deltas else scheme)
+
+        # Schemes that first appeared in an incremental run
+        for deltas in pending.values():
+            store.write(merge_nav_points(deltas[0], deltas[1:]) if len(deltas) > 1 else deltas[0])
+
+    remove_records(NAV_DELTAS_FILE)
+    print(f"[INFO] Done. {store.count} scheme objects in {NAV_STORE_FILE}")
+
 def main():
-    if len(sys.argv) < 2 or sys.argv[1].lower() not in ("full", "retry"):
-        print("Usage: python get_scheme_details.py [full|retry]")
+    modes = {"full": run_full, "retry": run_retry, "incremental": run_incremental, "compact": run_compact}
+    if len(sys.argv) < 2 or sys.argv[1].lower() not in modes:
+        print("Usage: python -m app.get_scheme_details [full|retry|incremental|compact]")
         sys.exit(1)
 
-    mode = sys.argv[1].lower()
-    if mode == "full":
-        run_full()
-    else:
-        run_retry()
+    modes[sys.argv[1].lower()]()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,457 @@
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import re
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import httpx
+import pandas as pd
+
+from app.get_scheme_details import AdaptiveRateLimiter
+
+# ============================================================
+# Unified NSE + BSE index-history ingester
+#
+#   python -m app.index_history [nse|bse|all] [--indices "NIFTY 50,..."] [--full] [--workers N]
+#
+# - Date blocks of one index are fetched concurrently; every request to a
+#   host goes through that host's AIMD rate limiter and connection cap
+# - Known indices only fetch from their last stored date (- OVERLAP_DAYS);
+#   new ones walk back in waves of blocks until a whole wave is empty
+# - Gaps (weekends / holidays) are filled with one reindex + ffill, and
+#   flagged in the `filled` column
+# - Output: one Parquet file per index under data/index_history/<source>/,
+#   every file with INDEX_COLUMNS, plus catalog.json (code, name, range)
+#
+# Readers: load_catalog(), read_index_history(), load_index_history(),
+# index_close_series().
+# ============================================================
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DATA_DIR = BASE_DIR / "data"
+INDEX_STORE_DIR = DATA_DIR / "index_history"
+CATALOG_FILE = INDEX_STORE_DIR / "catalog.json"
+
+PRICE_COLUMNS = ["open", "high", "low", "close"]
+INDEX_COLUMNS = ["source", "index_code", "index_name", "date"] + PRICE_COLUMNS + ["filled"]
+
+HISTORY_START = date(2010, 1, 1)
+OVERLAP_DAYS = 5
+WAVE_BLOCKS = 6              # blocks fetched together while walking back a new index
+INDEX_CONCURRENCY = 8        # indices in flight per source
+REQUEST_TIMEOUT = 30
+BLOCK_RETRIES = 3
+RETRY_BACKOFF_BASE = 1       # seconds; full jitter, doubles per attempt
+RETRY_BACKOFF_CAP = 30
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Accept": "application/json, text/plain, */*",
+    "Connection": "keep-alive",
+}
+
+NSE_BOOTSTRAP_URL = "https://www.nseindia.com/api/quote-equity?symbol=INFY"
+NSE_INDICES_URL = "https://www.nseindia.com/api/allIndices"
+NSE_HISTORY_URL = "https://www.nseindia.com/api/historicalOR/indicesHistory"
+BSE_INDICES_URL = "https://api.bseindia.com/BseIndiaAPI/api/FillddlIndex/w?fmdt=&todt="
+BSE_HISTORY_URL = "https://api.bseindia.com/BseIndiaAPI/api/ProduceCSVForDate/w"
+
+
+# ============================================================
+# SOURCES
+# ============================================================
+
+async def nse_bootstrap(client):
+    """NSE only serves the API to a client holding its session cookies."""
+    for _ in range(3):
+        try:
+            await client.get(NSE_BOOTSTRAP_URL)
+            return
+        except httpx.HTTPError:
+            await asyncio.sleep(2)
+    raise RuntimeError("NSE session bootstrap failed")
+
+
+async def nse_list(client):
+    r = await client.get(NSE_INDICES_URL)
+    r.raise_for_status()
+    names = sorted(set(i["index"] for i in r.json()["data"]))
+    return [(name, name) for name in names]
+
+
+def nse_request(code, start, end):
+    return NSE_HISTORY_URL, {
+        "indexType": code,
+        "from": start.strftime("%d-%m-%Y"),
+        "to": end.strftime("%d-%m-%Y"),
+    }
+
+
+def nse_parse(resp):
+    df = pd.DataFrame(resp.json().get("data", []))
+    if df.empty:
+        return empty_frame()
+    df = df.rename(columns={
+        "EOD_TIMESTAMP": "date",
+        "EOD_OPEN_INDEX_VAL": "open",
+        "EOD_HIGH_INDEX_VAL": "high",
+        "EOD_LOW_INDEX_VAL": "low",
+        "EOD_CLOSE_INDEX_VAL": "close",
+    })
+    out = pd.DataFrame({"date": pd.to_datetime(df["date"], format="%d-%b-%Y", errors="coerce")})
+    for col in PRICE_COLUMNS:
+        out[col] = pd.to_numeric(df.get(col), errors="coerce")
+    return out
+
+
+async def bse_list(client):
+    r = await client.get(BSE_INDICES_URL)
+    try:
+        return [(i["Indx_cd"], i["shortalias"]) for i in r.json().get("Table", [])]
+    except ValueError:
+        return re.findall(r'"Indx_cd":"(.*?)".*?"shortalias":"(.*?)"', r.text)
+
+
+def bse_request(code, start, end):
+    return BSE_HISTORY_URL, {
+        "strIndex": code,
+        "dtFromDate": start.strftime("%d/%m/%Y"),
+        "dtToDate": end.strftime("%d/%m/%Y"),
+    }
+
+
+def bse_parse(resp):
+    text = resp.text
+    if "Date" not in text:
+        return empty_frame()
+    raw = pd.read_csv(io.StringIO(text))
+    cols = {c.strip().lower(): c for c in raw.columns}
+    date_col = next((c for k, c in cols.items() if "date" in k), None)
+    if date_col is None or raw.empty:
+        return empty_frame()
+
+    # BSE mixes 01/02/2024, 2024-02-01 and 1-February-2024; dayfirst must
+    # not touch the ISO rows (it would read 2024-02-06 as 6 Feb -> 2 Jun)
+    dates = raw[date_col].astype(str).str.strip()
+    iso = dates.str.match(r"^\d{4}-")
+    parsed = pd.to_datetime(dates.where(iso), format="%Y-%m-%d", errors="coerce")
+    other = pd.to_datetime(dates.where(~iso), format="mixed", dayfirst=True, errors="coerce")
+    out = pd.DataFrame({"date": parsed.combine_first(other)})
+    for col in PRICE_COLUMNS:
+        src = next((c for k, c in cols.items() if k.startswith(col)), None)
+        values = raw[src].astype(str).str.replace(",", "", regex=False) if src else None
+        out[col] = pd.to_numeric(values, errors="coerce") if src else float("nan")
+    return out
+
+
+SOURCES = {
+    "nse": {
+        "headers": {"Referer": "https://www.nseindia.com/", "Origin": "https://www.nseindia.com"},
+        "bootstrap": nse_bootstrap,
+        "list": nse_list,
+        "request": nse_request,
+        "parse": nse_parse,
+        "block_days": 60,
+        "rate": 3.0,             # requests / second, AIMD between RATE_MIN and max_rate
+        "max_rate": 6.0,
+        "max_connections": 4,
+    },
+    "bse": {
+        "headers": {"Referer": "https://www.bseindia.com/", "Origin": "https://www.bseindia.com"},
+        "bootstrap": None,
+        "list": bse_list,
+        "request": bse_request,
+        "parse": bse_parse,
+        "block_days": 365,
+        "rate": 4.0,
+        "max_rate": 8.0,
+        "max_connections": 6,
+    },
+}
+
+
+# ============================================================
+# FRAMES
+# ============================================================
+
+def empty_frame():
+    return pd.DataFrame({"date": pd.Series(dtype="datetime64[ns]"),
+                         **{col: pd.Series(dtype="float64") for col in PRICE_COLUMNS}})
+
+
+def fill_gaps(df):
+    """Observed rows -> one row per calendar day, prices carried forward, `filled` marking the copies."""
+    df = (df.dropna(subset=["date"])
+            .drop_duplicates("date", keep="last")
+            .set_index("date")
+            .sort_index())
+    if df.empty:
+        return df.reset_index().assign(filled=pd.Series(dtype="bool"))
+    full = pd.date_range(df.index.min(), df.index.max(), freq="D", name="date")
+    out = df[PRICE_COLUMNS].reindex(full)
+    out["filled"] = out["close"].isna()
+    out[PRICE_COLUMNS] = out[PRICE_COLUMNS].ffill()
+    return out.reset_index()
+
+
+def date_blocks(start, end, days):
+    """[(block_start, block_end), ...] covering start..end, newest first."""
+    blocks = []
+    while end >= start:
+        block_start = max(start, end - timedelta(days=days - 1))
+        blocks.append((block_start, end))
+        end = block_start - timedelta(days=1)
+    return blocks
+
+
+# ============================================================
+# STORE
+# ============================================================
+
+def _safe_name(code):
+    return re.sub(r"[^A-Za-z0-9]+", "_", str(code)).strip("_")
+
+
+def index_file(source, code):
+    return INDEX_STORE_DIR / source / f"{_safe_name(code)}.parquet"
+
+
+def read_index_history(source, code, observed_only=False):
+    path = index_file(source, code)
+    if not path.exists():
+        return None
+    df = pd.read_parquet(path)
+    return df[~df["filled"]] if observed_only else df
+
+
+def write_index_history(source, code, name, df):
+    out = df.assign(source=source, index_code=str(code), index_name=name)[INDEX_COLUMNS]
+    path = index_file(source, code)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    out.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+    observed = out[~out["filled"]]
+    return {
+        "source": source,
+        "index_code": str(code),
+        "index_name": name,
+        "path": str(path.relative_to(INDEX_STORE_DIR)),
+        "first_date": observed["date"].min().strftime("%Y-%m-%d"),
+        "last_date": observed["date"].max().strftime("%Y-%m-%d"),
+        "rows": len(observed),
+    }
+
+
+def load_catalog():
+    if not CATALOG_FILE.exists():
+        return {}
+    with open(CATALOG_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_catalog(catalog):
+    CATALOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = CATALOG_FILE.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(catalog, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp, CATALOG_FILE)
+
+
+def load_index_history(sources=None, observed_only=False):
+    """Every stored index as one long DataFrame (INDEX_COLUMNS)."""
+    frames = []
+    for entry in load_catalog().values():
+        if sources and entry["source"] not in sources:
+            continue
+        df = read_index_history(entry["source"], entry["index_code"], observed_only)
+        if df is not None:
+            frames.append(df)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=INDEX_COLUMNS)
+
+
+def index_close_series(source, code, observed_only=True):
+    """Close prices indexed by date (trading days only unless observed_only=False)."""
+    df = read_index_history(source, code, observed_only)
+    if df is None:
+        return None
+    return df.set_index("date")["close"]
+
+
+# ============================================================
+# FETCH
+# ============================================================
+
+async def fetch_block(client, limiter, cfg, code, start, end):
+    """Parsed rows for one date block ([] rows = no data), or None when all retries fail."""
+    url, params = cfg["request"](code, start, end)
+    last_exc = None
+
+    for attempt in range(1, BLOCK_RETRIES + 1):
+        await limiter.acquire()
+        try:
+            r = await client.get(url, params=params)
+            if r.status_code in (401, 403) and cfg["bootstrap"]:
+                await cfg["bootstrap"](client)      # session cookies expired
+                raise httpx.HTTPStatusError(f"HTTP {r.status_code}", request=r.request, response=r)
+            if r.status_code == 429 or r.status_code >= 500:
+                limiter.on_throttle()
+                raise httpx.HTTPStatusError(f"HTTP {r.status_code}", request=r.request, response=r)
+            r.raise_for_status()
+            df = cfg["parse"](r)
+            limiter.on_success()
+            return df
+        except (httpx.HTTPError, ValueError) as e:
+            if isinstance(e, httpx.TimeoutException):
+                limiter.on_throttle()
+            last_exc = e
+
+        if attempt < BLOCK_RETRIES:
+            await asyncio.sleep(random.uniform(0, min(RETRY_BACKOFF_CAP, RETRY_BACKOFF_BASE * 2 ** attempt)))
+
+    print(f"[WARN] {code} {start}..{end}: {type(last_exc).__name__} {last_exc}")
+    return None
+
+
+async def fetch_history(client, limiter, cfg, code, since=None):
+    """
+    Observed rows from `since` (incremental) or as far back as the source
+    has data (full). None if any block failed, so a partial history is
+    never written over a complete one.
+    """
+    today = date.today()
+    days = cfg["block_days"]
+
+    if since:
+        blocks = date_blocks(since, today, days)
+        frames = await asyncio.gather(*(fetch_block(client, limiter, cfg, code, s, e) for s, e in blocks))
+        if any(f is None for f in frames):
+            return None
+        return pd.concat(frames, ignore_index=True)
+
+    blocks = date_blocks(HISTORY_START, today, days)
+    collected = []
+    for i in range(0, len(blocks), WAVE_BLOCKS):
+        wave = blocks[i:i + WAVE_BLOCKS]
+        frames = await asyncio.gather(*(fetch_block(client, limiter, cfg, code, s, e) for s, e in wave))
+        if any(f is None for f in frames):
+            return None
+        collected.extend(frames)
+        if all(f.empty for f in frames):
+            break            # walked back past the index's inception
+    return pd.concat(collected, ignore_index=True) if collected else empty_frame()
+
+
+async def ingest_index(client, limiter, cfg, source, code, name, full=False):
+    """Catalog entry for the updated index, or None (skipped / failed)."""
+    existing = None if full else read_index_history(source, code, observed_only=True)
+    since = None
+    if existing is not None and not existing.empty:
+        since = existing["date"].max().date() - timedelta(days=OVERLAP_DAYS)
+
+    new_rows = await fetch_history(client, limiter, cfg, code, since)
+    if new_rows is None:
+        return None
+    if since is not None:
+        new_rows = pd.concat([existing[["date"] + PRICE_COLUMNS], new_rows], ignore_index=True)
+    if new_rows.dropna(subset=["date"]).empty:
+        print(f"[LOG] Skipped (no data): {name}")
+        return None
+
+    filled = fill_gaps(new_rows)
+    return await asyncio.to_thread(write_index_history, source, code, name, filled)
+
+
+async def _ingest_source(source, only=None, full=False, workers=INDEX_CONCURRENCY):
+    cfg = SOURCES[source]
+    limiter = AdaptiveRateLimiter(rate=cfg["rate"], max_rate=cfg["max_rate"])
+    limits = httpx.Limits(max_connections=cfg["max_connections"],
+                          max_keepalive_connections=cfg["max_connections"])
+
+    async with httpx.AsyncClient(headers={**HEADERS, **cfg["headers"]}, timeout=REQUEST_TIMEOUT,
+                                 limits=limits, follow_redirects=True) as client:
+        if cfg["bootstrap"]:
+            await cfg["bootstrap"](client)
+        indices = await cfg["list"](client)
+        if only:
+            indices = [(c, n) for c, n in indices if c in only or n in only]
+        print(f"[LOG] {source.upper()}: {len(indices)} indices")
+
+        queue = asyncio.Queue()
+        for item in indices:
+            queue.put_nowait(item)
+        entries, failed = {}, []
+        started = time.time()
+
+        async def worker():
+            while True:
+                try:
+                    code, name = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    entry = await ingest_index(client, limiter, cfg, source, code, name, full)
+                except Exception as e:
+                    print(f"[ERROR] {source} {name}: {e}")
+                    entry = None
+                if entry:
+                    entries[f"{source}:{entry['index_code']}"] = entry
+                else:
+                    failed.append(name)
+                done = len(entries) + len(failed)
+                rate = done / (time.time() - started)
+                print(f"[PROGRESS] {source.upper()} {done}/{len(indices)} | {name} | "
+                      f"ETA {int((len(indices) - done) / rate) if rate else 0}s")
+
+        await asyncio.gather(*(worker() for _ in range(workers)))
+
+    print(f"[LOG] {source.upper()} done: {len(entries)} updated, {len(failed)} failed/skipped "
+          f"in {time.time() - started:.1f}s (final rate {limiter.rate:.1f}/s)")
+    return entries, failed
+
+
+def ingest(sources, only=None, full=False, workers=INDEX_CONCURRENCY):
+    """Run the sources concurrently (different hosts, independent limiters)."""
+    async def run():
+        return await asyncio.gather(*(_ingest_source(s, only, full, workers) for s in sources))
+
+    results = asyncio.run(run())
+    catalog = load_catalog()
+    for entries, _ in results:
+        catalog.update(entries)
+    save_catalog(catalog)
+    return results
+
+
+# ============================================================
+# MAIN
+# ============================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NSE / BSE index history ingester")
+    parser.add_argument("source", nargs="?", default="all", choices=["all", *SOURCES])
+    parser.add_argument("--indices", help="comma-separated index codes or names (default: all)")
+    parser.add_argument("--full", action="store_true", help="refetch full history")
+    parser.add_argument("--workers", type=int, default=INDEX_CONCURRENCY)
+    args = parser.parse_args(argv)
+
+    sources = list(SOURCES) if args.source == "all" else [args.source]
+    only = {s.strip() for s in args.indices.split(",")} if args.indices else None
+
+    print("=== INDEX HISTORY INGEST ===\n")
+    results = ingest(sources, only=only, full=args.full, workers=args.workers)
+
+    print("\n========== SUMMARY ==========")
+    for source, (entries, failed) in zip(sources, results):
+        print(f"{source.upper():<6}: {len(entries)} updated, {len(failed)} failed/skipped")
+    print(f"Store        : {INDEX_STORE_DIR}")
+    print("================================\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import json
 import logging
+import re
 from pathlib import Path
 
 # ---------------------------------------------------
@@ -93,6 +94,45 @@ def normalize_fund_managers(value):
         return str(value)
 
 
+def extract_fund_manager_details(value):
+    """
+    Keep structured manager entries (name + managing-since) when the
+    summary provides them, so tenure survives string normalization.
+    Output: [{"name": ..., "since": ...}] or None
+    """
+    if not isinstance(value, list):
+        return None
+    
+    details = []
+    for mgr in value:
+        if isinstance(mgr, dict) and mgr.get('name'):
+            details.append({
+                "name": mgr.get('name'),
+                "since": mgr.get('since') or mgr.get('managing_since') or mgr.get('tenure')
+            })
+    
+    return details or None
+
+
+def normalize_aum(value):
+    """
+    Fund AUM in Rs crore as a float
+    Input: number or string like "₹12,345.67 Cr"
+    Output: float or None
+    """
+    if value is None:
+        return None
+    
+    if isinstance(value, (int, float)):
+        return float(value) if value > 0 else None
+    
+    match = re.search(r"\d+(?:\.\d+)?", str(value).replace(",", ""))
+    if not match:
+        return None
+    aum = float(match.group(0))
+    return aum if aum > 0 else None
+
+
 def normalize_asset_allocation(value):
     """
     Convert asset_allocation to string for consistent rendering
@@ -313,6 +353,8 @@ def merge_all_data():
             "asset_allocation": normalized_asset,
             "benchmark": normalize_benchmark(summary_data.get("benchmark")),
             "fund_managers": normalized_managers,
+            "fund_manager_details": extract_fund_manager_details(raw_managers),
+            "aum": normalize_aum(summary_data.get("aum")),
             "annual_expense": normalize_annual_expense(summary_data.get("annual_expense")),
             "exit_load": normalize_exit_load(summary_data.get("exit_load")),
             "isins": normalize_isins(summary_data.get("isins")),
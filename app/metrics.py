@@ -140,7 +140,8 @@ def compute_metrics_for_nav(nav_df: pd.DataFrame) -> dict:
             "data_quality": data_quality,
             "data_quality_reason": quality_reason,
             
-            # Benchmark placeholders (for Phase 4)
+            # Benchmark-relative: filled in batch across all funds by
+            # app.benchmark_metrics.compute_benchmark_metrics
             "alpha": None,
             "beta": None,
             "r_squared": None,
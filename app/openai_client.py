@@ -1,16 +1,56 @@
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+import httpx
 import os
+import threading
 
+# One key read and one pooled (keep-alive) client per process, shared by
+# every OpenAIClient() instance.
+_api_key = None
+_client = None
+_async_client = None
+_lock = threading.Lock()
+
+HTTP_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16)
+HTTP_TIMEOUT = httpx.Timeout(120.0, connect=10.0)
 
-class OpenAIClient:
-    def __init__(self):
-        self.client = OpenAI(api_key=self._load_api_key())
 
-    def _load_api_key(self):
-        root = os.getcwd()
-        key_path = os.path.join(root, "OPENAI_API_KEY.txt")
+def load_api_key():
+    global _api_key
+    if _api_key is None:
+        key_path = os.path.join(os.getcwd(), "OPENAI_API_KEY.txt")
         with open(key_path, "r") as f:
-            return f.read().strip()
+            _api_key = f.read().strip()
+    return _api_key
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = OpenAI(
+                    api_key=load_api_key(),
+                    http_client=httpx.Client(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT),
+                )
+    return _client
+
+
+def get_async_client():
+    """Shared AsyncOpenAI client (create and use it from the same event loop)."""
+    global _async_client
+    if _async_client is None:
+        with _lock:
+            if _async_client is None:
+                _async_client = AsyncOpenAI(
+                    api_key=load_api_key(),
+                    http_client=httpx.AsyncClient(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT),
+                )
+    return _async_client
+
+
+class OpenAIClient:
+    def __init__(self):
+        self.client = get_client()
 
     def complete(self, prompt_or_messages):
         """
@@ -0,0 +1,138 @@
+import logging
+import re
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# -------------------------------------------------------------------
+# Pluggable PDF text extraction
+#
+#   pymupdf     fast path (C, MuPDF) - default when installed
+#   pdfplumber  layout-aware, slow
+#   pypdf       pure Python, always-available fallback
+#
+# extract_summary_text() reads pages in order only until max_chars are
+# collected (the LLM prompt is truncated anyway), then keeps reading only
+# until the ISIN / AMFI locator finds the code tables, so
+# extract_from_isin_block and the regex fallbacks still see them.
+# -------------------------------------------------------------------
+
+logger = logging.getLogger("mf_advisor.pdf_text")
+
+# Pages carrying the ISIN / AMFI code / expense tables
+LOCATOR_PATTERNS = [r"\bISINs?\b", r"AMFI\s+Codes?", r"\bINF[A-Z0-9]{9}\b", r"Total\s+Expense\s+Ratio"]
+_LOCATOR_RE = re.compile("|".join(LOCATOR_PATTERNS), re.IGNORECASE)
+# Pages kept once the locator hits (code tables may spill onto the next page)
+LOCATED_PAGES = 2
+
+
+# -------------------------------------------------------------------
+# Page iterators (lazy: nothing past the last page we ask for is parsed)
+# -------------------------------------------------------------------
+
+def _pymupdf_pages(pdf_path: Path):
+    try:
+        import pymupdf
+    except ImportError:   # PyMuPDF < 1.24
+        import fitz as pymupdf
+    with pymupdf.open(str(pdf_path)) as doc:
+        for page in doc:
+            yield page
+
+
+def _pdfplumber_pages(pdf_path: Path):
+    import pdfplumber
+    with pdfplumber.open(str(pdf_path)) as pdf:
+        for page in pdf.pages:
+            yield page
+
+
+def _pypdf_pages(pdf_path: Path):
+    from pypdf import PdfReader
+    for page in PdfReader(str(pdf_path)).pages:
+        yield page
+
+
+def _page_text(backend: str, page) -> str:
+    try:
+        if backend == "pymupdf":
+            return page.get_text("text") or ""
+        return page.extract_text() or ""
+    except Exception:
+        return ""
+
+
+def _page_matches(text: str) -> bool:
+    """Whether a page looks like it holds the ISIN / AMFI / expense tables."""
+    return bool(_LOCATOR_RE.search(text))
+
+
+BACKENDS: Dict[str, Callable] = {
+    "pymupdf": _pymupdf_pages,
+    "pdfplumber": _pdfplumber_pages,
+    "pypdf": _pypdf_pages,
+}
+_MODULES = {"pymupdf": ("pymupdf", "fitz"), "pdfplumber": ("pdfplumber",), "pypdf": ("pypdf",)}
+
+
+def available_backends() -> List[str]:
+    import importlib.util
+    return [name for name, modules in _MODULES.items()
+            if any(importlib.util.find_spec(m) for m in modules)]
+
+
+def default_backend() -> str:
+    available = available_backends()
+    if not available:
+        raise ImportError("Install PyMuPDF, pdfplumber or pypdf")
+    return available[0]
+
+
+# -------------------------------------------------------------------
+# Extraction
+# -------------------------------------------------------------------
+
+def extract_text(pdf_path: Path, max_chars: Optional[int] = None, backend: Optional[str] = None) -> str:
+    """Page text in order, stopping once max_chars are collected (None = all pages)."""
+    backend = backend or default_backend()
+    parts, collected = [], 0
+    for page in BACKENDS[backend](pdf_path):
+        text = _page_text(backend, page)
+        if text:
+            parts.append(text)
+            collected += len(text)
+        if max_chars is not None and collected >= max_chars:
+            break
+    return "\n".join(parts)
+
+
+def extract_summary_text(pdf_path: Path, max_chars: int, backend: Optional[str] = None) -> str:
+    """
+    Leading pages up to max_chars + the first later run of pages the
+    ISIN/AMFI locator matches (appended after the head, so prompt
+    truncation is unaffected). Pages after that run are never parsed.
+    """
+    backend = backend or default_backend()
+    head, located, collected = [], [], 0
+    tables_in_head = False
+
+    for page in BACKENDS[backend](pdf_path):
+        text = _page_text(backend, page)
+        if collected < max_chars:
+            if text:
+                head.append(text)
+                collected += len(text)
+                tables_in_head = tables_in_head or _page_matches(text)
+            if collected >= max_chars and tables_in_head:
+                break
+        elif located or _page_matches(text):
+            located.append(text)
+            if len(located) >= LOCATED_PAGES:
+                break
+
+    return "\n".join(head + located)
+
+
+def locate_isin_pages(pdf_path: Path, backend: Optional[str] = None) -> List[int]:
+    """0-based page numbers that look like they hold the ISIN / AMFI / expense tables."""
+    backend = backend or default_backend()
+    return [i for i, page in enumerate(BACKENDS[backend](pdf_path)) if _page_matches(_page_text(backend, page))]
@@ -0,0 +1,460 @@
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.extraction_cache import sha256_file
+from app.record_store import RecordWriter
+
+# ============================================================
+# Data pipeline runner
+#
+#   python -m app.pipeline                 nightly refresh (every non-manual stage)
+#   python -m app.pipeline metrics merge   these stages + whatever they depend on
+#   python -m app.pipeline --only merge    exactly these stages
+#   python -m app.pipeline --list          stages, dependencies, current status
+#
+# - Every stage is one of the existing scripts, run as a subprocess from
+#   the repo root, with declared input / output paths (files or dirs)
+# - A stage depends on the stages whose outputs are (or contain) its
+#   inputs; independent stages run in parallel, up to --jobs at a time
+# - A stage is skipped when its input fingerprints (sha256, cached by
+#   size + mtime) match the last successful run and its outputs exist.
+#   Fetch stages (`always`) have no file inputs and run every time; if
+#   they bring nothing new, everything downstream skips
+# - Manual stages (browser / prompts) only run when named; interactive
+#   ones get the terminal and never share it with another stage
+# - Per-stage wall time, CPU time and peak RSS go to the run log
+#   (runs.ndjson); stage output goes to logs/<stage>.log
+# ============================================================
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DATA_DIR = BASE_DIR / "data"
+
+PIPELINE_DIR = DATA_DIR / "pipeline"
+STATE_FILE = PIPELINE_DIR / "state.json"
+RUNS_FILE = PIPELINE_DIR / "runs.ndjson"
+LOG_DIR = PIPELINE_DIR / "logs"
+
+PARALLEL_STAGES = 3
+
+NAV_STORE_FILE = DATA_DIR / "all_scheme_full_details.ndjson"
+NAV_DELTAS_FILE = DATA_DIR / "all_scheme_nav_deltas.ndjson"
+NAV_STATE_FILE = DATA_DIR / "nav_fetch_state.json"
+INDEX_STORE_DIR = DATA_DIR / "index_history"
+SUMMARY_PDF_DIR = DATA_DIR / "summary_scheme_pdf"
+SUMMARY_EXTRACT_DIR = DATA_DIR / "scheme_summary_extract"
+SUMMARIES_FILE = SUMMARY_EXTRACT_DIR / "all_scheme_summaries.json"
+MASTERLIST_FILE = DATA_DIR / "parent_masterlist.json"
+PARENT_NAV_FILE = DATA_DIR / "parent_scheme_nav.json"
+METRICS_FILE = DATA_DIR / "all_scheme_metrics.json"
+MERGED_FILE = DATA_DIR / "scheme_metrics_merged.json"
+FAISS_INDEX_DIR = DATA_DIR / "faiss_index"
+
+# name -> cmd (argv after the interpreter), inputs, outputs, flags.
+# Declaration order is the tie-break when several stages are ready.
+STAGES = {
+    "nav_fetch": {
+        "cmd": ["-m", "app.get_scheme_details", "incremental"],
+        "inputs": [],
+        "outputs": [NAV_DELTAS_FILE, NAV_STATE_FILE],
+        "always": True,
+    },
+    "nav_compact": {
+        "cmd": ["-m", "app.get_scheme_details", "compact"],
+        "inputs": [NAV_DELTAS_FILE],
+        "outputs": [NAV_STORE_FILE],
+    },
+    "index_history": {
+        "cmd": ["-m", "app.index_history"],
+        "inputs": [],
+        "outputs": [INDEX_STORE_DIR],
+        "always": True,
+    },
+    # Downloads summary PDFs into data/summary_pdfs; doc_extract reads
+    # SUMMARY_PDF_DIR, so new PDFs are copied across by hand (no edge)
+    "amfi_download": {
+        "cmd": ["-m", "app.amfi_downloader"],
+        "inputs": [],
+        "outputs": [DATA_DIR / "amc_funds.json", DATA_DIR / "amc_summary.json", DATA_DIR / "summary_pdfs"],
+        "manual": True,
+    },
+    "doc_extract": {
+        # One JSON per PDF, then combined into SUMMARIES_FILE
+        "cmd": ["-m", "app.doc_extractor", "online"],
+        "inputs": [SUMMARY_PDF_DIR],
+        "outputs": [SUMMARY_EXTRACT_DIR, SUMMARIES_FILE],
+    },
+    "masterlist": {
+        "cmd": ["-m", "app.build_parent_masterlist"],
+        "inputs": [SUMMARIES_FILE, NAV_STORE_FILE],
+        "outputs": [MASTERLIST_FILE],
+    },
+    "parent_nav": {
+        "cmd": ["-m", "app.build_parent_nav_dataset"],
+        "inputs": [MASTERLIST_FILE, NAV_STORE_FILE],
+        "outputs": [PARENT_NAV_FILE],
+    },
+    "metrics": {
+        "cmd": ["-m", "app.build_all_scheme_metrics"],
+        "inputs": [MASTERLIST_FILE, PARENT_NAV_FILE, SUMMARIES_FILE, INDEX_STORE_DIR],
+        "outputs": [METRICS_FILE],
+    },
+    "merge": {
+        "cmd": ["-m", "app.merge_all_data"],
+        "inputs": [METRICS_FILE, SUMMARIES_FILE, MASTERLIST_FILE],
+        "outputs": [MERGED_FILE],
+    },
+    "scoring": {
+        # Rewrites MERGED_FILE in place
+        "cmd": ["-m", "app.run_scoring"],
+        "inputs": [MERGED_FILE],
+        "outputs": [MERGED_FILE],
+    },
+    "faiss_index": {
+        "cmd": ["backend/build_and_upload_index.py", "--incremental", "--upload"],
+        "inputs": [MERGED_FILE],
+        "outputs": [FAISS_INDEX_DIR],
+    },
+    "postgres": {
+        "cmd": ["backend/convert_to_postgres.py"],
+        "inputs": [PARENT_NAV_FILE],
+        "outputs": [],
+        "manual": True,
+        "interactive": True,
+    },
+}
+
+
+# ============================================================
+# GRAPH
+# ============================================================
+
+def _within(path: Path, root: Path) -> bool:
+    return path == root or root in path.parents
+
+
+def stage_dependencies(stages: dict = STAGES) -> dict:
+    """{stage: [stages producing (or containing) one of its inputs]}"""
+    deps = {}
+    for name, stage in stages.items():
+        deps[name] = [
+            other for other, spec in stages.items()
+            if other != name and any(_within(i, o) for i in stage["inputs"] for o in spec["outputs"])
+        ]
+    return deps
+
+
+def topological_order(deps: dict) -> list:
+    order, done, visiting = [], set(), set()
+
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Pipeline cycle through stage '{name}'")
+        visiting.add(name)
+        for dep in deps[name]:
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+        order.append(name)
+
+    for name in deps:
+        visit(name)
+    return order
+
+
+def select_stages(targets, deps: dict, only: bool = False) -> list:
+    """Stages to run, in dependency order: targets (+ upstream), or every non-manual stage."""
+    if not targets:
+        return [n for n in topological_order(deps) if not STAGES[n].get("manual")]
+
+    unknown = [t for t in targets if t not in STAGES]
+    if unknown:
+        raise SystemExit(f"Unknown stage(s): {', '.join(unknown)} (have: {', '.join(STAGES)})")
+
+    wanted = set(targets)
+    if not only:
+        stack = list(targets)
+        while stack:
+            for dep in deps[stack.pop()]:
+                # Manual stages upstream are never pulled in implicitly
+                if dep not in wanted and not STAGES[dep].get("manual"):
+                    wanted.add(dep)
+                    stack.append(dep)
+    return [n for n in topological_order(deps) if n in wanted]
+
+
+# ============================================================
+# FINGERPRINTS
+# ============================================================
+
+def file_fingerprint(path: Path, cache: dict) -> str:
+    """sha256 of a file, reused while its size and mtime are unchanged."""
+    st = path.stat()
+    key = str(path)
+    hit = cache.get(key)
+    if hit and hit[0] == st.st_size and hit[1] == st.st_mtime_ns:
+        return hit[2]
+    digest = sha256_file(path)
+    cache[key] = [st.st_size, st.st_mtime_ns, digest]
+    return digest
+
+
+def fingerprint(path: Path, cache: dict):
+    """File -> sha256; dir -> sha256 over (relative path, sha256) of its files; missing -> None."""
+    if path.is_file():
+        return file_fingerprint(path, cache)
+    if not path.is_dir():
+        return None
+    h = hashlib.sha256()
+    for p in sorted(path.rglob("*")):
+        rel = p.relative_to(path)
+        # Hidden / .tmp files are in-flight writes, not data
+        if not p.is_file() or p.suffix == ".tmp" or any(part.startswith(".") for part in rel.parts):
+            continue
+        h.update(rel.as_posix().encode("utf-8"))
+        h.update(file_fingerprint(p, cache).encode("ascii"))
+    return h.hexdigest()
+
+
+def input_fingerprints(stage: dict, cache: dict) -> dict:
+    return {str(p.relative_to(BASE_DIR)): fingerprint(p, cache) for p in stage["inputs"]}
+
+
+def skip_reason(name: str, state: dict, cache: dict):
+    """Why `name` can be skipped, or None if it has to run."""
+    stage, last = STAGES[name], state["stages"].get(name)
+    if stage.get("always") or not last:
+        return None
+    if last.get("cmd") != stage["cmd"]:
+        return None
+    if any(not p.exists() for p in stage["outputs"]):
+        return None
+    if input_fingerprints(stage, cache) != last.get("inputs"):
+        return None
+    return "inputs unchanged"
+
+
+# ============================================================
+# STATE
+# ============================================================
+
+def load_state() -> dict:
+    if not STATE_FILE.exists():
+        return {"stages": {}, "hashes": {}}
+    with open(STATE_FILE, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    state.setdefault("stages", {})
+    state.setdefault("hashes", {})
+    return state
+
+
+def save_state(state: dict):
+    PIPELINE_DIR.mkdir(parents=True, exist_ok=True)
+    state["hashes"] = {k: v for k, v in state["hashes"].items() if os.path.exists(k)}
+    tmp = STATE_FILE.with_name(STATE_FILE.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, STATE_FILE)
+
+
+# ============================================================
+# EXECUTION
+# ============================================================
+
+def _peak_rss_mb(rusage) -> float:
+    # ru_maxrss: kilobytes on Linux, bytes on macOS
+    scale = 1 << 20 if sys.platform == "darwin" else 1 << 10
+    return round(rusage.ru_maxrss / scale, 1)
+
+
+def run_stage(name: str) -> dict:
+    """Run one stage to completion; returns its run record."""
+    stage = STAGES[name]
+    cmd = [sys.executable, *stage["cmd"]]
+    env = dict(os.environ, PYTHONUNBUFFERED="1", PYTHONIOENCODING="utf-8")
+
+    if stage.get("interactive"):
+        log_path, log = None, None
+    else:
+        LOG_DIR.mkdir(parents=True, exist_ok=True)
+        log_path = LOG_DIR / f"{name}.log"
+        log = open(log_path, "w", encoding="utf-8")
+
+    started = time.perf_counter()
+    try:
+        proc = subprocess.Popen(
+            cmd, cwd=BASE_DIR, env=env,
+            stdin=None if log is None else subprocess.DEVNULL,
+            stdout=log, stderr=None if log is None else subprocess.STDOUT,
+        )
+        peak_rss_mb = cpu_seconds = None
+        if hasattr(os, "wait4"):
+            # Per-child rusage: memory stays attributable with stages in parallel
+            _, status, rusage = os.wait4(proc.pid, 0)
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            peak_rss_mb = _peak_rss_mb(rusage)
+            cpu_seconds = round(rusage.ru_utime + rusage.ru_stime, 2)
+        else:
+            proc.wait()
+    finally:
+        if log is not None:
+            log.close()
+
+    return {
+        "stage": name,
+        "status": "ok" if proc.returncode == 0 else "failed",
+        "returncode": proc.returncode,
+        "seconds": round(time.perf_counter() - started, 2),
+        "cpu_seconds": cpu_seconds,
+        "peak_rss_mb": peak_rss_mb,
+        "log": str(log_path.relative_to(BASE_DIR)) if log_path else None,
+    }
+
+
+def run_pipeline(names: list, deps: dict, jobs: int = PARALLEL_STAGES, force: bool = False) -> list:
+    """
+    Run `names` (dependency-ordered) as their dependencies finish.
+    A stage whose dependency failed is marked blocked, not run.
+    """
+    state = load_state()
+    cache = state["hashes"]
+    selected = set(names)
+    pending = list(names)
+    results = {}
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while pending or running:
+            interactive_running = any(STAGES[n].get("interactive") for n in running.values())
+            for name in list(pending):
+                stage_deps = [d for d in deps[name] if d in selected]
+                if not all(d in results for d in stage_deps):
+                    continue
+                if len(running) >= jobs or interactive_running:
+                    break
+                if STAGES[name].get("interactive") and running:
+                    break
+
+                pending.remove(name)
+                failed = [d for d in stage_deps if results[d]["status"] in ("failed", "blocked")]
+                if failed:
+                    results[name] = {"stage": name, "status": "blocked", "blocked_by": failed}
+                    print(f"[SKIP] {name}: blocked by {', '.join(failed)}")
+                    continue
+
+                reason = None if force else skip_reason(name, state, cache)
+                if reason:
+                    results[name] = {"stage": name, "status": "skipped", "reason": reason}
+                    print(f"[SKIP] {name}: {reason}")
+                    continue
+
+                print(f"[RUN ] {name}: {' '.join(STAGES[name]['cmd'])}")
+                running[pool.submit(run_stage, name)] = name
+                if STAGES[name].get("interactive"):
+                    break
+
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                record = future.result()
+                results[name] = record
+                print(f"[{'DONE' if record['status'] == 'ok' else 'FAIL'}] {name}: "
+                      f"{record['seconds']}s, peak {record['peak_rss_mb']} MB"
+                      + (f", log {record['log']}" if record["log"] else ""))
+
+                if record["status"] == "ok":
+                    # Post-run fingerprints: stages that consume or rewrite
+                    # their own inputs must not look changed next time
+                    state["stages"][name] = {
+                        "cmd": STAGES[name]["cmd"],
+                        "inputs": input_fingerprints(STAGES[name], cache),
+                        "finished_at": datetime.now(timezone.utc).isoformat(),
+                        "seconds": record["seconds"],
+                        "peak_rss_mb": record["peak_rss_mb"],
+                    }
+                save_state(state)
+
+    save_state(state)
+    return [results[n] for n in names]
+
+
+def record_run(started_at: str, results: list):
+    PIPELINE_DIR.mkdir(parents=True, exist_ok=True)
+    with RecordWriter(RUNS_FILE, append=True) as runs:
+        runs.write({"started_at": started_at, "stages": results})
+
+
+# ============================================================
+# MAIN
+# ============================================================
+
+def print_stages(deps: dict):
+    state = load_state()
+    cache = state["hashes"]
+    for name in topological_order(deps):
+        stage = STAGES[name]
+        if stage.get("always"):
+            status = "always"
+        elif name not in state["stages"]:
+            status = "never run"
+        else:
+            status = "up to date" if skip_reason(name, state, cache) else "changed"
+        flags = " (manual)" if stage.get("manual") else ""
+        after = f" <- {', '.join(deps[name])}" if deps[name] else ""
+        print(f"{name:<14} {status:<11}{flags}{after}")
+    save_state(state)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the MF Advisor data pipeline")
+    parser.add_argument("stages", nargs="*", help=f"stages to run (default: all non-manual): {', '.join(STAGES)}")
+    parser.add_argument("--only", action="store_true", help="run only the named stages, not their dependencies")
+    parser.add_argument("--force", action="store_true", help="run selected stages even if inputs are unchanged")
+    parser.add_argument("--jobs", type=int, default=PARALLEL_STAGES, help="stages run in parallel")
+    parser.add_argument("--list", action="store_true", help="show stages, dependencies and status, then exit")
+    args = parser.parse_args(argv)
+
+    deps = stage_dependencies()
+    if args.list:
+        print_stages(deps)
+        return
+
+    names = select_stages(args.stages, deps, only=args.only)
+    started_at = datetime.now(timezone.utc).isoformat()
+
+    print("=== PIPELINE ===")
+    print(f"Stages: {', '.join(names)}\n")
+    results = run_pipeline(names, deps, jobs=args.jobs, force=args.force)
+    record_run(started_at, results)
+
+    print("\n========== SUMMARY ==========")
+    for r in results:
+        detail = ""
+        if r["status"] in ("ok", "failed"):
+            detail = f"{r['seconds']:>9.1f}s  cpu {r['cpu_seconds']}s  peak {r['peak_rss_mb']} MB"
+        elif r["status"] == "skipped":
+            detail = r["reason"]
+        elif r["status"] == "blocked":
+            detail = f"after {', '.join(r['blocked_by'])}"
+        print(f"{r['stage']:<14} {r['status']:<8} {detail}")
+    print(f"Run log : {RUNS_FILE}")
+    print("================================\n")
+
+    if any(r["status"] in ("failed", "blocked") for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+import json
+import os
+import struct
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional
+
+# -------------------------------------------------------------------
+# Streaming record files with a sidecar offset index
+#
+#   <name>.ndjson   one JSON object per line
+#   <name>.lpj      <u32 little-endian length><JSON bytes> per record
+#   <file>.idx      {"format", "size", "count", "offsets": {key: [offset, length]}}
+#
+# RecordWriter writes through a bounded buffer into a temp file and only
+# on commit fsyncs it and renames it over the target, so readers see the
+# old dataset or the new one, never a truncated one. append=True extends
+# an existing file in place; bytes past the last committed size (a crashed
+# append) are cut off before writing and never surface in readers.
+#
+# RecordReader streams records in file order, or seeks straight to one
+# record by key through the index (rebuilt by one scan if missing/stale).
+#
+#   with RecordWriter(path, key=scheme_key) as w:
+#       w.write(rec)
+#   RecordReader(path).get("119551")
+# -------------------------------------------------------------------
+
+BUFFER_BYTES = 8 << 20
+_LENGTH = struct.Struct("<I")
+FORMATS = {".ndjson": "ndjson", ".jsonl": "ndjson", ".lpj": "lp"}
+
+
+def _format_for(path: Path) -> str:
+    return FORMATS.get(path.suffix, "ndjson")
+
+
+def index_path(path: Path) -> Path:
+    path = Path(path)
+    return path.with_name(path.name + ".idx")
+
+
+def _fsync_dir(directory: Path):
+    if os.name != "posix":
+        return
+    fd = os.open(str(directory), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _atomic_write_json(path: Path, obj: Any):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _encode(rec: Dict, fmt: str) -> bytes:
+    payload = json.dumps(rec, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if fmt == "lp":
+        return _LENGTH.pack(len(payload)) + payload
+    return payload + b"\n"
+
+
+def _decode(raw: bytes, fmt: str) -> Dict:
+    return json.loads(raw[_LENGTH.size:] if fmt == "lp" else raw)
+
+
+def remove(path):
+    """Delete a record file and its index."""
+    for p in (Path(path), index_path(path)):
+        if p.exists():
+            p.unlink()
+
+
+# -------------------------------------------------------------------
+# Writer
+# -------------------------------------------------------------------
+
+class RecordWriter:
+    def __init__(self, path, key: Optional[Callable[[Dict], str]] = None,
+                 append: bool = False, buffer_bytes: int = BUFFER_BYTES):
+        self.path = Path(path)
+        self.fmt = _format_for(self.path)
+        self.key = key
+        self.append = append and self.path.exists()
+        self.buffer_bytes = buffer_bytes
+        self.offsets: Dict[str, list] = {}
+        self.count = 0
+        self._buffer, self._buffered = [], 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.append:
+            reader = RecordReader(self.path, key=key)
+            index = reader.index
+            if key:
+                self.offsets = dict(index["offsets"])
+            self.count = index["count"]
+            self._file = open(self.path, "r+b")
+            self._file.truncate(index["size"])   # drop an uncommitted tail
+            self._file.seek(index["size"])
+        else:
+            self._tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            self._file = open(self._tmp, "wb")
+        self._pos = self._file.tell()
+
+    def write(self, rec: Dict):
+        data = _encode(rec, self.fmt)
+        if self.key:
+            self.offsets[str(self.key(rec))] = [self._pos, len(data)]
+        self._buffer.append(data)
+        self._buffered += len(data)
+        self._pos += len(data)
+        self.count += 1
+        if self._buffered >= self.buffer_bytes:
+            self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            self._file.write(b"".join(self._buffer))
+            self._buffer, self._buffered = [], 0
+
+    def commit(self):
+        self._flush()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        idx = index_path(self.path)
+        if not self.append:
+            # Old offsets must never point into the new file
+            if idx.exists():
+                idx.unlink()
+            os.replace(self._tmp, self.path)
+        # The index is written last (it is the commit point for appends);
+        # until it lands, readers rebuild it by scanning
+        _atomic_write_json(idx, {
+            "format": self.fmt, "size": self._pos, "count": self.count, "offsets": self.offsets,
+        })
+        _fsync_dir(self.path.parent)
+
+    def abort(self):
+        self._file.close()
+        if not self.append and self._tmp.exists():
+            self._tmp.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+        return False
+
+
+# -------------------------------------------------------------------
+# Reader
+# -------------------------------------------------------------------
+
+class RecordReader:
+    def __init__(self, path, key: Optional[Callable[[Dict], str]] = None):
+        self.path = Path(path)
+        self.fmt = _format_for(self.path)
+        self.key = key
+        self._index: Optional[Dict] = None
+
+    def _raw_records(self, limit: Optional[int] = None) -> Iterator[tuple]:
+        """(offset, raw bytes) for every complete record up to limit bytes."""
+        end = limit if limit is not None else os.path.getsize(self.path)
+        with open(self.path, "rb") as f:
+            pos = 0
+            while pos < end:
+                if self.fmt == "lp":
+                    head = f.read(_LENGTH.size)
+                    if len(head) < _LENGTH.size:
+                        return
+                    length = _LENGTH.unpack(head)[0]
+                    body = f.read(length)
+                    if len(body) < length:
+                        return           # torn last record
+                    raw = head + body
+                else:
+                    raw = f.readline()
+                    if not raw.endswith(b"\n"):
+                        return           # torn last line
+                if pos + len(raw) > end:
+                    return
+                yield pos, raw
+                pos += len(raw)
+
+    @property
+    def index(self) -> Dict:
+        if self._index is None:
+            self._index = self._load_index() or self._build_index()
+        return self._index
+
+    def _load_index(self) -> Optional[Dict]:
+        path = index_path(self.path)
+        if not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        # Stale if the data file is shorter than what the index covers
+        if index.get("format") != self.fmt or index.get("size", 0) > os.path.getsize(self.path):
+            return None
+        if self.key and not index.get("offsets") and index.get("count"):
+            return None
+        return index
+
+    def _build_index(self) -> Dict:
+        offsets, count, size = {}, 0, 0
+        for pos, raw in self._raw_records():
+            if self.key:
+                offsets[str(self.key(_decode(raw, self.fmt)))] = [pos, len(raw)]
+            count += 1
+            size = pos + len(raw)
+        return {"format": self.fmt, "size": size, "count": count, "offsets": offsets}
+
+    def __iter__(self) -> Iterator[Dict]:
+        # A plain scan needs no index; one on disk only bounds it to committed bytes
+        index = self._index or self._load_index()
+        for _, raw in self._raw_records(index["size"] if index else None):
+            yield _decode(raw, self.fmt)
+
+    def __len__(self) -> int:
+        return self.index["count"]
+
+    def __contains__(self, key) -> bool:
+        return str(key) in self.index["offsets"]
+
+    def keys(self):
+        return self.index["offsets"].keys()
+
+    def get(self, key, default=None) -> Optional[Dict]:
+        entry = self.index["offsets"].get(str(key))
+        if entry is None:
+            return default
+        offset, length = entry
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return _decode(f.read(length), self.fmt)
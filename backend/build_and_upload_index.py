@@ -5,32 +5,69 @@ FILE: build_and_upload_index.py
 
 Run this ONCE on your local machine to:
 1. Load scheme_metrics_merged.json
-2. Generate embeddings using OpenAI
+2. Generate embeddings (OpenAI API or a local sentence-transformers model),
+   in parallel, reusing checkpointed vectors for unchanged documents
 3. Build FAISS index
 4. Upload index files to Cloud Storage
 
 Usage:
-    python build_and_upload_index.py
+    python build_and_upload_index.py                     # OpenAI embeddings
+    python build_and_upload_index.py --provider local    # offline, CPU model
+    python build_and_upload_index.py --provider local --model BAAI/bge-small-en-v1.5
+    python build_and_upload_index.py --index-type ivfpq  # flat | sq8 | hnsw | ivfpq
+    python build_and_upload_index.py --incremental --upload   # nightly: embed only changed funds
+
+The provider/model are saved in the metadata header so VectorService
+embeds search queries with the same model.
+
+Metadata is written as an offset-indexed binary store (meta_header.json,
+meta_rows.npy, meta_records.bin) that the backend memory-maps instead
+of parsing one big metadata.json. manifest.json (sha256 per file) is
+written last; the backend opens a bundled copy (an index built before
+`gcloud run deploy` ships inside the image) and only fetches from GCS,
+into a content-addressed cache, when none is present.
+
+Index types (all wrapped in an IndexIDMap keyed by fund code):
+    flat  - exact inner product, 4 bytes/dim
+    sq8   - 8-bit scalar quantised, ~4x smaller, near-exact (default)
+    hnsw  - graph index, fastest queries, largest memory
+    ivfpq - inverted lists + product quantisation, smallest memory
 
 Requirements:
     pip install faiss-cpu openai google-cloud-storage numpy
+    pip install sentence-transformers   # for --provider local
+
+Only openai-provider indexes are uploaded: the deployed backend
+(backend/requirements.txt) does not ship sentence-transformers, so it could
+not embed queries against a local-provider index.
 """
 
 import os
 import json
+import argparse
 import numpy as np
 from pathlib import Path
 from typing import List, Dict
 import time
 
+from services.embedding_pipeline import EmbeddingBuildError, document_hash, embed_documents_resumable
+from services.embedding_provider import BaseEmbeddingProvider, get_embedding_provider
+from services.fund_documents import create_documents
+from services.index_source import read_manifest, write_manifest
+from services.metadata_store import MetadataStore, store_exists, write_metadata_store
+
 # ============================================================
 # CONFIGURATION - UPDATE THESE
 # ============================================================
 GCS_BUCKET = "run-sources-mf-advisor-487108-asia-south1"
 DATA_FILE = "./data/scheme_metrics_merged.json"  # Local path to your fund data
 OUTPUT_DIR = "./data/faiss_index"  # Local output directory
-EMBEDDING_MODEL = "text-embedding-ada-002"
-EMBEDDING_DIM = 1536
+CHECKPOINT_FILE = "./data/embedding_checkpoint.sqlite"  # Embeddings by content hash (resume + reuse)
+INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "sq8")  # flat | sq8 | hnsw | ivfpq
+HNSW_M = 32
+IVF_NLIST = 64
+PQ_M = 48
+SERVED_PROVIDERS = ("openai",)  # providers backend/requirements.txt can embed queries with
 
 # ============================================================
 # SETUP
@@ -59,18 +96,20 @@ def load_openai_key():
     return os.environ.get("OPENAI_API_KEY")
 
 
-def check_requirements():
+def check_requirements(provider: str):
     """Check all requirements are installed."""
     print("🔍 Checking requirements...")
     
-    # Check OpenAI API key
-    api_key = load_openai_key()
-    if not api_key:
-        print("❌ OPENAI_API_KEY not found!")
-        print("   Create a file: OPENAI_API_KEY.txt with your key")
-        print("   Or set environment variable: set OPENAI_API_KEY=your-key")
-        return False
-    print(f"   ✅ OPENAI_API_KEY ready")
+    # Check OpenAI API key (only needed for OpenAI embeddings)
+    if provider == "openai":
+        api_key = load_openai_key()
+        if not api_key:
+            print("❌ OPENAI_API_KEY not found!")
+            print("   Create a file: OPENAI_API_KEY.txt with your key")
+            print("   Or set environment variable: set OPENAI_API_KEY=your-key")
+            print("   Or build offline with: --provider local")
+            return False
+        print(f"   ✅ OPENAI_API_KEY ready")
     
     # Check data file
     if not os.path.exists(DATA_FILE):
@@ -86,12 +125,20 @@ def check_requirements():
         print("❌ faiss-cpu not installed. Run: pip install faiss-cpu")
         return False
     
-    try:
-        from openai import OpenAI
-        print(f"   ✅ openai installed")
-    except ImportError:
-        print("❌ openai not installed. Run: pip install openai")
-        return False
+    if provider == "openai":
+        try:
+            from openai import OpenAI
+            print(f"   ✅ openai installed")
+        except ImportError:
+            print("❌ openai not installed. Run: pip install openai")
+            return False
+    else:
+        try:
+            import sentence_transformers
+            print(f"   ✅ sentence-transformers installed")
+        except ImportError:
+            print("❌ sentence-transformers not installed. Run: pip install sentence-transformers")
+            return False
     
     try:
         from google.cloud import storage
@@ -112,142 +159,187 @@ def load_fund_data() -> Dict:
     return data
 
 
-def create_documents(funds_data: Dict) -> tuple:
-    """Create document texts and metadata from fund data."""
-    print(f"\n📝 Creating documents...")
+def _largest_divisor(dim: int, limit: int) -> int:
+    """Largest divisor of dim that is <= limit (PQ sub-quantizer count)."""
+    for m in range(min(limit, dim), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def create_faiss_index(index_type: str, dim: int, n_vectors: int, train_data: np.ndarray):
+    """
+    Create (and train, if needed) an inner-product index wrapped in IndexIDMap.
+    Training sizes are clamped so small catalogs still train cleanly.
+    """
+    import faiss
     
-    docs = []
-    metas = []
+    metric = faiss.METRIC_INNER_PRODUCT
+    
+    if index_type == "flat":
+        base = faiss.IndexFlatIP(dim)
+    elif index_type == "sq8":
+        base = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, metric)
+    elif index_type == "hnsw":
+        base = faiss.IndexHNSWFlat(dim, HNSW_M, metric)
+        base.hnsw.efConstruction = 80
+    elif index_type == "ivfpq":
+        nlist = max(1, min(IVF_NLIST, n_vectors // 39))
+        nbits = 8 if n_vectors >= 256 * 39 else 4  # enough points per PQ centroid
+        quantizer = faiss.IndexFlatIP(dim)
+        base = faiss.IndexIVFPQ(quantizer, dim, nlist, _largest_divisor(dim, PQ_M), nbits, metric)
+    else:
+        raise ValueError(f"Unknown index type: {index_type}. Use flat, sq8, hnsw or ivfpq")
     
-    for fund_name, fund in funds_data.items():
-        try:
-            # Extract metrics
-            metrics = fund.get("metrics", {})
-            metrics_text = []
-            
-            if metrics.get("cagr"):
-                metrics_text.append(f"CAGR: {metrics['cagr']*100:.1f}%")
-            if metrics.get("rolling_3y"):
-                metrics_text.append(f"3Y Return: {metrics['rolling_3y']*100:.1f}%")
-            if metrics.get("sharpe"):
-                metrics_text.append(f"Sharpe: {metrics['sharpe']:.2f}")
-            
-            # Build document
-            fund_code = fund.get("canonical_code", "")
-            category = fund.get("sub_category", fund.get("main_category", ""))
-            risk_level = fund.get("riskometer", "")
-            description = (fund.get("investment_objective") or "")[:150]
-            
-            doc_text = f"Fund: {fund_name}. Category: {category}. Risk: {risk_level}. {description}. {', '.join(metrics_text)}"
-            
-            docs.append(doc_text)
-            metas.append({
-                'fund_code': str(fund_code),
-                'fund_name': fund.get("parent_scheme_name", fund_name),
-                'category': category,
-                'risk_level': risk_level
-            })
-            
-        except Exception as e:
-            print(f"   ⚠️ Error processing {fund_name}: {e}")
+    if not base.is_trained:
+        print(f"   🏋️ Training {index_type} index on {len(train_data)} vectors...")
+        base.train(train_data)
     
-    print(f"   ✅ Created {len(docs)} documents")
-    return docs, metas
+    return faiss.IndexIDMap(base)
 
 
-def get_embeddings_batch(texts: List[str], batch_size: int = 50) -> List[np.ndarray]:
-    """Get embeddings from OpenAI in batches."""
-    from openai import OpenAI
-    
-    client = OpenAI()
-    all_embeddings = []
-    total = len(texts)
+def build_faiss_index(embeddings: np.ndarray, metas: List[Dict], embedding_info: Dict,
+                      index_type: str = INDEX_TYPE):
+    """Build a FAISS index from scratch (bulk add)."""
+    print(f"\n📊 Building FAISS index ({index_type})...")
     
-    print(f"\n🔄 Getting embeddings for {total} documents...")
-    print(f"   Using model: {EMBEDDING_MODEL}")
-    print(f"   Batch size: {batch_size}")
-    print()
+    if len(embeddings) != len(metas):
+        raise ValueError(f"{len(metas)} documents but {len(embeddings)} embeddings")
     
-    start_time = time.time()
+    matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+    ids = np.array([m["id"] for m in metas], dtype=np.int64)
     
-    for i in range(0, total, batch_size):
-        batch = [t[:8000] for t in texts[i:i + batch_size]]  # Truncate to max tokens
-        
-        try:
-            response = client.embeddings.create(
-                model=EMBEDDING_MODEL,
-                input=batch
-            )
-            
-            for item in response.data:
-                emb = np.array(item.embedding, dtype=np.float32)
-                emb = emb / np.linalg.norm(emb)  # Normalize
-                all_embeddings.append(emb)
-            
-            # Progress
-            progress = min(i + batch_size, total)
-            elapsed = time.time() - start_time
-            rate = progress / elapsed if elapsed > 0 else 0
-            eta = (total - progress) / rate if rate > 0 else 0
-            
-            print(f"   Progress: {progress}/{total} ({100*progress//total}%) - ETA: {eta:.0f}s")
-            
-            # Rate limiting - small delay between batches
-            time.sleep(0.5)
-            
-        except Exception as e:
-            print(f"   ❌ Error at batch {i}: {e}")
-            # Add zero vectors for failed batch
-            for _ in batch:
-                all_embeddings.append(np.zeros(EMBEDDING_DIM, dtype=np.float32))
+    if len(np.unique(ids)) != len(ids):
+        raise ValueError("Duplicate vector IDs - check canonical_code uniqueness")
     
-    elapsed = time.time() - start_time
-    print(f"\n   ✅ Generated {len(all_embeddings)} embeddings in {elapsed:.1f}s")
+    # Create index and bulk-add all vectors with their IDs
+    index = create_faiss_index(index_type, embedding_info["dim"], len(matrix), matrix)
+    index.add_with_ids(matrix, ids)
     
-    return all_embeddings
+    print(f"   ✅ Added {index.ntotal} vectors to index")
+    return index
 
 
-def build_faiss_index(embeddings: List[np.ndarray], docs: List[str], metas: List[Dict]):
-    """Build and save FAISS index."""
+def load_previous_build(index_type: str, embedding_info: Dict):
+    """
+    Load the last build from OUTPUT_DIR for an incremental update.
+    Returns (index, {id: content_hash}, previous_version) or None when a
+    full rebuild is needed.
+    """
     import faiss
     
-    print(f"\n📊 Building FAISS index...")
+    index_file = os.path.join(OUTPUT_DIR, "index.faiss")
+    if not os.path.exists(index_file) or not store_exists(OUTPUT_DIR):
+        print("   ℹ️ No previous build found - full rebuild")
+        return None
+    
+    if index_type == "hnsw":
+        print("   ℹ️ HNSW indexes can't remove vectors - full rebuild (unchanged embeddings come from the checkpoint)")
+        return None
+    
+    if index_type == "ivfpq":
+        # IndexIDMap.remove_ids compacts its id_map but the IVF lists keep
+        # their old internal ids, so labels would point at the wrong rows
+        print("   ℹ️ IVF-PQ indexes can't remove vectors through the ID map - full rebuild "
+              "(unchanged embeddings come from the checkpoint)")
+        return None
+    
+    store = MetadataStore.open(OUTPUT_DIR)
+    try:
+        previous = store.header.get("embedding") or {}
+        same_model = all(previous.get(k) == embedding_info.get(k) for k in ("provider", "model", "dim"))
+        if not same_model or store.header.get("index_type") != index_type:
+            print("   ℹ️ Embedding model or index type changed - full rebuild")
+            return None
+        
+        hashes = {int(store.rows[row]["id"]): store.get(row).get("content_hash") for row in range(len(store))}
+        previous_version = (read_manifest(OUTPUT_DIR) or {}).get("version")
+    finally:
+        store.close()
+    
+    if None in hashes.values():
+        print("   ℹ️ Previous build has no content hashes - full rebuild")
+        return None
+    
+    index = faiss.read_index(index_file)
+    if index.ntotal != len(hashes):
+        print(f"   ⚠️ Previous index has {index.ntotal} vectors but {len(hashes)} metadata rows - full rebuild")
+        return None
+    
+    print(f"   ✅ Previous build {previous_version}: {index.ntotal} vectors")
+    return index, hashes, previous_version
+
+
+def update_faiss_index(index, previous_hashes: Dict[int, str], embedder: BaseEmbeddingProvider,
+                       docs: List[str], metas: List[Dict], **embed_kwargs):
+    """
+    Apply a content-hash diff to an existing IndexIDMap: remove deleted and
+    changed IDs, embed only added/changed documents, add them back.
+    Only flat / sq8 bases keep labels correct across remove_ids.
+    """
+    print(f"\n🔁 Incremental update...")
+    
+    current_ids = {m["id"] for m in metas}
+    removed = [doc_id for doc_id in previous_hashes if doc_id not in current_ids]
+    changed = [row for row, m in enumerate(metas)
+               if m["id"] in previous_hashes and previous_hashes[m["id"]] != m["content_hash"]]
+    added = [row for row, m in enumerate(metas) if m["id"] not in previous_hashes]
+    
+    print(f"   ➕ Added: {len(added)}   ✏️ Changed: {len(changed)}   ➖ Removed: {len(removed)}")
+    
+    stale = np.array(removed + [metas[row]["id"] for row in changed], dtype=np.int64)
+    if len(stale):
+        n_removed = index.remove_ids(stale)
+        if n_removed != len(stale):
+            raise ValueError(f"Expected to remove {len(stale)} vectors, removed {n_removed}")
+    
+    rows = changed + added
+    if rows:
+        vectors = embed_documents_resumable(embedder, [docs[row] for row in rows], **embed_kwargs)
+        ids = np.array([metas[row]["id"] for row in rows], dtype=np.int64)
+        index.add_with_ids(np.ascontiguousarray(vectors, dtype=np.float32), ids)
+    
+    print(f"   ✅ Index now has {index.ntotal} vectors")
+    return index, {"added": len(added), "changed": len(changed), "removed": len(removed)}
+
+
+def save_index(index, docs: List[str], metas: List[Dict], embedding_info: Dict,
+               index_type: str, build_info: Dict) -> List[str]:
+    """Save index + metadata store + manifest to OUTPUT_DIR (a new index version)."""
+    import faiss
     
     # Create output directory
     Path(OUTPUT_DIR).mkdir(parents=True, exist_ok=True)
     
-    # Create index
-    index = faiss.IndexFlatIP(EMBEDDING_DIM)  # Inner product for cosine similarity
-    
-    # Add vectors
-    valid_count = 0
-    valid_docs = []
-    valid_metas = []
-    
-    for emb, doc, meta in zip(embeddings, docs, metas):
-        if np.any(emb):  # Skip zero vectors
-            index.add(emb.reshape(1, -1))
-            valid_docs.append(doc)
-            valid_metas.append(meta)
-            valid_count += 1
-    
-    print(f"   ✅ Added {valid_count} vectors to index")
-    
-    # Save index
+    # Save index (temp file + rename so a crash never leaves a half-written index)
     index_file = os.path.join(OUTPUT_DIR, "index.faiss")
-    faiss.write_index(index, index_file)
+    faiss.write_index(index, index_file + ".tmp")
+    os.replace(index_file + ".tmp", index_file)
     print(f"   💾 Saved: {index_file} ({os.path.getsize(index_file) / 1024 / 1024:.1f} MB)")
     
-    # Save metadata
-    meta_file = os.path.join(OUTPUT_DIR, "metadata.json")
-    with open(meta_file, 'w', encoding='utf-8') as f:
-        json.dump({
-            'documents': valid_docs,
-            'metadata': valid_metas
-        }, f)
-    print(f"   💾 Saved: {meta_file} ({os.path.getsize(meta_file) / 1024 / 1024:.1f} MB)")
+    # Save metadata (offset-indexed binary store, header written last)
+    meta_files = write_metadata_store(
+        OUTPUT_DIR, [m["id"] for m in metas], docs, metas,
+        {'embedding': embedding_info, 'index_type': index_type}
+    )
+    for meta_file in meta_files:
+        print(f"   💾 Saved: {meta_file} ({os.path.getsize(meta_file) / 1024 / 1024:.1f} MB)")
+    
+    # Drop a stale metadata.json so the backend never pairs it with the new index
+    legacy_meta = os.path.join(OUTPUT_DIR, "metadata.json")
+    if os.path.exists(legacy_meta):
+        os.remove(legacy_meta)
     
-    return index_file, meta_file
+    # Manifest last: checksums let servers validate and cache by content
+    manifest_file = write_manifest(OUTPUT_DIR, [index_file] + meta_files, {"build": build_info})
+    print(f"   💾 Saved: {manifest_file} (version {read_manifest(OUTPUT_DIR)['version']})")
+    
+    return [index_file] + meta_files + [manifest_file]
+
+
+def can_upload(embedding_info: Dict) -> bool:
+    """Deployed VectorService can only embed queries for these providers."""
+    return embedding_info.get("provider") in SERVED_PROVIDERS
 
 
 def upload_to_gcs(local_files: List[str]):
@@ -288,68 +380,116 @@ def upload_to_gcs(local_files: List[str]):
         return False
 
 
-def test_index():
+def test_index(embedder: BaseEmbeddingProvider):
     """Test the built index."""
     import faiss
-    from openai import OpenAI
     
     print(f"\n🧪 Testing index...")
     
-    # Load index
-    index = faiss.read_index(os.path.join(OUTPUT_DIR, "index.faiss"))
-    with open(os.path.join(OUTPUT_DIR, "metadata.json"), 'r') as f:
-        data = json.load(f)
+    # Load index (memory-mapped, like the backend)
+    index = faiss.read_index(os.path.join(OUTPUT_DIR, "index.faiss"), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    store = MetadataStore.open(OUTPUT_DIR)
     
     print(f"   Index has {index.ntotal} vectors")
     
     # Test search
-    client = OpenAI()
     test_query = "best large cap equity fund with good returns"
     
-    response = client.embeddings.create(model=EMBEDDING_MODEL, input=test_query)
-    query_emb = np.array(response.data[0].embedding, dtype=np.float32)
-    query_emb = query_emb / np.linalg.norm(query_emb)
+    start = time.perf_counter()
+    query_emb = embedder.embed_query(test_query)
+    print(f"   Query embedding: {(time.perf_counter() - start) * 1000:.1f} ms")
     
-    scores, indices = index.search(query_emb.reshape(1, -1), 3)
+    scores, ids = index.search(query_emb.reshape(1, -1), 3)
     
     print(f"\n   Query: '{test_query}'")
     print(f"   Top 3 results:")
-    for i, (score, idx) in enumerate(zip(scores[0], indices[0])):
-        meta = data['metadata'][idx]
-        print(f"   {i+1}. {meta['fund_name'][:50]}... (score: {score:.3f})")
+    for i, (score, doc_id) in enumerate(zip(scores[0], ids[0])):
+        row = store.row_for_id(int(doc_id))
+        meta = store.get(row) if row is not None else {}
+        print(f"   {i+1}. {meta.get('fund_name', '?')[:50]}... (score: {score:.3f})")
     
     print("\n   ✅ Index working correctly!")
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Build FAISS index for MF Advisor")
+    parser.add_argument("--provider", choices=["openai", "local"], default=os.getenv("EMBEDDING_PROVIDER", "openai"),
+                        help="Embedding provider (default: EMBEDDING_PROVIDER or openai)")
+    parser.add_argument("--model", default=None, help="Embedding model override")
+    parser.add_argument("--index-type", choices=["flat", "sq8", "hnsw", "ivfpq"], default=INDEX_TYPE,
+                        help="FAISS index variant (default: FAISS_INDEX_TYPE or sq8)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Concurrent embedding batches (default: 4 for openai, 1 for local)")
+    parser.add_argument("--batch-size", type=int, default=64, help="Documents per embedding request")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE,
+                        help="Embedding checkpoint file ('' to disable resume/reuse)")
+    parser.add_argument("--rpm", type=float, default=3000, help="Initial requests/min budget (adapts to headers)")
+    parser.add_argument("--tpm", type=float, default=1_000_000, help="Initial tokens/min budget (adapts to headers)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Update the previous build in place: embed only added/changed funds, drop removed IDs")
+    parser.add_argument("--upload", action="store_true", help="Upload to Cloud Storage without prompting (nightly runs)")
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("  FAISS Index Builder for MF Advisor")
     print("=" * 60)
     
     # Check requirements
-    if not check_requirements():
+    if not check_requirements(args.provider):
         return
     
+    embedder = get_embedding_provider(args.provider, model=args.model)
+    
     # Load data
     funds_data = load_fund_data()
     
     # Create documents
     docs, metas = create_documents(funds_data)
     
-    # Get embeddings
-    embeddings = get_embeddings_batch(docs)
+    # Content hash per document: the incremental diff key
+    for doc, meta in zip(docs, metas):
+        meta['content_hash'] = document_hash(doc, embedder.model)
+    
+    embedding_info = embedder.describe()
+    embed_kwargs = dict(
+        checkpoint_path=args.checkpoint or None,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        requests_per_min=args.rpm,
+        tokens_per_min=args.tpm,
+    )
+    
+    previous = load_previous_build(args.index_type, embedding_info) if args.incremental else None
+    
+    try:
+        if previous:
+            index, previous_hashes, previous_version = previous
+            index, build_info = update_faiss_index(index, previous_hashes, embedder, docs, metas, **embed_kwargs)
+            build_info.update({"mode": "incremental", "previous_version": previous_version})
+        else:
+            # Only new/changed documents hit the provider (checkpoint reuse)
+            embeddings = embed_documents_resumable(embedder, docs, prune=True, **embed_kwargs)
+            index = build_faiss_index(embeddings, metas, embedding_info, args.index_type)
+            build_info = {"mode": "full"}
+    except EmbeddingBuildError as e:
+        print(f"\n❌ {e}")
+        print("   Finished batches are checkpointed - re-run to resume.")
+        return
     
-    # Build index
-    index_file, meta_file = build_faiss_index(embeddings, docs, metas)
+    # Save a new index version
+    index_files = save_index(index, docs, metas, embedding_info, args.index_type, build_info)
     
     # Test index
-    test_index()
+    test_index(embedder)
     
     # Upload to GCS
     print("\n" + "=" * 60)
-    response = input("Upload to Cloud Storage? (y/N): ")
-    if response.lower() == 'y':
-        upload_to_gcs([index_file, meta_file])
+    if not can_upload(embedding_info):
+        print(f"\n⚠️ Not uploading: the deployed backend can't embed queries for "
+              f"provider '{embedding_info.get('provider')}' (sentence-transformers is not in "
+              f"backend/requirements.txt). Files kept in {OUTPUT_DIR} for local use.")
+    elif args.upload or input("Upload to Cloud Storage? (y/N): ").lower() == 'y':
+        upload_to_gcs(index_files)
     else:
         print("\n📁 Files saved locally. Upload manually with:")
         print(f"   gsutil cp {OUTPUT_DIR}/* gs://{GCS_BUCKET}/faiss_index/")
@@ -359,8 +499,8 @@ def main():
     print("  ✅ DONE!")
     print("=" * 60)
     print("\nNext steps:")
-    print("1. Deploy your backend (index will be downloaded from GCS)")
-    print("2. First startup will be fast (no embedding generation)")
+    print(f"1. Deploy your backend - {OUTPUT_DIR} is bundled into the image and opened in place")
+    print("2. Instances without a bundled copy fetch it from GCS into a checksum-verified cache")
 
 
 if __name__ == "__main__":
@@ -10,7 +10,7 @@ from datetime import datetime, timedelta
 from pydantic import BaseModel
 from typing import Optional,List
 import difflib
-from routers.chat import router as chat_router
+from routers.chat import router as chat_router, get_vectors
 from routers.analytics import router as analytics_router
 from services.llm_service import get_llm_provider, MFBESTIE_SYSTEM_PROMPT
 
@@ -1357,6 +1357,17 @@ async def debug_scheme_codes(limit: int = 20):
 # DEBUG: Print all registered routes
 # ---------------------------------------------------
 
+@app.on_event("startup")
+def warm_vector_index():
+    """Open the vector index at boot so the first chat request can use semantic search."""
+    get_vectors()
+
+@app.on_event("shutdown")
+async def close_llm_clients():
+    """Close the shared LLM connection pools."""
+    from services.llm_clients import get_llm_clients
+    await get_llm_clients().aclose()
+
 @app.on_event("startup")
 def debug_routes():
     print("\n" + "="*60)
@@ -1639,7 +1650,7 @@ async def analyze_portfolio(request: PortfolioAnalysisRequest):
         # Inline system prompt to avoid import errors
         system_prompt = "You are a Gen-Z financial advisor bestie who loves mutual funds and speaks entirely in internet slang."
         
-        ai_message = llm.generate(prompt, system_prompt=system_prompt, max_tokens=100)
+        ai_message = await llm.agenerate(prompt, system_prompt=system_prompt, max_tokens=100)
         ai_message = ai_message.strip().strip('"').strip("'")
         
     except Exception as e:
@@ -9,12 +9,17 @@ UPDATED:
 - Better fallback to main_category when sub_category has few peers
 - Returns partial data instead of error when peers are limited
 - Fixed sector response to include both "weight" and "value" fields
+- Added MANAGER_INDEX (normalised manager -> track record) built at load,
+  served by /manager/{name} and used by the fund-manager card
 """
 
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel, Field
 from typing import List, Dict, Optional, Any
+from datetime import datetime
 import json
+import re
+import statistics
 from pathlib import Path
 
 router = APIRouter(prefix="/api/analytics", tags=["Analytics"])
@@ -24,6 +29,205 @@ router = APIRouter(prefix="/api/analytics", tags=["Analytics"])
 # DATA LOADING
 # =============================================================================
 
+MANAGER_TITLES = re.compile(r"^(mr|mrs|ms|dr|shri|smt|ca|cfa)\.?\s+")
+# Separators outside parentheses only: "A (since April 1, 2020), B"
+MANAGER_SPLIT = re.compile(r"(?:,|;|\band\b|&|\n)(?![^()]*\))")
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+
+# Keys of fund["metrics"] aggregated per manager
+MANAGER_METRICS = [
+    "cagr", "rolling_3y", "abs_return_1y", "sharpe", "sortino", "volatility", "max_drawdown",
+]
+
+
+def normalize_manager_name(name: str) -> str:
+    """Normalise a manager name into an index key ("Mr. R. Shah" -> "r shah")."""
+    key = (name or "").lower().strip()
+    key = re.sub(r"\(.*?\)", " ", key)
+    key = MANAGER_TITLES.sub("", key)
+    key = re.sub(r"[^a-z ]", " ", key)
+    return re.sub(r"\s+", " ", key).strip()
+
+
+def parse_since_date(text: str) -> Optional[datetime]:
+    """Parse a 'managing since' hint like 'April 2020', '01-04-2020' or '2020'."""
+    if not text:
+        return None
+    text = str(text).lower()
+
+    m = re.search(r"(\d{1,2})[-/.](\d{1,2})[-/.](\d{4})", text)
+    if m:
+        try:
+            return datetime(int(m.group(3)), int(m.group(2)), int(m.group(1)))
+        except ValueError:
+            pass
+
+    m = re.search(r"(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?[\s,\-]*(?:\d{1,2}[\s,]+)?(\d{4})", text)
+    if m:
+        return datetime(int(m.group(2)), MONTHS[m.group(1)], 1)
+
+    m = re.search(r"\b(19|20)\d{2}\b", text)
+    if m:
+        return datetime(int(m.group(0)), 1, 1)
+
+    return None
+
+
+def parse_fund_managers(fund: Dict) -> List[Dict]:
+    """
+    Extract managers of a fund as [{"name", "key", "since"}].
+    Reads structured fund_manager_details when present, else splits the
+    comma-separated fund_managers string ("A (since Apr 2020), B").
+    """
+    parsed = []
+
+    details = fund.get("fund_manager_details")
+    if isinstance(details, list) and details:
+        for d in details:
+            if not isinstance(d, dict) or not d.get("name"):
+                continue
+            since_text = d.get("since") or d.get("managing_since") or d.get("tenure")
+            parsed.append({
+                "name": d["name"].strip(),
+                "key": normalize_manager_name(d["name"]),
+                "since": parse_since_date(since_text),
+            })
+    else:
+        managers = fund.get("managers") or fund.get("fund_managers") or fund.get("fund_manager") or fund.get("manager")
+        if isinstance(managers, list):
+            raw = [m.get("name", "") if isinstance(m, dict) else str(m) for m in managers]
+        elif managers:
+            raw = MANAGER_SPLIT.split(str(managers))
+        else:
+            raw = []
+
+        for item in raw:
+            name = re.sub(r"\(.*?\)", "", item).strip(" .-")
+            if not name:
+                continue
+            hint = re.search(r"\((.*?)\)", item)
+            parsed.append({
+                "name": name,
+                "key": normalize_manager_name(name),
+                "since": parse_since_date(hint.group(1)) if hint else None,
+            })
+
+    return [p for p in parsed if p["key"]]
+
+
+def _fund_aum(fund: Dict) -> Optional[float]:
+    """AUM as stored by merge_all_data.normalize_aum: float crore, or None."""
+    value = fund.get("aum")
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0:
+        return float(value)
+    return None
+
+
+def _weighted_mean(pairs: List[tuple]) -> Optional[float]:
+    """Weighted mean of (value, weight) pairs, ignoring missing values."""
+    pairs = [(v, w) for v, w in pairs if v is not None]
+    total_weight = sum(w for _, w in pairs)
+    if not pairs or total_weight <= 0:
+        return None
+    return round(sum(v * w for v, w in pairs) / total_weight, 4)
+
+
+def build_manager_index(raw_data: Dict) -> Dict[str, Dict]:
+    """
+    Build normalised manager -> track record index.
+
+    Each record holds the funds managed (with tenure), AUM-weighted
+    aggregate metrics (equal weights when AUM is missing for any fund)
+    and the distribution of the manager's fund scores. AUM and
+    managing-since dates come from the summary extraction; funds
+    extracted before those fields existed have neither, and the record
+    says so (weighting / weighting_note, tenure_available).
+    """
+    today = datetime.now()
+    grouped: Dict[str, Dict] = {}
+
+    for fund_name, fund in raw_data.items():
+        managers = parse_fund_managers(fund)
+        if not managers:
+            continue
+
+        score_data = fund.get("score") if isinstance(fund.get("score"), dict) else {}
+        tier = score_data.get("tier", {}) if isinstance(score_data.get("tier"), dict) else {}
+
+        for m in managers:
+            entry = grouped.setdefault(m["key"], {"names": {}, "funds": [], "_raw": []})
+            entry["names"][m["name"]] = entry["names"].get(m["name"], 0) + 1
+
+            since = m["since"]
+            entry["funds"].append({
+                "fund_name": fund_name,
+                "code": fund.get("canonical_code"),
+                "category": fund.get("sub_category") or fund.get("scheme_category") or fund.get("main_category") or "Unknown",
+                "main_category": fund.get("main_category"),
+                "score": score_data.get("total"),
+                "score_tier": tier.get("name"),
+                "aum": _fund_aum(fund),
+                "managing_since": since.strftime("%Y-%m-%d") if since else None,
+                "tenure_years": round((today - since).days / 365.25, 1) if since else None,
+            })
+            entry["_raw"].append(fund)
+
+    index = {}
+    for key, entry in grouped.items():
+        funds = entry["funds"]
+        aums = [f["aum"] for f in funds]
+        use_aum = all(a for a in aums)
+        aum_known = sum(1 for a in aums if a)
+        weights = aums if use_aum else [1.0] * len(funds)
+
+        aggregate = {}
+        for metric in MANAGER_METRICS:
+            values = [(f.get("metrics") or {}).get(metric) for f in entry["_raw"]]
+            values = [float(v) if isinstance(v, (int, float)) else None for v in values]
+            aggregate[metric] = _weighted_mean(list(zip(values, weights)))
+
+        scores = [f["score"] for f in funds if isinstance(f["score"], (int, float))]
+        tiers = {}
+        for f in funds:
+            if f["score_tier"]:
+                tiers[f["score_tier"]] = tiers.get(f["score_tier"], 0) + 1
+
+        tenures = [f["tenure_years"] for f in funds if f["tenure_years"] is not None]
+        categories = {}
+        for f in funds:
+            categories[f["category"]] = categories.get(f["category"], 0) + 1
+
+        funds.sort(key=lambda f: f["score"] if f["score"] is not None else -1, reverse=True)
+
+        index[key] = {
+            "manager": max(entry["names"], key=entry["names"].get),
+            "key": key,
+            "fund_count": len(funds),
+            "total_aum": round(sum(aums), 2) if use_aum else None,
+            "weighting": "aum" if use_aum else "equal",
+            "weighting_note": None if use_aum else
+                f"Equal weights: AUM known for {aum_known} of {len(funds)} funds",
+            "tenure_available": bool(tenures),
+            "longest_tenure_years": max(tenures) if tenures else None,
+            "categories": categories,
+            "funds": funds,
+            "aggregate_metrics": aggregate,
+            "score_distribution": {
+                "count": len(scores),
+                "mean": round(statistics.mean(scores), 1) if scores else None,
+                "median": round(statistics.median(scores), 1) if scores else None,
+                "min": round(min(scores), 1) if scores else None,
+                "max": round(max(scores), 1) if scores else None,
+                "tiers": tiers,
+            },
+        }
+
+    return index
+
+
 def load_funds():
     """Load funds and create lookup indexes."""
     paths = [
@@ -41,7 +245,7 @@ def load_funds():
     
     if not raw_data:
         print("⚠️ Fund data not found")
-        return {}, {}, {}
+        return {}, {}, {}, {}
     
     # Create code-to-fund lookup index
     code_index = {}
@@ -89,15 +293,18 @@ def load_funds():
     print(f"📊 Analytics: Indexed {len(code_index)} scheme codes")
     print(f"📊 Analytics: Built {len(category_index)} category groups")
     
+    manager_index = build_manager_index(raw_data)
+    print(f"📊 Analytics: Indexed {len(manager_index)} fund managers")
+    
     # Print sample categories for debugging
     sample_cats = list(category_index.keys())[:10]
     print(f"📊 Sample categories: {sample_cats}")
     
-    return raw_data, code_index, category_index
+    return raw_data, code_index, category_index, manager_index
 
 
 # Load data at startup
-FUNDS_BY_NAME, FUNDS_BY_CODE, CATEGORY_INDEX = load_funds()
+FUNDS_BY_NAME, FUNDS_BY_CODE, CATEGORY_INDEX, MANAGER_INDEX = load_funds()
 
 
 # =============================================================================
@@ -686,7 +893,7 @@ async def get_fund_manager(fund_code: str):
     
     fund_name = get_fund_name(fund)
     
-    managers = fund.get("managers") or fund.get("fund_managers") or fund.get("fund_manager") or fund.get("manager")
+    managers = parse_fund_managers(fund)
     
     if not managers:
         return {
@@ -696,30 +903,24 @@ async def get_fund_manager(fund_code: str):
             "message": "Manager data not available"
         }
     
-    if isinstance(managers, str):
-        manager_list = [m.strip() for m in managers.split(",")]
-    elif isinstance(managers, list):
-        manager_list = managers
-    else:
-        manager_list = [str(managers)]
+    manager_list = [m["name"] for m in managers]
+    primary_manager = manager_list[0]
     
-    # Find other funds by same managers
+    # Other funds by the primary manager come straight from MANAGER_INDEX
+    record = MANAGER_INDEX.get(managers[0]["key"])
     other_funds = []
-    primary_manager = manager_list[0] if manager_list else ""
     
-    if primary_manager:
-        for fname, f in FUNDS_BY_NAME.items():
-            if fname == fund.get("_fund_name_key"):
+    if record:
+        for f in record["funds"]:
+            if f["fund_name"] == fund.get("_fund_name_key"):
                 continue
-            fm = f.get("managers") or f.get("fund_managers") or f.get("fund_manager") or ""
-            if primary_manager.lower() in str(fm).lower():
-                other_funds.append({
-                    "fund_name": fname,
-                    "code": f.get("canonical_code"),
-                    "category": get_fund_category(f),
-                })
-                if len(other_funds) >= 5:
-                    break
+            other_funds.append({
+                "fund_name": f["fund_name"],
+                "code": f["code"],
+                "category": f["category"],
+            })
+            if len(other_funds) >= 5:
+                break
     
     return {
         "fund_code": fund_code,
@@ -728,9 +929,31 @@ async def get_fund_manager(fund_code: str):
         "managers": manager_list,
         "primary_manager": primary_manager,
         "other_funds_managed": other_funds,
+        "track_record": {
+            "fund_count": record["fund_count"],
+            "weighting": record["weighting"],
+            "weighting_note": record["weighting_note"],
+            "aggregate_metrics": record["aggregate_metrics"],
+            "score_distribution": record["score_distribution"],
+        } if record else None,
     }
 
 
+@router.get("/manager/{name}")
+async def get_manager(name: str):
+    """Get a fund manager's precomputed track record."""
+    key = normalize_manager_name(name)
+    record = MANAGER_INDEX.get(key)
+    
+    if not record:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Fund manager not found: {name}"
+        )
+    
+    return record
+
+
 # =============================================================================
 # HEALTH CHECK
 # =============================================================================
@@ -750,6 +973,7 @@ async def health():
         "funds_by_name": len(FUNDS_BY_NAME),
         "funds_by_code": len(FUNDS_BY_CODE),
         "categories_indexed": len(CATEGORY_INDEX),
+        "managers_indexed": len(MANAGER_INDEX),
         "sample_codes": sample_codes,
         "sample_names": sample_names,
         "sample_categories": sample_categories,
@@ -8,10 +8,13 @@ Vector service now loads lazily and won't crash the app.
 """
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, AsyncIterator
+import hashlib
 import json
 import os
+import time
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -218,8 +221,13 @@ SUB_CATEGORY_SYNONYMS = {
 # DATA LOADING
 # =============================================================================
 
+CATALOG_VERSION = "empty"  # sha256 prefix of the loaded fund file (chat cache key)
+
+
 def load_funds():
     """Load funds and create indexes."""
+    global CATALOG_VERSION
+    
     paths = [
         Path(__file__).parent.parent / "data" / "scheme_metrics_merged.json",
         Path("./data/scheme_metrics_merged.json"),
@@ -229,9 +237,10 @@ def load_funds():
     raw_data = {}
     for p in paths:
         if p.exists():
-            with open(p, encoding='utf-8') as f:
-                raw_data = json.load(f)
-            print(f"✅ Loaded funds from {p}")
+            raw_bytes = p.read_bytes()
+            raw_data = json.loads(raw_bytes)
+            CATALOG_VERSION = hashlib.sha256(raw_bytes).hexdigest()[:16]
+            print(f"✅ Loaded funds from {p} (catalog {CATALOG_VERSION})")
             break
     
     if not raw_data:
@@ -276,35 +285,20 @@ FUNDS_BY_NAME, FUNDS_BY_CODE, FUNDS_BY_SUB_CATEGORY, FUNDS_BY_MAIN_CATEGORY = lo
 # SERVICES - ALL LAZY LOADED (won't block startup)
 # =============================================================================
 
-_llm_client = None
 _vectors = None
 _profiler = None
+_retriever = None
 _vector_status = {"available": False, "loading": False, "error": None, "documents": 0}
 
 
-def get_openai_client():
-    """Lazy load OpenAI client with proper timeout settings."""
-    global _llm_client
-    if _llm_client is None:
-        try:
-            from openai import OpenAI
-            import httpx
-            
-            api_key = os.getenv("OPENAI_API_KEY")
-            if not api_key:
-                print("⚠️ OPENAI_API_KEY not found!")
-                return None
-            
-            # Create client with extended timeout for Cloud Run
-            _llm_client = OpenAI(
-                api_key=api_key,
-                timeout=httpx.Timeout(60.0, connect=10.0),  # 60s total, 10s connect
-                max_retries=2
-            )
-            print(f"✅ OpenAI client ready")
-        except Exception as e:
-            print(f"⚠️ OpenAI unavailable: {e}")
-    return _llm_client
+def get_async_openai_client():
+    """Shared pooled async OpenAI client (services/llm_clients.py)."""
+    try:
+        from services.llm_clients import get_llm_clients
+        return get_llm_clients().openai_async()
+    except Exception as e:
+        print(f"⚠️ OpenAI unavailable: {e}")
+        return None
 
 
 def get_vectors():
@@ -315,8 +309,8 @@ def get_vectors():
         return _vectors
     
     try:
-        from services.vector_service import VectorService
-        _vectors = VectorService()
+        from services.vector_service import get_vector_service
+        _vectors = get_vector_service()
         _vector_status["available"] = True
         
         # Check if ready
@@ -336,8 +330,21 @@ def get_vectors():
     return _vectors
 
 
-def search_funds_semantic(query: str, n_results: int = 5) -> List[Dict]:
-    """Search funds using vector similarity - safe wrapper."""
+def get_retriever():
+    """Lazy build the hybrid (BM25 + vector) retriever over the fund catalog."""
+    global _retriever
+    if _retriever is None:
+        from services.hybrid_retriever import HybridRetriever
+        _retriever = HybridRetriever(FUNDS_BY_NAME)
+        print(f"✅ Hybrid retriever ready ({len(FUNDS_BY_NAME)} funds)")
+    return _retriever
+
+
+def search_funds_semantic(query: str, n_results: int = 5, **filters) -> List[Dict]:
+    """
+    Search funds using vector similarity - safe wrapper.
+    filters: category, risk_level, reliable_only (applied inside the index)
+    """
     svc = get_vectors()
     
     if svc is None:
@@ -346,7 +353,7 @@ def search_funds_semantic(query: str, n_results: int = 5) -> List[Dict]:
     try:
         if hasattr(svc, 'is_ready') and not svc.is_ready():
             return []
-        return svc.search(query, n_results=n_results)
+        return svc.search(query, n_results=n_results, **filters)
     except Exception as e:
         print(f"⚠️ Vector search error: {e}")
         return []
@@ -493,28 +500,21 @@ def map_category(query: str) -> List[str]:
 
 
 def tool_search_funds(query: str, category: str = None, limit: int = 5) -> List[Dict]:
-    """Search funds by name or keywords."""
-    results = []
-    query_lower = query.lower()
-    
-    # Try semantic search first
-    semantic_results = search_funds_semantic(query, n_results=limit)
-    if semantic_results:
-        for sr in semantic_results:
-            fund = get_fund(sr.get("fund_code", ""))
-            if fund:
-                results.append(format_fund_for_response(fund))
-        if len(results) >= limit:
-            return results[:limit]
-    
-    # Fallback to text search
-    for name, fund in FUNDS_BY_NAME.items():
-        if query_lower in name.lower():
-            results.append(format_fund_for_response(fund))
-            if len(results) >= limit:
-                break
+    """
+    Search funds by name or keywords.
+    Exact names resolve without an embedding call; otherwise BM25 and
+    vector results are fused (RRF), with the category filter on both.
+    """
+    sub_categories = map_category(category) if category else []
+    
+    def semantic_codes(q: str, n: int) -> List[str]:
+        hits = search_funds_semantic(q, n_results=n, category=sub_categories or None)
+        return [h.get("fund_code", "") for h in hits]
     
-    return sorted(results, key=lambda x: x.get("score", 0), reverse=True)[:limit]
+    funds = get_retriever().search(
+        query, limit=limit, categories=sub_categories or None, semantic_fn=semantic_codes
+    )
+    return [format_fund_for_response(f) for f in funds]
 
 
 def tool_get_fund_details(fund_code: str) -> Dict:
@@ -716,6 +716,11 @@ SCORE: 80-100 🏆 | 65-79 ⭐ | 50-64 👍 | <50 Below Average
 # EXECUTE TOOL
 # =============================================================================
 
+# Deterministic given the catalog (search_funds has its own per-query cache,
+# which knows whether the vector index was ready)
+CACHEABLE_TOOLS = {"get_fund_details", "get_top_funds", "compare_funds", "calculate_risk_profile"}
+
+
 def execute_tool(tool_name: str, arguments: Dict) -> Any:
     if tool_name == "search_funds":
         return tool_search_funds(arguments.get("query", ""), arguments.get("category"), arguments.get("limit", 5))
@@ -734,6 +739,17 @@ def execute_tool(tool_name: str, arguments: Dict) -> Any:
     return {"error": f"Unknown tool: {tool_name}"}
 
 
+def execute_tool_cached(tool_name: str, arguments: Dict) -> Any:
+    """execute_tool, memoised per catalog version for deterministic tools."""
+    if tool_name not in CACHEABLE_TOOLS:
+        return execute_tool(tool_name, arguments)
+    
+    from services.chat_cache import get_chat_cache
+    return get_chat_cache().tools.get_or_call(
+        CATALOG_VERSION, tool_name, arguments, lambda: execute_tool(tool_name, arguments)
+    )
+
+
 # =============================================================================
 # MODELS
 # =============================================================================
@@ -758,6 +774,245 @@ class RiskProfileRequest(BaseModel):
     answers: Dict[str, int]
 
 
+# =============================================================================
+# CHAT HELPERS
+# =============================================================================
+
+def build_chat_messages(request: ChatRequest) -> List[Dict]:
+    """Static system prefix + token-budgeted history + discussed funds + user message."""
+    from services.prompt_builder import build_messages
+    
+    prev_context = request.context or {}
+    return build_messages(
+        SYSTEM_PROMPT,
+        request.message.strip(),
+        [{"role": m.role, "content": m.content} for m in request.history],
+        prev_context.get("funds")
+    )
+
+
+def collect_fund_data(result: Any, fund_data: Dict) -> Dict:
+    """Add fund cards from a tool result to fund_data; returns just the new cards."""
+    cards = {}
+    if isinstance(result, list):
+        for f in result:
+            if f and f.get("scheme_code"):
+                cards[f["scheme_code"]] = f
+    elif isinstance(result, dict) and result.get("scheme_code"):
+        cards[result["scheme_code"]] = result
+    fund_data.update(cards)
+    return cards
+
+
+CHAT_MODEL = "gpt-4o"
+
+
+def is_cacheable_turn(request: ChatRequest) -> bool:
+    """Only history-free turns are answer-cacheable (starter prompts etc.)."""
+    return not request.history and not (request.context and request.context.get("funds"))
+
+
+def decision_from_message(response_message) -> Dict:
+    """One round's LLM output as a plain dict (cacheable, replayable)."""
+    return {
+        "content": response_message.content,
+        "tool_calls": [
+            {"id": t.id, "name": t.function.name, "arguments": t.function.arguments}
+            for t in (response_message.tool_calls or [])
+        ]
+    }
+
+
+def assistant_tool_message(decision: Dict) -> Dict:
+    """Assistant message that requested the tools, for the follow-up call."""
+    return {
+        "role": "assistant",
+        "content": decision.get("content") or None,
+        "tool_calls": [
+            {"id": c["id"], "type": "function", "function": {"name": c["name"], "arguments": c["arguments"]}}
+            for c in decision["tool_calls"]
+        ]
+    }
+
+
+def chat_suggestions(fund_data: Dict) -> List[str]:
+    return (
+        ["Tell me more", "Compare top 2", "Exit load?"] 
+        if fund_data 
+        else ["Best large cap", "Top ELSS", "Risk profile?"]
+    )
+
+
+# =============================================================================
+# CHAT ENGINE (shared by /message and /stream)
+# =============================================================================
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def stream_completion(client, messages: List[Dict], tools: Optional[List[Dict]] = None):
+    """
+    Stream one chat completion.
+    Yields ("token", text) as content arrives, then ("tool_calls", [...]) if the
+    model asked for tools (arguments assembled from the streamed deltas).
+    """
+    kwargs = {"tools": tools, "tool_choice": "auto"} if tools else {}
+    stream = await client.chat.completions.create(
+        model=CHAT_MODEL,
+        messages=messages,
+        max_tokens=1000,
+        stream=True,
+        **kwargs
+    )
+    
+    tool_calls: Dict[int, Dict] = {}
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        
+        if delta.content:
+            yield "token", delta.content
+        
+        for tc in delta.tool_calls or []:
+            call = tool_calls.setdefault(tc.index, {"id": "", "name": "", "arguments": ""})
+            if tc.id:
+                call["id"] = tc.id
+            if tc.function and tc.function.name:
+                call["name"] += tc.function.name
+            if tc.function and tc.function.arguments:
+                call["arguments"] += tc.function.arguments
+    
+    if tool_calls:
+        yield "tool_calls", [tool_calls[i] for i in sorted(tool_calls)]
+
+
+async def complete_once(client, messages: List[Dict], tools: Optional[List[Dict]] = None):
+    """Non-streamed completion with the same ("token" / "tool_calls") interface."""
+    kwargs = {"tools": tools, "tool_choice": "auto"} if tools else {}
+    response = await client.chat.completions.create(
+        model=CHAT_MODEL,
+        messages=messages,
+        max_tokens=1000,
+        timeout=55.0,  # Slightly less than Cloud Run timeout
+        **kwargs
+    )
+    decision = decision_from_message(response.choices[0].message)
+    if decision["content"]:
+        yield "token", decision["content"]
+    if decision["tool_calls"]:
+        yield "tool_calls", decision["tool_calls"]
+
+
+def _parse_arguments(raw: str) -> Dict:
+    try:
+        return json.loads(raw or "{}")
+    except json.JSONDecodeError:
+        return {}
+
+
+async def run_chat_turn(request: ChatRequest, client, stream: bool) -> AsyncIterator[tuple]:
+    """
+    Agentic tool loop. Yields (event, data):
+        tool_start  {name, arguments} per tool call
+        funds       {funds: {code: card}} as soon as a tool returns
+        tool_end    {name, ms, status, count}
+        token       {text} answer tokens (one chunk when not streaming)
+        done        {message, intent, confidence, data, suggestions}
+    
+    Each round: one LLM call; requested tools run concurrently; repeat until
+    the model answers or CHAT_MAX_TOOL_ROUNDS is reached (then answer without tools).
+    History-free turns are served from the completion cache per round.
+    """
+    from services.chat_cache import get_chat_cache
+    from services.tool_dispatcher import CHAT_MAX_TOOL_ROUNDS, dispatch_tool_calls
+    from services.prompt_builder import compact_tool_result, count_message_tokens
+    from services.llm_clients import get_llm_clients
+    
+    message = request.message.strip()
+    messages = build_chat_messages(request)
+    llm_call = stream_completion if stream else complete_once
+    
+    llm_clients = get_llm_clients()
+    completions = get_chat_cache().completions
+    cacheable = is_cacheable_turn(request)
+    
+    fund_data: Dict = {}
+    tool_outputs: List = []
+    answer: List[str] = []
+    
+    for round_no in range(CHAT_MAX_TOOL_ROUNDS + 1):
+        allow_tools = round_no < CHAT_MAX_TOOL_ROUNDS
+        key = (completions.decision_key(CHAT_MODEL, message) if round_no == 0
+               else completions.answer_key(CHAT_MODEL, message, tool_outputs))
+        decision = completions.get(key) if cacheable else None
+        answer = []
+        
+        if decision is None:
+            print(f"🤖 Calling LLM (round {round_no + 1}, ~{count_message_tokens(messages)} prompt tokens)...")
+            tool_calls = []
+            async with llm_clients.limit("openai"):
+                async for kind, payload in llm_call(client, messages, TOOLS if allow_tools else None):
+                    if kind == "token":
+                        answer.append(payload)
+                        yield "token", {"text": payload}
+                    else:
+                        tool_calls = payload
+            decision = {"content": "".join(answer), "tool_calls": tool_calls}
+            if cacheable:
+                completions.put(key, decision)
+        else:
+            print(f"⚡ Cached LLM output (round {round_no + 1})")
+            if decision["content"]:
+                answer.append(decision["content"])
+                yield "token", {"text": decision["content"]}
+        
+        if not decision["tool_calls"]:
+            break
+        
+        calls = [dict(c, arguments=_parse_arguments(c["arguments"])) for c in decision["tool_calls"]]
+        print(f"🔧 Tools: {[c['name'] for c in calls]}")
+        messages.append(assistant_tool_message(decision))
+        
+        for call in calls:
+            yield "tool_start", {"name": call["name"], "arguments": call["arguments"]}
+        
+        # Concurrent: the round costs max(tool latency), not the sum
+        outcomes = [None] * len(calls)
+        async for outcome in dispatch_tool_calls(calls, execute_tool_cached):
+            outcomes[outcome["index"]] = outcome
+            result = outcome["result"]
+            
+            cards = collect_fund_data(result, fund_data)
+            if cards:
+                yield "funds", {"funds": cards}
+            yield "tool_end", {
+                "name": outcome["name"],
+                "ms": outcome["ms"],
+                "status": outcome["status"],
+                "count": len(result) if isinstance(result, list) else 1
+            }
+        
+        # Tool messages in the model's original order
+        for outcome in outcomes:
+            messages.append({
+                "role": "tool", 
+                "tool_call_id": outcome["id"], 
+                "content": compact_tool_result(outcome["result"])
+            })
+            tool_outputs.append([outcome["name"], outcome["arguments"], outcome["result"]])
+    
+    yield "done", {
+        "message": "".join(answer),
+        "intent": "llm_driven",
+        "confidence": 0.95,
+        "data": {"funds": fund_data} if fund_data else None,
+        "suggestions": chat_suggestions(fund_data)
+    }
+
+
 # =============================================================================
 # MAIN ENDPOINT
 # =============================================================================
@@ -765,13 +1020,11 @@ class RiskProfileRequest(BaseModel):
 @router.post("/message", response_model=ChatResponse)
 async def send_message(request: ChatRequest):
     message = request.message.strip()
-    history = request.history
-    prev_context = request.context
     
     print(f"\n{'='*60}")
     print(f"📩 MESSAGE: {message}")
     
-    client = get_openai_client()
+    client = get_async_openai_client()
     if not client:
         return ChatResponse(
             message="Sorry, connection issue. Try again.", 
@@ -780,66 +1033,11 @@ async def send_message(request: ChatRequest):
             suggestions=["Try again"]
         )
     
-    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
-    
-    for msg in history[-10:]:
-        messages.append({"role": msg.role, "content": msg.content})
-    
-    messages.append({"role": "user", "content": message})
-    
-    if prev_context and prev_context.get("funds"):
-        fund_summary = "Previously discussed funds:\n"
-        for code, fund in list(prev_context["funds"].items())[:5]:
-            name = fund.get("fund_name", fund.get("parent_scheme_name", "Unknown"))
-            score = fund.get("score", "N/A")
-            fund_summary += f"- {name} (Code: {code}, Score: {score})\n"
-        messages.insert(1, {"role": "system", "content": f"CONTEXT:\n{fund_summary}"})
-    
-    fund_data = {}
-    
+    result = None
     try:
-        print("🤖 Calling LLM...")
-        response = client.chat.completions.create(
-            model="gpt-4o", 
-            messages=messages, 
-            tools=TOOLS, 
-            tool_choice="auto", 
-            max_tokens=1000,
-            timeout=55.0  # Slightly less than Cloud Run timeout
-        )
-        response_message = response.choices[0].message
-        
-        if response_message.tool_calls:
-            print(f"🔧 Tools: {[t.function.name for t in response_message.tool_calls]}")
-            messages.append(response_message)
-            
-            for tool_call in response_message.tool_calls:
-                result = execute_tool(
-                    tool_call.function.name, 
-                    json.loads(tool_call.function.arguments)
-                )
-                
-                if isinstance(result, list):
-                    for f in result:
-                        if f and f.get("scheme_code"):
-                            fund_data[f["scheme_code"]] = f
-                elif isinstance(result, dict) and result.get("scheme_code"):
-                    fund_data[result["scheme_code"]] = result
-                
-                messages.append({
-                    "role": "tool", 
-                    "tool_call_id": tool_call.id, 
-                    "content": json.dumps(result, default=str)
-                })
-            
-            final = client.chat.completions.create(
-                model="gpt-4o", 
-                messages=messages, 
-                max_tokens=1000
-            )
-            response_text = final.choices[0].message.content
-        else:
-            response_text = response_message.content
+        async for event, data in run_chat_turn(request, client, stream=False):
+            if event == "done":
+                result = data
         
         print(f"✅ Done")
         
@@ -858,18 +1056,53 @@ async def send_message(request: ChatRequest):
     
     print(f"{'='*60}\n")
     
-    suggestions = (
-        ["Tell me more", "Compare top 2", "Exit load?"] 
-        if fund_data 
-        else ["Best large cap", "Top ELSS", "Risk profile?"]
-    )
+    return ChatResponse(**result)
+
+
+# =============================================================================
+# STREAMING ENDPOINT (Server-Sent Events)
+# =============================================================================
+
+async def chat_event_stream(request: ChatRequest) -> AsyncIterator[str]:
+    """
+    SSE events:
+        start       immediately (time-to-first-byte)
+        tool_start  {name, arguments} per tool call
+        funds       {funds: {code: card}} as soon as a tool returns
+        tool_end    {name, ms, status, count}
+        token       {text} answer tokens as they arrive
+        done        {message, intent, data, suggestions} (same shape as /message)
+        error       {error, error_type}
+    """
+    message = request.message.strip()
+    print(f"\n📩 STREAM: {message}")
+    yield sse_event("start", {"message": message})
     
-    return ChatResponse(
-        message=response_text, 
-        intent="llm_driven", 
-        confidence=0.95, 
-        data={"funds": fund_data} if fund_data else None, 
-        suggestions=suggestions
+    client = get_async_openai_client()
+    if not client:
+        yield sse_event("error", {"error": "Sorry, connection issue. Try again."})
+        return
+    
+    try:
+        async for event, data in run_chat_turn(request, client, stream=True):
+            yield sse_event(event, data)
+        print(f"✅ Stream done")
+        
+    except Exception as e:
+        print(f"❌ Stream error: {e}")
+        yield sse_event("error", {
+            "error": "Sorry, I'm having trouble connecting. Please try again in a moment.",
+            "error_type": type(e).__name__
+        })
+
+
+@router.post("/stream")
+async def stream_message(request: ChatRequest):
+    """Streaming variant of /message (Server-Sent Events)."""
+    return StreamingResponse(
+        chat_event_stream(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 
@@ -911,10 +1144,16 @@ async def suggestions():
     }
 
 
+def get_chat_cache_stats() -> Dict:
+    from services.chat_cache import get_chat_cache
+    return get_chat_cache().get_stats()
+
+
 @router.get("/health")
 async def health():
     """Health check endpoint."""
     global _vector_status
+    from services.llm_clients import get_llm_clients
     
     # Try to get vector service status
     svc = get_vectors()
@@ -925,16 +1164,22 @@ async def health():
             _vector_status["documents"] = stats.get('total_vectors', 0)
             _vector_status["loading"] = stats.get('loading', False)
             _vector_status["error"] = stats.get('error')
+            _vector_status["embedding_cache"] = stats.get('embedding_cache')
         except:
             pass
     
     return {
         "status": "healthy",
-        "llm_available": get_openai_client() is not None,
+        "llm_available": get_llm_clients().available("openai"),
+        "llm_clients": get_llm_clients().get_stats(),
         "vector_service_available": _vector_status["available"],
         "vector_documents": _vector_status["documents"],
         "vector_loading": _vector_status.get("loading", False),
         "vector_error": _vector_status.get("error"),
+        "vector_embedding_cache": _vector_status.get("embedding_cache"),
+        "hybrid_retriever": _retriever.get_stats() if _retriever else None,
+        "chat_cache": get_chat_cache_stats(),
+        "catalog_version": CATALOG_VERSION,
         "funds_loaded": len(FUNDS_BY_NAME),
         "main_categories": list(FUNDS_BY_MAIN_CATEGORY.keys())
     }
@@ -5,14 +5,19 @@ Contains business logic for Phase 4 features.
 """
 
 from .llm_service import get_llm_provider, BaseLLMProvider, MFBESTIE_SYSTEM_PROMPT
+from .llm_clients import get_llm_clients
 from .vector_service import VectorService
+from .embedding_provider import get_embedding_provider, BaseEmbeddingProvider
 from .risk_profiler_v2 import RiskProfilerV2, SEBIRiskLevel, UserRiskProfile, profile_to_dict
 
 __all__ = [
     "get_llm_provider",
     "BaseLLMProvider", 
     "MFBESTIE_SYSTEM_PROMPT",
+    "get_llm_clients",
     "VectorService",
+    "get_embedding_provider",
+    "BaseEmbeddingProvider",
     "RiskProfilerV2",
     "SEBIRiskLevel",
     "UserRiskProfile",
@@ -0,0 +1,174 @@
+"""
+Chat Cache - Tool Result Memoisation + LLM Completion Cache
+===========================================================
+FILE: backend/services/chat_cache.py
+
+Most chat turns are the starter prompts from /api/chat/suggestions, so
+the same tool calls and near-identical gpt-4o completions repeat.
+
+Two layers:
+- ToolResultCache: deterministic tool results, keyed by catalog version +
+  tool name + canonical arguments (a new scheme_metrics_merged.json
+  gives a new catalog version, so stale results are never served)
+- CompletionCache: LLM outputs for history-free requests, with TTL and a
+  size bound. The tool-decision call is keyed by normalised message +
+  model; the final answer by normalised message + tool outputs hash +
+  model. A full hit skips the LLM entirely.
+
+USAGE:
+    cache = get_chat_cache()
+    result = cache.tools.get_or_call(catalog_version, name, args, fn)
+    decision = cache.completions.get(cache.completions.decision_key(model, message))
+"""
+
+import os
+import json
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from cachetools import LRUCache, TTLCache
+
+from services.embedding_cache import normalize_query
+
+CHAT_CACHE_TTL = int(os.environ.get("CHAT_CACHE_TTL", "3600"))
+CHAT_CACHE_SIZE = int(os.environ.get("CHAT_CACHE_SIZE", "512"))
+TOOL_CACHE_SIZE = int(os.environ.get("TOOL_CACHE_SIZE", "1024"))
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+
+def canonical_json(value: Any) -> str:
+    """Stable JSON for hashing (sorted keys, no whitespace)."""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+
+
+# =============================================================================
+# TOOL RESULTS
+# =============================================================================
+
+def is_error_result(result: Any) -> bool:
+    """{"error": ...}, or a non-empty list of them (get_top_funds)."""
+    if isinstance(result, dict):
+        return "error" in result
+    if isinstance(result, list) and result:
+        return all(isinstance(item, dict) and "error" in item for item in result)
+    return False
+
+
+class ToolResultCache:
+    """LRU of tool results per catalog version."""
+
+    def __init__(self, max_entries: int = TOOL_CACHE_SIZE):
+        self._cache = LRUCache(maxsize=max_entries)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, catalog_version: str, tool_name: str, arguments: Dict) -> str:
+        return _digest(catalog_version, tool_name, canonical_json(arguments))
+
+    def get_or_call(self, catalog_version: str, tool_name: str, arguments: Dict, fn: Callable[[], Any]) -> Any:
+        """Cached result, or call fn() and cache it (error results are not cached)."""
+        key = self.key(catalog_version, tool_name, arguments)
+        with self._lock:
+            if key in self._cache:
+                self.hits += 1
+                return self._cache[key]
+            self.misses += 1
+
+        result = fn()
+
+        if not is_error_result(result):
+            with self._lock:
+                self._cache[key] = result
+        return result
+
+    def get_stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# =============================================================================
+# COMPLETIONS
+# =============================================================================
+
+class CompletionCache:
+    """TTL + size bounded cache of LLM outputs for history-free turns."""
+
+    def __init__(self, max_entries: int = CHAT_CACHE_SIZE, ttl_seconds: int = CHAT_CACHE_TTL):
+        self._cache = TTLCache(maxsize=max_entries, ttl=ttl_seconds)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def decision_key(model: str, message: str) -> str:
+        """First call: which tools to run (or a direct answer)."""
+        return _digest("decision", model, normalize_query(message))
+
+    @staticmethod
+    def answer_key(model: str, message: str, tool_outputs: Any) -> str:
+        """Final call: answer given the tool outputs."""
+        outputs_hash = _digest(canonical_json(tool_outputs))
+        return _digest("answer", model, normalize_query(message), outputs_hash)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            value = self._cache.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def put(self, key: str, value: Any):
+        if value is None:
+            return
+        with self._lock:
+            self._cache[key] = value
+
+    def get_stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "ttl_seconds": self._cache.ttl,
+        }
+
+
+class ChatCache:
+    def __init__(self):
+        self.tools = ToolResultCache()
+        self.completions = CompletionCache()
+
+    def get_stats(self) -> Dict:
+        return {"tools": self.tools.get_stats(), "completions": self.completions.get_stats()}
+
+
+# =============================================================================
+# SINGLETON
+# =============================================================================
+_chat_cache: Optional[ChatCache] = None
+_lock = threading.Lock()
+
+
+def get_chat_cache() -> ChatCache:
+    """Get or create the process-wide chat cache."""
+    global _chat_cache
+
+    if _chat_cache is None:
+        with _lock:
+            if _chat_cache is None:
+                _chat_cache = ChatCache()
+
+    return _chat_cache
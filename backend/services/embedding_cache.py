@@ -0,0 +1,142 @@
+"""
+Embedding Cache - Two-Tier Query Embedding Cache
+================================================
+FILE: backend/services/embedding_cache.py
+
+Keeps query embeddings so repeat searches (chat starters, common
+questions) skip the embeddings API entirely.
+
+Tiers:
+- In-process LRU (fast, per worker)
+- Optional on-disk SQLite store (survives restarts, shared by workers)
+
+Keys are the normalised query text + embedding model name, so
+"Best large cap funds" and "best  LARGE cap funds " share one entry.
+
+USAGE:
+    cache = EmbeddingCache(db_path="./data/query_embeddings.sqlite")
+    emb = cache.get(query, model)
+    if emb is None:
+        emb = embed(query)
+        cache.put(query, model, emb)
+"""
+
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import unicodedata
+from typing import Dict, Optional
+
+import numpy as np
+from cachetools import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(text: str) -> str:
+    """Normalise query text for cache keys (case, unicode form, whitespace)."""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.strip(" ?!.")
+
+
+def make_cache_key(text: str, model: str) -> str:
+    """Stable key for (normalised text, model)."""
+    raw = f"{model}\x00{normalize_query(text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """In-process LRU in front of an optional SQLite store."""
+
+    def __init__(self, max_entries: int = 2048, db_path: Optional[str] = None):
+        self._memory = LRUCache(maxsize=max_entries)
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.db_path = db_path
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if db_path:
+            self._open_db(db_path)
+
+    def _open_db(self, db_path: str):
+        """Open (or create) the SQLite tier. Failures disable the disk tier."""
+        try:
+            self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=5.0)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " key TEXT PRIMARY KEY,"
+                " model TEXT NOT NULL,"
+                " dim INTEGER NOT NULL,"
+                " vector BLOB NOT NULL)"
+            )
+            self._db.commit()
+            logger.info(f"✅ Embedding cache on disk: {db_path}")
+        except Exception as e:
+            logger.warning(f"⚠️ Disk embedding cache disabled: {e}")
+            self._db = None
+
+    def get(self, text: str, model: str) -> Optional[np.ndarray]:
+        """Return cached embedding or None."""
+        key = make_cache_key(text, model)
+
+        with self._lock:
+            emb = self._memory.get(key)
+            if emb is not None:
+                self.memory_hits += 1
+                return emb
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT vector FROM embeddings WHERE key = ?", (key,)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    logger.warning(f"Embedding cache read error: {e}")
+                    row = None
+
+                if row is not None:
+                    emb = np.frombuffer(row[0], dtype=np.float32)
+                    self._memory[key] = emb
+                    self.disk_hits += 1
+                    return emb
+
+            self.misses += 1
+            return None
+
+    def put(self, text: str, model: str, emb: np.ndarray):
+        """Store an embedding in both tiers."""
+        key = make_cache_key(text, model)
+        emb = np.asarray(emb, dtype=np.float32)
+
+        with self._lock:
+            self._memory[key] = emb
+
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO embeddings (key, model, dim, vector) VALUES (?, ?, ?, ?)",
+                        (key, model, int(emb.shape[0]), emb.tobytes()),
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"Embedding cache write error: {e}")
+
+    def get_stats(self) -> Dict:
+        """Hit/miss counters for health endpoints."""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        return {
+            "memory_entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "disk_enabled": self._db is not None,
+        }
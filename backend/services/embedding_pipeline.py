@@ -0,0 +1,388 @@
+"""
+Embedding Pipeline - Parallel, Resumable Document Embedding
+===========================================================
+FILE: backend/services/embedding_pipeline.py
+
+Build-time stage used by build_and_upload_index.py:
+
+- Content hash per document (sha256 of model + text): unchanged fund
+  documents are reused from the checkpoint, only new/changed ones are
+  re-embedded on each nightly rebuild
+- Checkpoint file (SQLite): every finished batch is committed, so an
+  interrupted build resumes where it stopped
+- Concurrent batch workers (thread pool)
+- Adaptive rate limiting: token buckets for requests/min and tokens/min,
+  tightened from x-ratelimit-* response headers and 429 retry-after
+- Retries with exponential backoff + full jitter; failed documents
+  raise EmbeddingBuildError instead of becoming zero vectors
+
+USAGE:
+    from services.embedding_pipeline import embed_documents_resumable
+
+    vectors = embed_documents_resumable(embedder, texts,
+                                        checkpoint_path="./data/embedding_checkpoint.sqlite")
+"""
+
+import time
+import random
+import sqlite3
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from services.embedding_provider import BaseEmbeddingProvider
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_RETRIES = 6
+
+# Conservative defaults for the OpenAI embeddings tier; headers raise/lower them
+DEFAULT_REQUESTS_PER_MIN = 3000
+DEFAULT_TOKENS_PER_MIN = 1_000_000
+
+
+class EmbeddingBuildError(RuntimeError):
+    """Some documents could not be embedded after all retries."""
+
+    def __init__(self, failed: int, total: int, last_error: Exception):
+        super().__init__(f"{failed}/{total} documents failed to embed: {last_error}")
+        self.failed = failed
+        self.total = total
+        self.last_error = last_error
+
+
+def document_hash(text: str, model: str) -> str:
+    """Content hash for a document under a given embedding model."""
+    return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+
+
+def estimate_tokens(texts: List[str]) -> int:
+    """Rough token count (~4 chars/token) for rate limiting."""
+    return sum(len(t) // 4 + 1 for t in texts)
+
+
+# =============================================================================
+# RATE LIMITING
+# =============================================================================
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at rate_per_min."""
+
+    def __init__(self, rate_per_min: float):
+        self.rate_per_min = float(rate_per_min)
+        self.capacity = float(rate_per_min)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate_per_min / 60.0)
+        self._updated = now
+
+    def acquire(self, amount: float = 1.0):
+        """Block until amount tokens are available (amount is capped at capacity)."""
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) * 60.0 / self.rate_per_min
+            time.sleep(min(wait, 5.0))
+
+    def drain(self, available: float):
+        """Lower the current level to what the server says is left."""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.tokens, max(0.0, available))
+
+
+def _parse_reset(value: Optional[str]) -> Optional[float]:
+    """Parse reset durations like '1s', '6m0s', '250ms' into seconds."""
+    if not value:
+        return None
+    try:
+        total, num = 0.0, ""
+        i = 0
+        while i < len(value):
+            ch = value[i]
+            if ch.isdigit() or ch == ".":
+                num += ch
+            elif value.startswith("ms", i):
+                total += float(num) / 1000.0
+                num, i = "", i + 1
+            elif ch in "hms":
+                total += float(num) * {"h": 3600, "m": 60, "s": 1}[ch]
+                num = ""
+            i += 1
+        return total + (float(num) if num else 0.0)
+    except ValueError:
+        return None
+
+
+class AdaptiveRateLimiter:
+    """Request + token buckets, adjusted from x-ratelimit-* response headers."""
+
+    def __init__(self, requests_per_min: float = DEFAULT_REQUESTS_PER_MIN,
+                 tokens_per_min: float = DEFAULT_TOKENS_PER_MIN):
+        self.requests = TokenBucket(requests_per_min)
+        self.tokens = TokenBucket(tokens_per_min)
+        self._pause_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, n_tokens: int):
+        wait = self._pause_until - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self.requests.acquire(1)
+        self.tokens.acquire(n_tokens)
+
+    def pause(self, seconds: float):
+        """Stop all workers for a while (429 / retry-after)."""
+        with self._lock:
+            self._pause_until = max(self._pause_until, time.monotonic() + seconds)
+
+    def update_from_headers(self, headers):
+        """Sync buckets with the server's view of remaining quota."""
+        try:
+            limit_req = headers.get("x-ratelimit-limit-requests")
+            limit_tok = headers.get("x-ratelimit-limit-tokens")
+            if limit_req:
+                self.requests.rate_per_min = self.requests.capacity = float(limit_req)
+            if limit_tok:
+                self.tokens.rate_per_min = self.tokens.capacity = float(limit_tok)
+
+            remaining_req = headers.get("x-ratelimit-remaining-requests")
+            remaining_tok = headers.get("x-ratelimit-remaining-tokens")
+            if remaining_req is not None:
+                self.requests.drain(float(remaining_req))
+            if remaining_tok is not None:
+                self.tokens.drain(float(remaining_tok))
+
+            if remaining_tok is not None and float(remaining_tok) <= 0:
+                reset = _parse_reset(headers.get("x-ratelimit-reset-tokens"))
+                if reset:
+                    self.pause(reset)
+        except (TypeError, ValueError):
+            pass
+
+
+# =============================================================================
+# CHECKPOINT
+# =============================================================================
+
+class EmbeddingCheckpoint:
+    """SQLite store of document embeddings keyed by content hash."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS doc_embeddings ("
+            " hash TEXT PRIMARY KEY,"
+            " model TEXT NOT NULL,"
+            " dim INTEGER NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def get_many(self, hashes: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        with self._lock:
+            for i in range(0, len(hashes), 500):
+                chunk = hashes[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._db.execute(
+                    f"SELECT hash, vector FROM doc_embeddings WHERE hash IN ({placeholders})", chunk
+                ).fetchall()
+                for h, blob in rows:
+                    found[h] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, items: List[tuple], model: str):
+        """items: [(hash, vector)] - committed together (one batch)."""
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO doc_embeddings (hash, model, dim, vector, created_at) VALUES (?, ?, ?, ?, ?)",
+                [(h, model, int(v.shape[0]), np.asarray(v, dtype=np.float32).tobytes(), now) for h, v in items],
+            )
+            self._db.commit()
+
+    def prune(self, keep_hashes: List[str]) -> int:
+        """Drop embeddings no current document uses. Returns rows removed."""
+        with self._lock:
+            self._db.execute("CREATE TEMP TABLE IF NOT EXISTS keep (hash TEXT PRIMARY KEY)")
+            self._db.execute("DELETE FROM keep")
+            self._db.executemany("INSERT OR IGNORE INTO keep (hash) VALUES (?)", [(h,) for h in keep_hashes])
+            cur = self._db.execute("DELETE FROM doc_embeddings WHERE hash NOT IN (SELECT hash FROM keep)")
+            self._db.commit()
+            return cur.rowcount
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+# =============================================================================
+# PIPELINE
+# =============================================================================
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """retry-after seconds from an API error, if the server sent one."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        value = headers.get("retry-after")
+        return float(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_rate_limit(error: Exception) -> bool:
+    return getattr(error, "status_code", None) == 429 or type(error).__name__ == "RateLimitError"
+
+
+def _embed_with_retries(
+    embedder: BaseEmbeddingProvider,
+    texts: List[str],
+    limiter: Optional[AdaptiveRateLimiter],
+    max_retries: int,
+) -> np.ndarray:
+    """One batch, with exponential backoff + full jitter."""
+    for attempt in range(max_retries + 1):
+        if limiter is not None:
+            limiter.acquire(estimate_tokens(texts))
+        try:
+            vectors = embedder.embed_documents(texts, batch_size=len(texts))
+            if len(vectors) != len(texts):
+                raise ValueError(f"Expected {len(texts)} embeddings, got {len(vectors)}")
+            return vectors
+        except Exception as e:
+            if attempt == max_retries:
+                raise
+            delay = random.uniform(0, min(60.0, 2 ** attempt))
+            retry_after = _retry_after(e)
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            if limiter is not None and _is_rate_limit(e):
+                limiter.pause(delay)
+            logger.warning(f"⚠️ Embedding batch failed ({e}), retry {attempt + 1}/{max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def embed_documents_resumable(
+    embedder: BaseEmbeddingProvider,
+    texts: List[str],
+    checkpoint_path: Optional[str] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: Optional[int] = None,
+    requests_per_min: float = DEFAULT_REQUESTS_PER_MIN,
+    tokens_per_min: float = DEFAULT_TOKENS_PER_MIN,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    prune: bool = False,
+) -> np.ndarray:
+    """
+    Embed texts, reusing checkpointed vectors for unchanged documents.
+
+    Args:
+        embedder: Provider that built (or will build) the index
+        texts: Documents to embed
+        checkpoint_path: SQLite checkpoint file (None = no resume/reuse)
+        workers: Concurrent batches (default 4 for API providers, 1 for local CPU)
+        prune: Remove checkpoint rows no longer used by any document
+
+    Returns:
+        float32 array (len(texts), dim)
+
+    Raises:
+        EmbeddingBuildError if any batch still fails after retries
+        (finished batches stay in the checkpoint for the next run)
+    """
+    total = len(texts)
+    hashes = [document_hash(t, embedder.model) for t in texts]
+    checkpoint = EmbeddingCheckpoint(checkpoint_path) if checkpoint_path else None
+
+    vectors: Dict[str, np.ndarray] = checkpoint.get_many(list(set(hashes))) if checkpoint else {}
+
+    # Unique documents still to embed (duplicates share one hash)
+    todo: Dict[str, str] = {}
+    for h, text in zip(hashes, texts):
+        if h not in vectors and h not in todo:
+            todo[h] = text
+
+    print(f"\n🔄 Embedding {total} documents with {embedder.name} ({embedder.model})")
+    print(f"   ♻️  Reused from checkpoint: {total - sum(1 for h in hashes if h in todo)}")
+    print(f"   🆕 To embed: {len(todo)}")
+
+    if workers is None:
+        workers = DEFAULT_WORKERS if embedder.name == "openai" else 1
+
+    limiter = None
+    if embedder.name == "openai":
+        limiter = AdaptiveRateLimiter(requests_per_min, tokens_per_min)
+        embedder.on_response_headers = limiter.update_from_headers
+
+    pending = list(todo.items())
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    done = 0
+    failed = 0
+    last_error: Optional[Exception] = None
+    start_time = time.time()
+
+    def run_batch(batch):
+        vecs = _embed_with_retries(embedder, [t for _, t in batch], limiter, max_retries)
+        items = [(h, v) for (h, _), v in zip(batch, vecs)]
+        if checkpoint:
+            checkpoint.put_many(items, embedder.model)
+        return items
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {pool.submit(run_batch, b): b for b in batches}
+            for future in as_completed(futures):
+                batch = futures[future]
+                try:
+                    for h, v in future.result():
+                        vectors[h] = v
+                    done += len(batch)
+                except Exception as e:
+                    failed += len(batch)
+                    last_error = e
+                    logger.error(f"❌ Batch of {len(batch)} failed: {e}")
+
+                elapsed = time.time() - start_time
+                rate = done / elapsed if elapsed > 0 else 0
+                eta = (len(pending) - done - failed) / rate if rate > 0 else 0
+                print(f"   Progress: {done + failed}/{len(pending)} - ETA: {eta:.0f}s")
+    finally:
+        if limiter is not None:
+            embedder.on_response_headers = None
+
+    if failed:
+        if checkpoint:
+            checkpoint.close()
+        raise EmbeddingBuildError(failed, len(pending), last_error)
+
+    if checkpoint:
+        if prune:
+            removed = checkpoint.prune(hashes)
+            if removed:
+                print(f"   🧹 Pruned {removed} stale checkpoint rows")
+        checkpoint.close()
+
+    print(f"   ✅ Embedded {len(pending)} new documents in {time.time() - start_time:.1f}s")
+
+    dim = embedder.dim
+    return np.vstack([vectors[h] for h in hashes]).astype(np.float32) if total else np.zeros((0, dim), np.float32)
@@ -0,0 +1,211 @@
+"""
+Embedding Provider - Pluggable Text Embedding Backends
+======================================================
+FILE: backend/services/embedding_provider.py
+
+Supports: OpenAI embeddings API, local sentence-transformers (CPU)
+Switch providers with EMBEDDING_PROVIDER in .env ("openai" or "local").
+
+The index builder records which provider/model produced the vectors,
+and VectorService embeds queries with the same one. A local model
+makes semantic search work fully offline.
+
+USAGE:
+    from services.embedding_provider import get_embedding_provider
+
+    embedder = get_embedding_provider("local")
+    vectors = embedder.embed_documents(texts)   # (n, dim), L2-normalised
+    query = embedder.embed_query("best large cap fund")
+"""
+
+import os
+import logging
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+OPENAI_EMBEDDING_MODEL = "text-embedding-ada-002"
+# Output width per OpenAI model; other models are measured with one probe call
+OPENAI_EMBEDDING_DIMS = {
+    "text-embedding-ada-002": 1536,
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+}
+LOCAL_EMBEDDING_MODEL = os.environ.get("LOCAL_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+
+# "onnx" uses onnxruntime (quantised weights when LOCAL_EMBEDDING_ONNX_FILE is set),
+# "torch" uses the plain PyTorch model. ONNX falls back to torch if unavailable.
+LOCAL_EMBEDDING_BACKEND = os.environ.get("LOCAL_EMBEDDING_BACKEND", "onnx")
+LOCAL_EMBEDDING_ONNX_FILE = os.environ.get("LOCAL_EMBEDDING_ONNX_FILE", "")
+
+MAX_INPUT_CHARS = 8000
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalise each row so inner product == cosine similarity."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+# =============================================================================
+# BASE CLASS
+# =============================================================================
+
+class BaseEmbeddingProvider(ABC):
+    """Abstract base class for embedding providers."""
+
+    name: str = ""
+    model: str = ""
+    dim: int = 0
+
+    # Optional callback(headers) for API providers, used by build-time rate limiting
+    on_response_headers = None
+
+    @abstractmethod
+    def embed_documents(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """Embed many texts. Returns float32 array (len(texts), dim), L2-normalised."""
+        pass
+
+    def embed_query(self, text: str) -> np.ndarray:
+        """Embed a single query. Returns float32 vector (dim,), L2-normalised."""
+        return self.embed_documents([text], batch_size=1)[0]
+
+    def describe(self) -> dict:
+        """Provider details stored alongside a built index."""
+        return {"provider": self.name, "model": self.model, "dim": self.dim}
+
+
+# =============================================================================
+# OPENAI PROVIDER
+# =============================================================================
+
+class OpenAIEmbeddingProvider(BaseEmbeddingProvider):
+    """
+    OpenAI embeddings API (network call per batch). Uses the process-wide
+    client registry: shared keep-alive pool, concurrency limit and
+    circuit breaker, like every other OpenAI call in the backend.
+    """
+
+    name = "openai"
+
+    def __init__(self, model: str = OPENAI_EMBEDDING_MODEL, client=None):
+        from services.llm_clients import get_llm_clients
+
+        self.clients = get_llm_clients()
+        if client is None:
+            try:
+                client = self.clients.openai_sync()
+            except ImportError:
+                raise ImportError("Install openai: pip install openai")
+
+        self.client = client
+        self.model = model
+        self.dim = OPENAI_EMBEDDING_DIMS.get(model) or len(self.embed_query("dimension probe"))
+        logger.info(f"✅ OpenAI embeddings ready: {model} (dim={self.dim})")
+
+    def embed_documents(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        vectors = []
+        for i in range(0, len(texts), batch_size):
+            batch = [t[:MAX_INPUT_CHARS] for t in texts[i:i + batch_size]]
+            with self.clients.limit_sync("openai"):
+                if self.on_response_headers is not None:
+                    raw = self.client.embeddings.with_raw_response.create(model=self.model, input=batch)
+                    self.on_response_headers(raw.headers)
+                    response = raw.parse()
+                else:
+                    response = self.client.embeddings.create(model=self.model, input=batch)
+            vectors.extend(item.embedding for item in response.data)
+        return _normalize_rows(np.array(vectors, dtype=np.float32))
+
+
+# =============================================================================
+# LOCAL PROVIDER
+# =============================================================================
+
+class LocalEmbeddingProvider(BaseEmbeddingProvider):
+    """
+    Local CPU embeddings via sentence-transformers.
+    Tries the ONNX runtime backend first (optionally a quantised file),
+    then falls back to the PyTorch backend.
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        model: str = LOCAL_EMBEDDING_MODEL,
+        backend: str = LOCAL_EMBEDDING_BACKEND,
+        onnx_file: str = LOCAL_EMBEDDING_ONNX_FILE,
+    ):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ImportError("Install sentence-transformers: pip install sentence-transformers")
+
+        self.model = model
+        self.backend = "torch"
+        self._model = None
+
+        if backend == "onnx":
+            try:
+                model_kwargs = {"file_name": onnx_file} if onnx_file else None
+                self._model = SentenceTransformer(
+                    model, device="cpu", backend="onnx", model_kwargs=model_kwargs
+                )
+                self.backend = "onnx"
+            except Exception as e:
+                logger.warning(f"⚠️ ONNX backend unavailable ({e}), using torch")
+
+        if self._model is None:
+            self._model = SentenceTransformer(model, device="cpu")
+
+        self.dim = int(self._model.get_sentence_embedding_dimension())
+        logger.info(f"✅ Local embeddings ready: {model} ({self.backend}, dim={self.dim})")
+
+    def embed_documents(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        vectors = self._model.encode(
+            [t[:MAX_INPUT_CHARS] for t in texts],
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        return _normalize_rows(vectors)
+
+    def describe(self) -> dict:
+        info = super().describe()
+        info["backend"] = self.backend
+        return info
+
+
+# =============================================================================
+# FACTORY FUNCTION
+# =============================================================================
+
+def get_embedding_provider(provider: Optional[str] = None, model: Optional[str] = None) -> BaseEmbeddingProvider:
+    """
+    Get an embedding provider instance.
+
+    Args:
+        provider: "openai" or "local"
+                  If None, reads EMBEDDING_PROVIDER from .env (default "openai")
+        model: Optional model override
+
+    Returns:
+        Embedding provider ready to use
+    """
+    provider = (provider or os.getenv("EMBEDDING_PROVIDER", "openai")).lower().strip()
+
+    if provider in ("openai", "gpt"):
+        return OpenAIEmbeddingProvider(model=model or OPENAI_EMBEDDING_MODEL)
+    elif provider in ("local", "sentence-transformers", "st"):
+        return LocalEmbeddingProvider(model=model or LOCAL_EMBEDDING_MODEL)
+    else:
+        raise ValueError(f"Unknown embedding provider: {provider}. Use 'openai' or 'local'")
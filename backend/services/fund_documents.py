@@ -0,0 +1,78 @@
+"""
+Fund Documents - Searchable Text for Each Fund
+==============================================
+FILE: backend/services/fund_documents.py
+
+One place that turns a scheme_metrics_merged.json entry into the text
+that gets embedded (build_and_upload_index.py) and BM25-indexed
+(hybrid_retriever.py), so lexical and vector search see the same words.
+
+USAGE:
+    from services.fund_documents import build_fund_document, create_documents
+
+    text, meta = build_fund_document(fund_name, fund)
+    docs, metas = create_documents(funds_data)
+"""
+
+import zlib
+from typing import Dict, List, Tuple
+
+
+def doc_id_for(fund_code, fund_name: str) -> int:
+    """Stable int64 vector ID: the AMFI code when numeric, else a name hash."""
+    code = str(fund_code or "").strip()
+    if code.isdigit():
+        return int(code)
+    return (1 << 40) + zlib.crc32(fund_name.encode("utf-8"))
+
+
+def build_fund_document(fund_name: str, fund: Dict) -> Tuple[str, Dict]:
+    """Document text + metadata for one fund."""
+    # Extract metrics
+    metrics = fund.get("metrics", {})
+    metrics_text = []
+
+    if metrics.get("cagr"):
+        metrics_text.append(f"CAGR: {metrics['cagr']*100:.1f}%")
+    if metrics.get("rolling_3y"):
+        metrics_text.append(f"3Y Return: {metrics['rolling_3y']*100:.1f}%")
+    if metrics.get("sharpe"):
+        metrics_text.append(f"Sharpe: {metrics['sharpe']:.2f}")
+
+    # Build document
+    fund_code = fund.get("canonical_code", "")
+    category = fund.get("sub_category", fund.get("main_category", ""))
+    risk_level = fund.get("riskometer", "")
+    description = (fund.get("investment_objective") or "")[:150]
+
+    doc_text = f"Fund: {fund_name}. Category: {category}. Risk: {risk_level}. {description}. {', '.join(metrics_text)}"
+
+    meta = {
+        'id': doc_id_for(fund_code, fund_name),
+        'fund_code': str(fund_code),
+        'fund_name': fund.get("parent_scheme_name", fund_name),
+        'category': category,
+        'main_category': fund.get("main_category", ""),
+        'risk_level': risk_level,
+        'is_reliable': bool(metrics.get("is_statistically_reliable", False))
+    }
+    return doc_text, meta
+
+
+def create_documents(funds_data: Dict) -> Tuple[List[str], List[Dict]]:
+    """Create document texts and metadata from fund data."""
+    print(f"\n📝 Creating documents...")
+
+    docs = []
+    metas = []
+
+    for fund_name, fund in funds_data.items():
+        try:
+            doc_text, meta = build_fund_document(fund_name, fund)
+            docs.append(doc_text)
+            metas.append(meta)
+        except Exception as e:
+            print(f"   ⚠️ Error processing {fund_name}: {e}")
+
+    print(f"   ✅ Created {len(docs)} documents")
+    return docs, metas
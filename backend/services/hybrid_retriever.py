@@ -0,0 +1,234 @@
+"""
+Hybrid Retriever - BM25 + Vector Search with Reciprocal-Rank Fusion
+===================================================================
+FILE: backend/services/hybrid_retriever.py
+
+Used by chat tool_search_funds:
+
+- Exact fund name / scheme code -> answered from a dict, no embedding call
+- BM25 over the same fund documents the vector index embeds
+  (services/fund_documents.py) -> precise on names, AMCs, categories
+- FAISS semantic results -> recall for vague queries
+- Reciprocal-rank fusion (RRF) merges both lists without score tuning,
+  and de-duplicates funds found by both
+- Category / risk filters applied to both legs
+- Per-query LRU cache
+
+USAGE:
+    retriever = HybridRetriever(FUNDS_BY_NAME)
+    funds = retriever.search("hdfc flexi cap", limit=5,
+                             categories=["Flexi Cap Fund"],
+                             semantic_fn=lambda q, n: [codes...])
+"""
+
+import math
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from cachetools import LRUCache
+
+from services.embedding_cache import normalize_query
+from services.fund_documents import build_fund_document
+
+RRF_K = 60
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+STOPWORDS = {
+    "a", "an", "the", "of", "and", "or", "for", "in", "on", "to", "with",
+    "me", "show", "give", "which", "what", "is", "are", "some", "any",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+def _name_key(text: str) -> str:
+    """Loose key for exact-name matching (case, punctuation, whitespace)."""
+    return " ".join(_TOKEN_RE.findall((text or "").lower()))
+
+
+class HybridRetriever:
+    """Lexical + semantic fund search over the in-memory fund catalog."""
+
+    def __init__(self, funds_by_name: Dict[str, Dict], cache_size: int = 1024):
+        self.fund_keys: List[str] = list(funds_by_name.keys())
+        self.funds: List[Dict] = [funds_by_name[k] for k in self.fund_keys]
+
+        self._exact: Dict[str, int] = {}
+        self._by_code: Dict[str, int] = {}
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._idf: Dict[str, float] = {}
+
+        self._categories = np.array([f.get("sub_category") or "" for f in self.funds], dtype=object)
+        self._main_categories = np.array([f.get("main_category") or "" for f in self.funds], dtype=object)
+        self._risks = np.array([(f.get("riskometer") or "").lower() for f in self.funds], dtype=object)
+
+        self._build()
+
+        self._cache = LRUCache(maxsize=cache_size)
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.exact_hits = 0
+
+    # -------------------------------------------------------------------------
+    # INDEX BUILD
+    # -------------------------------------------------------------------------
+
+    def _build(self):
+        doc_lengths = []
+
+        for i, (name, fund) in enumerate(zip(self.fund_keys, self.funds)):
+            for alias in (name, fund.get("parent_scheme_name")):
+                if alias:
+                    self._exact.setdefault(_name_key(alias), i)
+
+            codes = [fund.get("canonical_code")] + [v.get("amfi_code") for v in fund.get("variants", [])]
+            for code in codes:
+                if code:
+                    self._by_code.setdefault(str(code).strip(), i)
+
+            text, _ = build_fund_document(name, fund)
+            tokens = tokenize(text)
+            doc_lengths.append(len(tokens))
+
+            counts: Dict[str, int] = {}
+            for t in tokens:
+                counts[t] = counts.get(t, 0) + 1
+            for t, tf in counts.items():
+                self._postings.setdefault(t, []).append((i, tf))
+
+        self._doc_len = np.array(doc_lengths, dtype=np.float32)
+        self._avgdl = float(self._doc_len.mean()) if len(self._doc_len) else 1.0
+
+        n = len(self.funds)
+        for t, plist in self._postings.items():
+            df = len(plist)
+            self._idf[t] = math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    # -------------------------------------------------------------------------
+    # LEGS
+    # -------------------------------------------------------------------------
+
+    def _allowed_mask(self, categories: Optional[List[str]], risk_level: Optional[str]) -> Optional[np.ndarray]:
+        mask = None
+        if categories:
+            cats = list(categories)
+            mask = np.isin(self._categories, cats) | np.isin(self._main_categories, cats)
+        if risk_level:
+            risk_mask = self._risks == risk_level.strip().lower()
+            mask = risk_mask if mask is None else mask & risk_mask
+        return mask
+
+    def exact_match(self, query: str) -> Optional[int]:
+        """Fund index for an exact name or scheme code, else None."""
+        q = (query or "").strip()
+        if q in self._by_code:
+            return self._by_code[q]
+        return self._exact.get(_name_key(q))
+
+    def bm25(self, query: str, limit: int, mask: Optional[np.ndarray] = None) -> List[int]:
+        """Top fund indexes by BM25."""
+        scores = np.zeros(len(self.funds), dtype=np.float32)
+        for t in set(tokenize(query)):
+            idf = self._idf.get(t)
+            if idf is None:
+                continue
+            rows, tfs = zip(*self._postings[t])
+            rows = np.fromiter(rows, dtype=np.int64)
+            tfs = np.fromiter(tfs, dtype=np.float32)
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_len[rows] / self._avgdl)
+            scores[rows] += idf * tfs * (BM25_K1 + 1) / (tfs + norm)
+
+        if mask is not None:
+            scores[~mask] = 0
+        candidates = np.flatnonzero(scores > 0)
+        if not len(candidates):
+            return []
+        top = candidates[np.argsort(-scores[candidates], kind="stable")[:limit]]
+        return top.tolist()
+
+    def _semantic(self, query: str, limit: int, mask: Optional[np.ndarray],
+                  semantic_fn: Optional[Callable[[str, int], List[str]]]) -> List[int]:
+        if semantic_fn is None:
+            return []
+        rows = []
+        for code in semantic_fn(query, limit):
+            row = self._by_code.get(str(code).strip())
+            if row is not None and (mask is None or mask[row]) and row not in rows:
+                rows.append(row)
+        return rows
+
+    # -------------------------------------------------------------------------
+    # SEARCH
+    # -------------------------------------------------------------------------
+
+    def search(
+        self,
+        query: str,
+        limit: int = 5,
+        categories: Optional[List[str]] = None,
+        risk_level: Optional[str] = None,
+        semantic_fn: Optional[Callable[[str, int], List[str]]] = None,
+    ) -> List[Dict]:
+        """
+        Ranked fund dicts for a query.
+
+        Args:
+            semantic_fn: (query, n) -> fund codes from the vector index
+                         (already filtered); None = lexical only
+        """
+        key = (normalize_query(query), tuple(sorted(categories or [])), (risk_level or "").lower(), limit)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self.cache_hits += 1
+                return [self.funds[i] for i in cached]
+            self.cache_misses += 1
+
+        mask = self._allowed_mask(categories, risk_level)
+        depth = max(limit * 4, 20)
+
+        exact = self.exact_match(query)
+        if exact is not None and (mask is None or mask[exact]):
+            # Exact name/code: no embedding call, fill with lexical neighbours
+            self.exact_hits += 1
+            rows = [exact] + [r for r in self.bm25(query, limit + 1, mask) if r != exact]
+            rows = rows[:limit]
+            cacheable = True
+        else:
+            lexical = self.bm25(query, depth, mask)
+            semantic = self._semantic(query, depth, mask, semantic_fn)
+
+            fused: Dict[int, float] = {}
+            for ranking in (lexical, semantic):
+                for rank, row in enumerate(ranking):
+                    fused[row] = fused.get(row, 0.0) + 1.0 / (RRF_K + rank + 1)
+
+            rows = sorted(fused, key=lambda r: -fused[r])[:limit]
+            # Don't pin lexical-only results while the vector index is still loading
+            cacheable = bool(semantic) or semantic_fn is None
+
+        if cacheable:
+            with self._lock:
+                self._cache[key] = rows
+
+        return [self.funds[i] for i in rows]
+
+    def get_stats(self) -> Dict:
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "funds": len(self.funds),
+            "terms": len(self._postings),
+            "cache_entries": len(self._cache),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "exact_hits": self.exact_hits,
+            "hit_rate": round(self.cache_hits / lookups, 4) if lookups else 0.0,
+        }
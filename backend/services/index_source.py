@@ -0,0 +1,362 @@
+"""
+Index Source - Where the Vector Index Comes From
+================================================
+FILE: backend/services/index_source.py
+
+VectorService used to download index.faiss + metadata from GCS into /tmp
+on every cold start. Now it resolves a ready-to-open directory from a
+chain of sources, cheapest first:
+
+1. Local directory   FAISS_DIR (dev builds, mounted volumes)
+2. Bundled           baked into the container image (BUNDLED_INDEX_DIR)
+3. Cache             content-addressed copy of a previous remote fetch
+4. Remote (optional) GCS bucket, or a plain directory stand-in for tests
+
+Every build writes manifest.json (version + sha256/size per file).
+Remote files are stored in the cache under their sha256 and verified on
+download, so a new version only fetches the files that changed and an
+instance reuses whatever it already has.
+
+USAGE:
+    from services.index_source import resolve_index_dir, get_remote_source
+
+    index_dir, source = resolve_index_dir(local_dirs=[FAISS_DIR, BUNDLED_DIR],
+                                          cache_dir=CACHE_DIR, remote=None)
+    if index_dir is None:
+        index_dir, source = resolve_index_dir([], CACHE_DIR, get_remote_source())
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+from services.metadata_store import STORE_FILES
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+INDEX_FILE = "index.faiss"
+LEGACY_META_FILE = "metadata.json"
+INDEX_FILES = [INDEX_FILE] + STORE_FILES
+
+CURRENT_POINTER = "CURRENT"
+
+
+def sha256_file(path: str, chunk_size: int = 1 << 20) -> str:
+    """Hex sha256 of a file, streamed."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def write_manifest(directory: str, files: List[str], extra: Optional[Dict] = None) -> str:
+    """
+    Write manifest.json describing files in directory.
+    The version is derived from the file hashes, so identical builds share it.
+    """
+    entries = {}
+    for path in files:
+        name = os.path.basename(path)
+        entries[name] = {"sha256": sha256_file(path), "size": os.path.getsize(path)}
+
+    digest = hashlib.sha256(json.dumps(entries, sort_keys=True).encode("utf-8")).hexdigest()
+    manifest = {
+        "version": digest[:16],
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "files": entries,
+    }
+    if extra:
+        manifest.update(extra)
+
+    manifest_path = os.path.join(directory, MANIFEST_FILE)
+    with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    return manifest_path
+
+
+def read_manifest(directory: str) -> Optional[Dict]:
+    path = os.path.join(directory, MANIFEST_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_complete_index_dir(directory: str, verify_checksums: bool = False) -> bool:
+    """
+    True if directory holds an openable index.
+    With a manifest, file sizes (and optionally checksums) must match it;
+    without one (dev or legacy builds), the files only need to exist.
+    """
+    if not directory or not os.path.isdir(directory):
+        return False
+
+    manifest = read_manifest(directory)
+    if manifest is None:
+        has_meta = all(os.path.exists(os.path.join(directory, n)) for n in STORE_FILES) \
+            or os.path.exists(os.path.join(directory, LEGACY_META_FILE))
+        return os.path.exists(os.path.join(directory, INDEX_FILE)) and has_meta
+
+    for name, info in manifest.get("files", {}).items():
+        path = os.path.join(directory, name)
+        if not os.path.exists(path) or os.path.getsize(path) != info.get("size"):
+            return False
+        if verify_checksums and sha256_file(path) != info.get("sha256"):
+            logger.warning(f"⚠️ Checksum mismatch: {path}")
+            return False
+    return True
+
+
+# =============================================================================
+# REMOTE SOURCES
+# =============================================================================
+
+class BaseRemoteSource(ABC):
+    """A place the index can be fetched from (optional fallback)."""
+
+    name: str = ""
+
+    @abstractmethod
+    def fetch_manifest(self) -> Optional[Dict]:
+        """Return the remote manifest, or None if unavailable."""
+        pass
+
+    @abstractmethod
+    def fetch_file(self, name: str, dest_path: str):
+        """Copy one remote file to dest_path."""
+        pass
+
+    def has_legacy_files(self) -> bool:
+        """True if the remote only has a pre-manifest index.faiss + metadata.json."""
+        return False
+
+
+class DirectoryRemoteSource(BaseRemoteSource):
+    """A plain directory treated as a remote - local stand-in for tests and NFS mounts."""
+
+    name = "directory"
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def fetch_manifest(self) -> Optional[Dict]:
+        return read_manifest(self.path)
+
+    def fetch_file(self, name: str, dest_path: str):
+        shutil.copyfile(os.path.join(self.path, name), dest_path)
+
+    def has_legacy_files(self) -> bool:
+        return all(os.path.exists(os.path.join(self.path, n)) for n in (INDEX_FILE, LEGACY_META_FILE))
+
+
+class GCSRemoteSource(BaseRemoteSource):
+    """Google Cloud Storage bucket (gs://bucket/prefix)."""
+
+    name = "gcs"
+
+    def __init__(self, bucket: str, prefix: str = "faiss_index"):
+        from google.cloud import storage
+
+        self.bucket_name = bucket
+        self.prefix = prefix.strip("/")
+        self._bucket = storage.Client().bucket(bucket)
+
+    def _blob(self, name: str):
+        return self._bucket.blob(f"{self.prefix}/{name}")
+
+    def fetch_manifest(self) -> Optional[Dict]:
+        blob = self._blob(MANIFEST_FILE)
+        if not blob.exists():
+            return None
+        return json.loads(blob.download_as_bytes())
+
+    def fetch_file(self, name: str, dest_path: str):
+        self._blob(name).download_to_filename(dest_path)
+
+    def has_legacy_files(self) -> bool:
+        return all(self._blob(n).exists() for n in (INDEX_FILE, LEGACY_META_FILE))
+
+
+def get_remote_source(url: Optional[str] = None) -> Optional[BaseRemoteSource]:
+    """
+    Build the remote source from a URL.
+
+    Args:
+        url: "gs://bucket/prefix" or "file:///path" (or a bare path).
+             If None, reads INDEX_REMOTE_URL, then falls back to GCS_BUCKET.
+
+    Returns:
+        Remote source, or None if no remote is configured/available
+    """
+    url = url if url is not None else os.environ.get("INDEX_REMOTE_URL", "")
+    if not url and os.environ.get("GCS_BUCKET"):
+        url = f"gs://{os.environ['GCS_BUCKET']}/faiss_index"
+    if not url:
+        return None
+
+    if url.startswith("gs://"):
+        bucket, _, prefix = url[len("gs://"):].partition("/")
+        try:
+            return GCSRemoteSource(bucket, prefix or "faiss_index")
+        except ImportError:
+            logger.warning("google-cloud-storage not installed - remote index disabled")
+        except Exception as e:
+            logger.warning(f"⚠️ GCS source unavailable: {e}")
+        return None
+
+    path = url[len("file://"):] if url.startswith("file://") else url
+    return DirectoryRemoteSource(path)
+
+
+# =============================================================================
+# CONTENT-ADDRESSED CACHE
+# =============================================================================
+
+class IndexCache:
+    """
+    Cache layout:
+        <root>/objects/<sha256>         verified file contents
+        <root>/versions/<version>/...   hard links (or copies) named per manifest
+        <root>/CURRENT                  last successfully materialised version
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.versions_dir = os.path.join(root, "versions")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.versions_dir, exist_ok=True)
+
+    def version_dir(self, version: str) -> str:
+        return os.path.join(self.versions_dir, version)
+
+    def current_dir(self) -> Optional[str]:
+        """Directory of the last good version, if still complete."""
+        try:
+            with open(os.path.join(self.root, CURRENT_POINTER), "r") as f:
+                version = f.read().strip()
+        except OSError:
+            return None
+        path = self.version_dir(version)
+        return path if is_complete_index_dir(path) else None
+
+    def _set_current(self, version: str):
+        pointer = os.path.join(self.root, CURRENT_POINTER)
+        with open(pointer + ".tmp", "w") as f:
+            f.write(version)
+        os.replace(pointer + ".tmp", pointer)
+
+    def _fetch_object(self, remote: BaseRemoteSource, name: str, sha: str) -> str:
+        """Fetch one file into objects/<sha>, verifying its checksum."""
+        obj_path = os.path.join(self.objects_dir, sha)
+        if os.path.exists(obj_path):
+            return obj_path
+
+        part = f"{obj_path}.{os.getpid()}.part"
+        remote.fetch_file(name, part)
+        actual = sha256_file(part)
+        if actual != sha:
+            os.remove(part)
+            raise ValueError(f"Checksum mismatch for {name}: expected {sha[:12]}, got {actual[:12]}")
+        os.replace(part, obj_path)
+        logger.info(f"   ✅ Fetched: {name} ({os.path.getsize(obj_path) / 1024 / 1024:.1f} MB)")
+        return obj_path
+
+    def materialise(self, remote: BaseRemoteSource, manifest: Dict) -> str:
+        """Make versions/<version> complete, fetching only objects not cached yet."""
+        version = manifest["version"]
+        target = self.version_dir(version)
+        if is_complete_index_dir(target):
+            self._set_current(version)
+            return target
+
+        staging = f"{target}.{os.getpid()}.staging"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+
+        for name, info in manifest.get("files", {}).items():
+            obj_path = self._fetch_object(remote, name, info["sha256"])
+            dest = os.path.join(staging, name)
+            try:
+                os.link(obj_path, dest)
+            except OSError:
+                shutil.copyfile(obj_path, dest)
+
+        with open(os.path.join(staging, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        try:
+            os.replace(staging, target)
+        except OSError:
+            # Another worker materialised the same version first
+            shutil.rmtree(staging, ignore_errors=True)
+
+        self._set_current(version)
+        return target
+
+    def materialise_legacy(self, remote: BaseRemoteSource) -> str:
+        """Fetch a pre-manifest remote index (no checksums available)."""
+        target = self.version_dir("legacy")
+        os.makedirs(target, exist_ok=True)
+        for name in (INDEX_FILE, LEGACY_META_FILE):
+            dest = os.path.join(target, name)
+            remote.fetch_file(name, dest + ".part")
+            os.replace(dest + ".part", dest)
+        self._set_current("legacy")
+        return target
+
+
+# =============================================================================
+# RESOLUTION
+# =============================================================================
+
+def resolve_index_dir(
+    local_dirs: List[Tuple[str, str]],
+    cache_dir: Optional[str],
+    remote: Optional[BaseRemoteSource] = None,
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Find a directory with a complete index, cheapest source first.
+
+    Args:
+        local_dirs: [(source_name, path)] checked in order, opened in place
+        cache_dir: content-addressed cache root (None disables the cache)
+        remote: optional remote; only contacted if nothing local is usable
+
+    Returns:
+        (directory, source_name) or (None, None)
+    """
+    for name, path in local_dirs:
+        if is_complete_index_dir(path):
+            return path, name
+
+    cache = IndexCache(cache_dir) if cache_dir else None
+
+    if remote is not None and cache is not None:
+        try:
+            manifest = remote.fetch_manifest()
+            if manifest is not None:
+                logger.info(f"📥 Syncing index {manifest['version']} from {remote.name}...")
+                return cache.materialise(remote, manifest), remote.name
+            if remote.has_legacy_files():
+                logger.info(f"📥 Fetching legacy index from {remote.name}...")
+                return cache.materialise_legacy(remote), remote.name
+            logger.warning(f"⚠️ No index found at {remote.name} source")
+        except Exception as e:
+            logger.error(f"Remote index fetch error: {e}")
+
+    if cache is not None:
+        current = cache.current_dir()
+        if current:
+            return current, "cache"
+
+    return None, None
@@ -0,0 +1,338 @@
+"""
+LLM Clients - Process-Wide Client Registry
+==========================================
+FILE: backend/services/llm_clients.py
+
+One place that owns LLM SDK clients for the whole backend (chat router,
+portfolio vibe check, llm_service providers, OpenAI embeddings):
+
+- Clients built once per process and reused: one shared httpx connection
+  pool (keep-alive) per mode, so calls skip DNS + TLS setup after the first
+- Async clients for the FastAPI handlers, sync clients for legacy callers
+- Per-provider concurrency limit (LLM_MAX_CONCURRENCY)
+- Per-provider circuit breaker: after LLM_BREAKER_FAILURES consecutive
+  failures the provider is skipped for LLM_BREAKER_RESET seconds, then one
+  trial call decides whether it closes again
+
+USAGE:
+    from services.llm_clients import get_llm_clients
+
+    clients = get_llm_clients()
+    client = clients.openai_async()
+    async with clients.limit("openai"):
+        response = await client.chat.completions.create(...)
+
+    # Sync callers
+    with clients.limit_sync("anthropic"):
+        clients.anthropic().messages.create(...)
+"""
+
+import os
+import time
+import asyncio
+import threading
+import logging
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+LLM_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", "60"))
+LLM_CONNECT_TIMEOUT = float(os.environ.get("LLM_CONNECT_TIMEOUT", "10"))
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "2"))
+LLM_MAX_CONNECTIONS = int(os.environ.get("LLM_MAX_CONNECTIONS", "50"))
+LLM_KEEPALIVE_CONNECTIONS = int(os.environ.get("LLM_KEEPALIVE_CONNECTIONS", "20"))
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "16"))
+LLM_BREAKER_FAILURES = int(os.environ.get("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET = float(os.environ.get("LLM_BREAKER_RESET", "30"))
+
+PROVIDER_KEYS = {
+    "openai": "OPENAI_API_KEY",
+    "anthropic": "ANTHROPIC_API_KEY",
+    "gemini": "GOOGLE_API_KEY",
+}
+
+
+class CircuitOpenError(RuntimeError):
+    """Provider skipped because its circuit breaker is open."""
+
+
+def is_provider_failure(exc: BaseException) -> bool:
+    """Timeouts, connection errors, 429 and 5xx count against the breaker; bad requests don't."""
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    name = type(exc).__name__
+    return "Timeout" in name or "Connection" in name or isinstance(exc, (TimeoutError, ConnectionError))
+
+
+# =============================================================================
+# CIRCUIT BREAKER
+# =============================================================================
+
+class CircuitBreaker:
+    """closed -> open after N consecutive failures -> half-open after reset_seconds."""
+
+    def __init__(self, name: str, failure_threshold: int = LLM_BREAKER_FAILURES,
+                 reset_seconds: float = LLM_BREAKER_RESET):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info(f"✅ {self.name} circuit closed")
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            reopen = self.trial_in_flight
+            self.trial_in_flight = False
+            if reopen or self.failures >= self.failure_threshold:
+                if self.opened_at is None or reopen:
+                    logger.warning(f"⚡ {self.name} circuit open for {self.reset_seconds:.0f}s "
+                                   f"after {self.failures} failures")
+                self.opened_at = time.monotonic()
+
+    def release_trial(self):
+        """Call abandoned (cancelled) without an outcome."""
+        with self._lock:
+            self.trial_in_flight = False
+
+    def check(self):
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} is unavailable (circuit open), retry later")
+
+    def get_stats(self) -> Dict:
+        return {"state": self.state, "consecutive_failures": self.failures, "rejected": self.rejected}
+
+
+# =============================================================================
+# REGISTRY
+# =============================================================================
+
+class LLMClientRegistry:
+    """Lazily built, shared SDK clients + per-provider limits and breakers."""
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY):
+        self.max_concurrency = max_concurrency
+        self._clients: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self._http = None
+        self._async_http = None
+        self.breakers = {name: CircuitBreaker(name) for name in PROVIDER_KEYS}
+        self._sync_slots = {name: threading.BoundedSemaphore(max_concurrency) for name in PROVIDER_KEYS}
+        self._async_slots: Dict[str, asyncio.Semaphore] = {}
+        self.calls = {name: 0 for name in PROVIDER_KEYS}
+
+    # -------------------------------------------------------------------------
+    # HTTP POOLS
+    # -------------------------------------------------------------------------
+
+    def _timeout(self):
+        import httpx
+        return httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+
+    def _limits(self):
+        import httpx
+        return httpx.Limits(max_connections=LLM_MAX_CONNECTIONS,
+                            max_keepalive_connections=LLM_KEEPALIVE_CONNECTIONS)
+
+    def http_client(self):
+        """Shared sync keep-alive pool."""
+        if self._http is None:
+            import httpx
+            self._http = httpx.Client(timeout=self._timeout(), limits=self._limits())
+        return self._http
+
+    def async_http_client(self):
+        """Shared async keep-alive pool."""
+        if self._async_http is None:
+            import httpx
+            self._async_http = httpx.AsyncClient(timeout=self._timeout(), limits=self._limits())
+        return self._async_http
+
+    # -------------------------------------------------------------------------
+    # SDK CLIENTS
+    # -------------------------------------------------------------------------
+
+    def _get_or_create(self, key: str, factory):
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    client = factory()
+                    self._clients[key] = client
+        return client
+
+    @staticmethod
+    def _api_key(provider: str) -> str:
+        env = PROVIDER_KEYS[provider]
+        api_key = os.getenv(env)
+        if not api_key:
+            raise ValueError(f"{env} not found in environment")
+        return api_key
+
+    def available(self, provider: str) -> bool:
+        return bool(os.getenv(PROVIDER_KEYS[provider]))
+
+    def openai_async(self):
+        def factory():
+            from openai import AsyncOpenAI
+            client = AsyncOpenAI(api_key=self._api_key("openai"), timeout=self._timeout(),
+                                 max_retries=LLM_MAX_RETRIES, http_client=self.async_http_client())
+            print(f"✅ Async OpenAI client ready (pooled)")
+            return client
+        return self._get_or_create("openai_async", factory)
+
+    def openai_sync(self):
+        def factory():
+            from openai import OpenAI
+            client = OpenAI(api_key=self._api_key("openai"), timeout=self._timeout(),
+                            max_retries=LLM_MAX_RETRIES, http_client=self.http_client())
+            print(f"✅ OpenAI client ready (pooled)")
+            return client
+        return self._get_or_create("openai_sync", factory)
+
+    def anthropic(self):
+        def factory():
+            try:
+                from anthropic import Anthropic
+            except ImportError:
+                raise ImportError("Install anthropic: pip install anthropic")
+            client = Anthropic(api_key=self._api_key("anthropic"), timeout=self._timeout(),
+                               max_retries=LLM_MAX_RETRIES, http_client=self.http_client())
+            print(f"✅ Anthropic client ready (pooled)")
+            return client
+        return self._get_or_create("anthropic", factory)
+
+    def gemini(self, model: str):
+        def factory():
+            try:
+                import google.generativeai as genai
+            except ImportError:
+                raise ImportError("Install google-generativeai: pip install google-generativeai")
+            genai.configure(api_key=self._api_key("gemini"))
+            return genai.GenerativeModel(model)
+        return self._get_or_create(f"gemini:{model}", factory)
+
+    # -------------------------------------------------------------------------
+    # LIMITS + BREAKERS
+    # -------------------------------------------------------------------------
+
+    def _async_slot(self, provider: str) -> asyncio.Semaphore:
+        slot = self._async_slots.get(provider)
+        if slot is None:
+            slot = self._async_slots.setdefault(provider, asyncio.Semaphore(self.max_concurrency))
+        return slot
+
+    @asynccontextmanager
+    async def limit(self, provider: str):
+        """Concurrency slot + breaker around one async provider call."""
+        breaker = self.breakers[provider]
+        breaker.check()
+        async with self._async_slot(provider):
+            self.calls[provider] += 1
+            try:
+                yield
+            except Exception as e:
+                if is_provider_failure(e):
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                raise
+            except BaseException:
+                breaker.release_trial()
+                raise
+            breaker.record_success()
+
+    @contextmanager
+    def limit_sync(self, provider: str):
+        """Concurrency slot + breaker around one sync provider call."""
+        breaker = self.breakers[provider]
+        breaker.check()
+        with self._sync_slots[provider]:
+            self.calls[provider] += 1
+            try:
+                yield
+            except Exception as e:
+                if is_provider_failure(e):
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                raise
+            except BaseException:
+                breaker.release_trial()
+                raise
+            breaker.record_success()
+
+    def get_stats(self) -> Dict:
+        return {
+            "clients": sorted(self._clients),
+            "max_concurrency": self.max_concurrency,
+            "providers": {
+                name: {"calls": self.calls[name], **self.breakers[name].get_stats()}
+                for name in PROVIDER_KEYS
+            },
+        }
+
+    async def aclose(self):
+        if self._async_http is not None:
+            await self._async_http.aclose()
+            self._async_http = None
+        if self._http is not None:
+            self._http.close()
+            self._http = None
+        self._clients.clear()
+
+
+# =============================================================================
+# SINGLETON
+# =============================================================================
+_registry: Optional[LLMClientRegistry] = None
+_lock = threading.Lock()
+
+
+def get_llm_clients() -> LLMClientRegistry:
+    """Get or create the process-wide LLM client registry."""
+    global _registry
+
+    if _registry is None:
+        with _lock:
+            if _registry is None:
+                _registry = LLMClientRegistry()
+
+    return _registry
@@ -6,18 +6,26 @@ FILE: backend/services/llm_service.py
 Supports: Claude (Anthropic), GPT (OpenAI), Gemini (Google)
 Switch providers by changing LLM_PROVIDER in .env file.
 
+Providers are cached per process and use the shared, pooled SDK clients
+from services/llm_clients.py (concurrency limits + circuit breakers).
+
 USAGE:
     from services.llm_service import get_llm_provider
     
     llm = get_llm_provider()  # Uses LLM_PROVIDER from .env
     response = llm.generate("What is a mutual fund?")
+    response = await llm.agenerate("What is a mutual fund?")  # async handlers
 """
 
 import os
+import asyncio
+import threading
 from typing import Optional, List, Dict
 from abc import ABC, abstractmethod
 from dotenv import load_dotenv
 
+from services.llm_clients import get_llm_clients
+
 load_dotenv()
 
 
@@ -86,6 +94,15 @@ class BaseLLMProvider(ABC):
         """Generate a simple response."""
         pass
     
+    async def agenerate(
+        self, 
+        prompt: str, 
+        system_prompt: Optional[str] = None,
+        max_tokens: int = 2048
+    ) -> str:
+        """Async generate (default: sync call on a worker thread)."""
+        return await asyncio.to_thread(self.generate, prompt, system_prompt, max_tokens)
+    
     @abstractmethod
     def generate_with_context(
         self, 
@@ -119,19 +136,10 @@ class ClaudeProvider(BaseLLMProvider):
     """Anthropic Claude API integration."""
     
     def __init__(self, model: str = "claude-sonnet-4-20250514"):
-        try:
-            from anthropic import Anthropic
-            
-            api_key = os.getenv("ANTHROPIC_API_KEY")
-            if not api_key:
-                raise ValueError("ANTHROPIC_API_KEY not found in environment")
-            
-            self.client = Anthropic(api_key=api_key)
-            self.model = model
-            print(f"✅ Claude initialized: {model}")
-            
-        except ImportError:
-            raise ImportError("Install anthropic: pip install anthropic")
+        self.clients = get_llm_clients()
+        self.client = self.clients.anthropic()
+        self.model = model
+        print(f"✅ Claude initialized: {model}")
     
     def generate(
         self, 
@@ -139,12 +147,13 @@ class ClaudeProvider(BaseLLMProvider):
         system_prompt: Optional[str] = None,
         max_tokens: int = 2048
     ) -> str:
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=max_tokens,
-            system=system_prompt or "You are a helpful assistant.",
-            messages=[{"role": "user", "content": prompt}]
-        )
+        with self.clients.limit_sync("anthropic"):
+            response = self.client.messages.create(
+                model=self.model,
+                max_tokens=max_tokens,
+                system=system_prompt or "You are a helpful assistant.",
+                messages=[{"role": "user", "content": prompt}]
+            )
         return response.content[0].text
     
     def generate_with_context(
@@ -172,12 +181,13 @@ If the information doesn't contain the answer, say so honestly.
         messages = [{"role": m["role"], "content": m["content"]} for m in chat_history[-10:]]
         messages.append({"role": "user", "content": full_prompt})
         
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=2048,
-            system=system_prompt or MFBESTIE_SYSTEM_PROMPT,
-            messages=messages
-        )
+        with self.clients.limit_sync("anthropic"):
+            response = self.client.messages.create(
+                model=self.model,
+                max_tokens=2048,
+                system=system_prompt or MFBESTIE_SYSTEM_PROMPT,
+                messages=messages
+            )
         
         return response.content[0].text
 
@@ -191,13 +201,8 @@ class OpenAIProvider(BaseLLMProvider):
     
     def __init__(self, model: str = "gpt-4o"):
         try:
-            from openai import OpenAI
-            
-            api_key = os.getenv("OPENAI_API_KEY")
-            if not api_key:
-                raise ValueError("OPENAI_API_KEY not found in environment")
-            
-            self.client = OpenAI(api_key=api_key)
+            self.clients = get_llm_clients()
+            self.client = self.clients.openai_sync()
             self.model = model
             print(f"✅ OpenAI initialized: {model}")
             
@@ -210,14 +215,32 @@ class OpenAIProvider(BaseLLMProvider):
         system_prompt: Optional[str] = None,
         max_tokens: int = 2048
     ) -> str:
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": system_prompt or "You are a helpful assistant."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=max_tokens
-        )
+        with self.clients.limit_sync("openai"):
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": system_prompt or "You are a helpful assistant."},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=max_tokens
+            )
+        return response.choices[0].message.content
+    
+    async def agenerate(
+        self, 
+        prompt: str, 
+        system_prompt: Optional[str] = None,
+        max_tokens: int = 2048
+    ) -> str:
+        async with self.clients.limit("openai"):
+            response = await self.clients.openai_async().chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": system_prompt or "You are a helpful assistant."},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=max_tokens
+            )
         return response.choices[0].message.content
     
     def generate_with_context(
@@ -243,11 +266,12 @@ User Question: {prompt}
         messages.extend([{"role": m["role"], "content": m["content"]} for m in chat_history[-10:]])
         messages.append({"role": "user", "content": full_prompt})
         
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            max_tokens=2048
-        )
+        with self.clients.limit_sync("openai"):
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=2048
+            )
         
         return response.choices[0].message.content
 
@@ -260,20 +284,10 @@ class GeminiProvider(BaseLLMProvider):
     """Google Gemini API integration."""
     
     def __init__(self, model: str = "gemini-1.5-flash"):
-        try:
-            import google.generativeai as genai
-            
-            api_key = os.getenv("GOOGLE_API_KEY")
-            if not api_key:
-                raise ValueError("GOOGLE_API_KEY not found in environment")
-            
-            genai.configure(api_key=api_key)
-            self.model = genai.GenerativeModel(model)
-            self.model_name = model
-            print(f"✅ Gemini initialized: {model}")
-            
-        except ImportError:
-            raise ImportError("Install google-generativeai: pip install google-generativeai")
+        self.clients = get_llm_clients()
+        self.model = self.clients.gemini(model)
+        self.model_name = model
+        print(f"✅ Gemini initialized: {model}")
     
     def generate(
         self, 
@@ -282,10 +296,11 @@ class GeminiProvider(BaseLLMProvider):
         max_tokens: int = 2048
     ) -> str:
         full_prompt = f"{system_prompt}\n\nUser: {prompt}" if system_prompt else prompt
-        response = self.model.generate_content(
-            full_prompt,
-            generation_config={"max_output_tokens": max_tokens}
-        )
+        with self.clients.limit_sync("gemini"):
+            response = self.model.generate_content(
+                full_prompt,
+                generation_config={"max_output_tokens": max_tokens}
+            )
         return response.text
     
     def generate_with_context(
@@ -316,10 +331,11 @@ Mutual Fund Information:
 User: {prompt}
 """
         
-        response = self.model.generate_content(
-            full_prompt,
-            generation_config={"max_output_tokens": 2048}
-        )
+        with self.clients.limit_sync("gemini"):
+            response = self.model.generate_content(
+                full_prompt,
+                generation_config={"max_output_tokens": 2048}
+            )
         return response.text
 
 
@@ -327,9 +343,18 @@ User: {prompt}
 # FACTORY FUNCTION
 # =============================================================================
 
+_PROVIDER_CLASSES = {
+    "claude": ClaudeProvider, "anthropic": ClaudeProvider,
+    "openai": OpenAIProvider, "gpt": OpenAIProvider,
+    "gemini": GeminiProvider, "google": GeminiProvider,
+}
+_providers: Dict[type, BaseLLMProvider] = {}
+_providers_lock = threading.Lock()
+
+
 def get_llm_provider(provider: Optional[str] = None) -> BaseLLMProvider:
     """
-    Get an LLM provider instance.
+    Get the (process-cached) LLM provider instance.
     
     Args:
         provider: "claude", "openai", or "gemini"
@@ -341,16 +366,19 @@ def get_llm_provider(provider: Optional[str] = None) -> BaseLLMProvider:
     provider = provider or os.getenv("LLM_PROVIDER", "claude")
     provider = provider.lower().strip()
     
-    print(f"🤖 Initializing LLM: {provider}")
-    
-    if provider in ("claude", "anthropic"):
-        return ClaudeProvider()
-    elif provider in ("openai", "gpt"):
-        return OpenAIProvider()
-    elif provider in ("gemini", "google"):
-        return GeminiProvider()
-    else:
+    provider_class = _PROVIDER_CLASSES.get(provider)
+    if provider_class is None:
         raise ValueError(f"Unknown provider: {provider}. Use 'claude', 'openai', or 'gemini'")
+    
+    instance = _providers.get(provider_class)
+    if instance is None:
+        with _providers_lock:
+            instance = _providers.get(provider_class)
+            if instance is None:
+                print(f"🤖 Initializing LLM: {provider}")
+                instance = provider_class()
+                _providers[provider_class] = instance
+    return instance
 
 
 # =============================================================================
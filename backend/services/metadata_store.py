@@ -0,0 +1,219 @@
+"""
+Metadata Store - Offset-Indexed Binary Metadata for the Vector Index
+====================================================================
+FILE: backend/services/metadata_store.py
+
+Replaces the single metadata.json (every document's full text parsed
+into RAM at startup) with three files next to index.faiss:
+
+- meta_header.json   small: embedding info, index type, filter vocabularies
+- meta_rows.npy      fixed-width row table: id, offset, length + filter codes
+- meta_records.bin   concatenated UTF-8 JSON records (content + metadata)
+
+The row table and records file are memory-mapped read-only, so opening
+the store takes milliseconds, only the rows in search results are
+decoded, and several workers share one page-cached copy.
+
+USAGE:
+    write_metadata_store(out_dir, ids, documents, metadata, header)
+
+    store = MetadataStore.open(out_dir)
+    row = store.row_for_id(fund_id)
+    record = store.get(row)              # {"content": ..., "fund_name": ...}
+    ids = store.ids_matching("risk_level", ["very high"])
+"""
+
+import os
+import json
+import mmap
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+HEADER_FILE = "meta_header.json"
+ROWS_FILE = "meta_rows.npy"
+RECORDS_FILE = "meta_records.bin"
+STORE_FILES = [HEADER_FILE, ROWS_FILE, RECORDS_FILE]
+
+FORMAT_VERSION = 1
+
+# Metadata fields encoded as small-int columns for filtering (lowercased)
+FILTER_FIELDS = ["category", "main_category", "risk_level"]
+
+ROW_DTYPE = np.dtype([
+    ("id", "<i8"),
+    ("offset", "<u8"),
+    ("length", "<u4"),
+    ("category", "<i2"),
+    ("main_category", "<i2"),
+    ("risk_level", "<i2"),
+    ("is_reliable", "u1"),
+])
+
+
+def _filter_key(value) -> str:
+    return str(value).strip().lower() if value else ""
+
+
+def store_exists(directory: str) -> bool:
+    """True when a complete store is present (header is written last)."""
+    return all(os.path.exists(os.path.join(directory, name)) for name in STORE_FILES)
+
+
+# =============================================================================
+# WRITER
+# =============================================================================
+
+def write_metadata_store(
+    out_dir: str,
+    ids: List[int],
+    documents: List[str],
+    metadata: List[Dict],
+    header: Dict,
+) -> List[str]:
+    """
+    Write the store atomically (temp files + rename, header last).
+    Returns the list of written file paths.
+    """
+    if not (len(ids) == len(documents) == len(metadata)):
+        raise ValueError("ids, documents and metadata must have the same length")
+
+    os.makedirs(out_dir, exist_ok=True)
+
+    vocab: Dict[str, List[str]] = {field: [""] for field in FILTER_FIELDS}
+    codes: Dict[str, Dict[str, int]] = {field: {"": 0} for field in FILTER_FIELDS}
+    rows = np.zeros(len(ids), dtype=ROW_DTYPE)
+
+    records_tmp = os.path.join(out_dir, RECORDS_FILE + ".tmp")
+    offset = 0
+    with open(records_tmp, "wb") as f:
+        for i, (doc_id, doc, meta) in enumerate(zip(ids, documents, metadata)):
+            blob = json.dumps({"content": doc, **meta}, ensure_ascii=False).encode("utf-8")
+            f.write(blob)
+
+            rows[i]["id"] = int(doc_id)
+            rows[i]["offset"] = offset
+            rows[i]["length"] = len(blob)
+            offset += len(blob)
+
+            for field in FILTER_FIELDS:
+                key = _filter_key(meta.get(field))
+                if key not in codes[field]:
+                    codes[field][key] = len(vocab[field])
+                    vocab[field].append(key)
+                rows[i][field] = codes[field][key]
+            rows[i]["is_reliable"] = 1 if meta.get("is_reliable") else 0
+
+    rows_tmp = os.path.join(out_dir, ROWS_FILE + ".tmp")
+    with open(rows_tmp, "wb") as f:
+        np.save(f, rows)
+
+    header = dict(header)
+    header.update({"format_version": FORMAT_VERSION, "count": len(ids), "vocab": vocab})
+    header_tmp = os.path.join(out_dir, HEADER_FILE + ".tmp")
+    with open(header_tmp, "w", encoding="utf-8") as f:
+        json.dump(header, f)
+
+    paths = []
+    for tmp, name in [(records_tmp, RECORDS_FILE), (rows_tmp, ROWS_FILE), (header_tmp, HEADER_FILE)]:
+        final = os.path.join(out_dir, name)
+        os.replace(tmp, final)
+        paths.append(final)
+
+    return paths
+
+
+def convert_legacy_metadata(json_path: str, out_dir: str) -> bool:
+    """One-off conversion of an old metadata.json into the binary store."""
+    try:
+        with open(json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error(f"❌ Could not read legacy metadata {json_path}: {e}")
+        return False
+
+    documents = data.get("documents", [])
+    metadata = data.get("metadata", [])
+    # Older indexes have no IDs: the FAISS label is the row number
+    ids = data.get("ids") or list(range(len(documents)))
+
+    header = {k: data[k] for k in ("embedding", "index_type") if data.get(k)}
+    write_metadata_store(out_dir, ids, documents, metadata, header)
+    logger.info(f"✅ Converted {json_path} -> binary metadata store ({len(ids)} rows)")
+    return True
+
+
+# =============================================================================
+# READER
+# =============================================================================
+
+class MetadataStore:
+    """Read-only, memory-mapped view of the metadata store."""
+
+    def __init__(self, header: Dict, rows: np.ndarray, records: Optional[mmap.mmap], records_file):
+        self.header = header
+        self.rows = rows
+        self._records = records
+        self._records_file = records_file
+        self._vocab = header.get("vocab", {})
+
+        # Sorted ID view for O(log n) id -> row lookups without a Python dict
+        self._order = np.argsort(rows["id"], kind="stable")
+        self._sorted_ids = rows["id"][self._order]
+
+    @classmethod
+    def open(cls, directory: str) -> "MetadataStore":
+        with open(os.path.join(directory, HEADER_FILE), "r", encoding="utf-8") as f:
+            header = json.load(f)
+
+        rows = np.load(os.path.join(directory, ROWS_FILE), mmap_mode="r")
+
+        records_file = open(os.path.join(directory, RECORDS_FILE), "rb")
+        size = os.fstat(records_file.fileno()).st_size
+        records = mmap.mmap(records_file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+
+        return cls(header, rows, records, records_file)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self.rows["id"]
+
+    def row_for_id(self, doc_id: int) -> Optional[int]:
+        """Row number for a vector ID, or None."""
+        pos = int(np.searchsorted(self._sorted_ids, doc_id))
+        if pos < len(self._sorted_ids) and self._sorted_ids[pos] == doc_id:
+            return int(self._order[pos])
+        return None
+
+    def get(self, row: int) -> Dict:
+        """Decode one record (content + metadata)."""
+        if self._records is None or not 0 <= row < len(self.rows):
+            return {}
+        offset = int(self.rows[row]["offset"])
+        length = int(self.rows[row]["length"])
+        return json.loads(self._records[offset:offset + length].decode("utf-8"))
+
+    def ids_matching(self, field: str, values) -> np.ndarray:
+        """IDs whose filter column matches any of values (case-insensitive)."""
+        values = [values] if isinstance(values, str) else list(values)
+        vocab = self._vocab.get(field, [])
+        wanted = [vocab.index(k) for k in {_filter_key(v) for v in values if v} if k and k in vocab]
+        if not wanted:
+            return np.array([], dtype=np.int64)
+        mask = np.isin(self.rows[field], wanted)
+        return np.asarray(self.rows["id"][mask], dtype=np.int64)
+
+    def reliable_ids(self) -> np.ndarray:
+        return np.asarray(self.rows["id"][self.rows["is_reliable"] == 1], dtype=np.int64)
+
+    def close(self):
+        if self._records is not None:
+            self._records.close()
+            self._records = None
+        self._records_file.close()
@@ -0,0 +1,215 @@
+"""
+Prompt Builder - Token-Budgeted Chat Prompts
+============================================
+FILE: backend/services/prompt_builder.py
+
+Assembles the messages sent to the chat model:
+
+- Stable prefix first: the static SYSTEM_PROMPT is always message 0 and
+  never interpolated, so the provider's prompt cache (prefix match over
+  tools + system) applies on every turn
+- History trimmed to PROMPT_HISTORY_TOKENS, newest first; long replies are
+  clipped and older turns collapse into a one-line summary of what the
+  user asked (no extra LLM call)
+- Per-turn context (previously discussed funds) goes after the history,
+  right before the user message
+- Tool results serialised compactly: fund lists as a column/row table,
+  frontend alias fields and nulls dropped, no whitespace
+
+Token counts use tiktoken when installed, else a chars/4 estimate.
+
+USAGE:
+    from services.prompt_builder import build_messages, compact_tool_result
+
+    messages = build_messages(SYSTEM_PROMPT, message, history, context_funds)
+    messages.append({"role": "tool", "tool_call_id": id, "content": compact_tool_result(result)})
+"""
+
+import os
+import json
+import math
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROMPT_HISTORY_TOKENS = int(os.environ.get("PROMPT_HISTORY_TOKENS", "800"))
+PROMPT_SUMMARY_TOKENS = int(os.environ.get("PROMPT_SUMMARY_TOKENS", "150"))
+HISTORY_MESSAGE_CHARS = 400
+CONTEXT_FUNDS = 5
+
+# Duplicates of other fields in format_fund_for_response (kept there for the frontend)
+ALIAS_FIELDS = {"name", "riskometer", "expense_direct"}
+
+
+# =============================================================================
+# TOKEN COUNTING
+# =============================================================================
+_encoding = None
+_encoding_checked = False
+
+
+def _get_encoding():
+    global _encoding, _encoding_checked
+
+    if not _encoding_checked:
+        _encoding_checked = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("o200k_base")  # gpt-4o family
+        except Exception as e:
+            logger.info(f"ℹ️ tiktoken unavailable ({e}), estimating tokens from length")
+
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return math.ceil(len(text) / 4)
+
+
+def count_message_tokens(messages: List[Dict]) -> int:
+    """Approximate prompt size (content + tool-call arguments + per-message overhead)."""
+    total = 0
+    for msg in messages:
+        total += 4 + count_tokens(msg.get("content") or "")
+        for call in msg.get("tool_calls") or []:
+            total += count_tokens(call["function"]["name"]) + count_tokens(call["function"]["arguments"])
+    return total + 2
+
+
+# =============================================================================
+# TOOL PAYLOADS
+# =============================================================================
+
+def _flatten(row: Dict) -> Dict:
+    """Drop aliases and nulls, lift nested metrics to top-level columns."""
+    flat = {}
+    for key, value in row.items():
+        if key in ALIAS_FIELDS or value is None:
+            continue
+        if key == "metrics" and isinstance(value, dict):
+            flat.update({k: v for k, v in value.items() if v is not None})
+        else:
+            flat[key] = value
+    return flat
+
+
+def compact_payload(result: Any) -> Any:
+    """Compact structure for the model: list of dicts -> {"columns", "rows"}."""
+    if isinstance(result, list) and len(result) > 1 and all(isinstance(r, dict) for r in result):
+        rows = [_flatten(r) for r in result]
+        columns: List[str] = []
+        for row in rows:
+            columns.extend(k for k in row if k not in columns)
+        return {"columns": columns, "rows": [[row.get(c) for c in columns] for row in rows]}
+    if isinstance(result, list):
+        return [compact_payload(r) for r in result]
+    if isinstance(result, dict):
+        return _flatten(result)
+    return result
+
+
+def compact_tool_result(result: Any) -> str:
+    """Tool message content: compact payload as whitespace-free JSON."""
+    return json.dumps(compact_payload(result), separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+# =============================================================================
+# HISTORY
+# =============================================================================
+
+def _clip(text: str, max_chars: int) -> str:
+    text = (text or "").strip()
+    return text if len(text) <= max_chars else text[:max_chars].rstrip() + "…"
+
+
+def summarize_turns(turns: List[Dict], max_tokens: int = PROMPT_SUMMARY_TOKENS) -> Optional[str]:
+    """One-line extractive summary of dropped turns (the user's questions)."""
+    asked = [_clip(t["content"], 80) for t in turns if t["role"] == "user" and t.get("content")]
+    if not asked:
+        return None
+
+    summary = "Earlier in this conversation the user asked: "
+    parts: List[str] = []
+    for question in reversed(asked):  # most recent first survive the cap
+        if count_tokens(summary + "; ".join(parts + [question])) > max_tokens:
+            break
+        parts.append(question)
+    if not parts:
+        return None
+    return summary + "; ".join(reversed(parts))
+
+
+def fit_history(history: List[Dict], budget: int = PROMPT_HISTORY_TOKENS) -> Tuple[Optional[str], List[Dict]]:
+    """
+    Newest-first history within a token budget.
+
+    Returns:
+        (summary of older turns or None, kept messages in chronological order)
+    """
+    kept: List[Dict] = []
+    used = 0
+    cut = 0
+
+    for i in range(len(history) - 1, -1, -1):
+        msg = history[i]
+        content = _clip(msg["content"], HISTORY_MESSAGE_CHARS)
+        cost = 4 + count_tokens(content)
+        if used + cost > budget:
+            cut = i + 1
+            break
+        kept.append({"role": msg["role"], "content": content})
+        used += cost
+
+    kept.reverse()
+    # Don't open the window on a dangling assistant reply
+    while kept and kept[0]["role"] != "user":
+        kept.pop(0)
+        cut += 1
+
+    return summarize_turns(history[:cut]), kept
+
+
+# =============================================================================
+# ASSEMBLY
+# =============================================================================
+
+def context_funds_message(context_funds: Dict) -> Optional[Dict]:
+    """Previously discussed funds as a short system note."""
+    if not context_funds:
+        return None
+    lines = ["Previously discussed funds:"]
+    for code, fund in list(context_funds.items())[:CONTEXT_FUNDS]:
+        name = fund.get("fund_name", fund.get("parent_scheme_name", "Unknown"))
+        lines.append(f"- {name} (Code: {code}, Score: {fund.get('score', 'N/A')})")
+    return {"role": "system", "content": "CONTEXT:\n" + "\n".join(lines)}
+
+
+def build_messages(
+    system_prompt: str,
+    message: str,
+    history: List[Dict],
+    context_funds: Optional[Dict] = None,
+    history_budget: int = PROMPT_HISTORY_TOKENS,
+) -> List[Dict]:
+    """
+    [static system] [summary of older turns] [recent history] [context] [user]
+    """
+    messages = [{"role": "system", "content": system_prompt}]
+
+    summary, recent = fit_history(history, history_budget)
+    if summary:
+        messages.append({"role": "system", "content": summary})
+    messages.extend(recent)
+
+    context = context_funds_message(context_funds)
+    if context:
+        messages.append(context)
+
+    messages.append({"role": "user", "content": message})
+    return messages
@@ -0,0 +1,90 @@
+"""
+Tool Dispatcher - Concurrent Chat Tool Execution
+================================================
+FILE: backend/services/tool_dispatcher.py
+
+When the model asks for several tools in one turn (compare + details for
+three funds, say), they run concurrently on a small thread pool instead
+of one after another, so a multi-tool turn costs max(tool latency)
+rather than the sum.
+
+- Per-tool timeout (CHAT_TOOL_TIMEOUT)
+- Total budget per round (CHAT_TOOL_BUDGET): late tools get the time left
+- Outcomes are yielded as each tool finishes (streaming can show fund
+  cards immediately); `index` keeps the model's original order
+- A timed-out or failing tool becomes {"error": ...} for the model
+  instead of failing the whole turn
+
+USAGE:
+    async for outcome in dispatch_tool_calls(calls, execute_tool):
+        print(outcome["index"], outcome["name"], outcome["status"], outcome["ms"])
+"""
+
+import os
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+CHAT_TOOL_TIMEOUT = float(os.environ.get("CHAT_TOOL_TIMEOUT", "10"))
+CHAT_TOOL_BUDGET = float(os.environ.get("CHAT_TOOL_BUDGET", "20"))
+CHAT_MAX_TOOL_ROUNDS = int(os.environ.get("CHAT_MAX_TOOL_ROUNDS", "3"))
+TOOL_WORKERS = int(os.environ.get("TOOL_WORKERS", "8"))
+
+# Tools are sync (FAISS, embeddings, dict lookups); run them off the event loop
+_executor = ThreadPoolExecutor(max_workers=TOOL_WORKERS, thread_name_prefix="chat-tool")
+
+
+async def dispatch_tool_calls(
+    calls: List[Dict],
+    run_tool: Callable[[str, Dict], Any],
+    per_tool_timeout: float = CHAT_TOOL_TIMEOUT,
+    total_budget: float = CHAT_TOOL_BUDGET,
+) -> AsyncIterator[Dict]:
+    """
+    Run tool calls concurrently, yielding outcomes as they complete.
+
+    Args:
+        calls: [{"id", "name", "arguments": dict}]
+        run_tool: sync (name, arguments) -> result
+
+    Yields:
+        {"index", "id", "name", "arguments", "result", "status" (ok|timeout|error), "ms"}
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + total_budget
+
+    async def run_one(index: int, call: Dict) -> Dict:
+        started = time.perf_counter()
+        timeout = max(0.0, min(per_tool_timeout, deadline - loop.time()))
+        try:
+            result = await asyncio.wait_for(
+                loop.run_in_executor(_executor, run_tool, call["name"], call["arguments"]),
+                timeout=timeout
+            )
+            status = "ok"
+        except asyncio.TimeoutError:
+            result = {"error": f"{call['name']} timed out after {timeout:.1f}s"}
+            status = "timeout"
+            logger.warning(f"⏱️ Tool {call['name']} timed out")
+        except Exception as e:
+            result = {"error": f"{call['name']} failed: {e}"}
+            status = "error"
+            logger.error(f"❌ Tool {call['name']} error: {e}")
+
+        return {
+            "index": index,
+            "id": call.get("id"),
+            "name": call["name"],
+            "arguments": call["arguments"],
+            "result": result,
+            "status": status,
+            "ms": round((time.perf_counter() - started) * 1000),
+        }
+
+    tasks = [asyncio.create_task(run_one(i, call)) for i, call in enumerate(calls)]
+    for next_done in asyncio.as_completed(tasks):
+        yield await next_done
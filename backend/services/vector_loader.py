@@ -35,8 +35,8 @@ def get_vector_service_safe():
     _load_attempted = True
     
     try:
-        from services.vector_service import VectorService
-        _vector_service = VectorService()
+        from services.vector_service import get_vector_service
+        _vector_service = get_vector_service()
         logger.info("✅ Vector service loaded successfully")
     except ImportError as e:
         _load_error = f"Import error: {e}"
@@ -48,9 +48,10 @@ def get_vector_service_safe():
     return _vector_service
 
 
-def search_funds_semantic(query: str, n_results: int = 5) -> List[Dict]:
+def search_funds_semantic(query: str, n_results: int = 5, **filters) -> List[Dict]:
     """
     Search funds using vector similarity.
+    filters: category, risk_level, reliable_only
     Returns empty list if service unavailable.
     """
     svc = get_vector_service_safe()
@@ -64,7 +65,7 @@ def search_funds_semantic(query: str, n_results: int = 5) -> List[Dict]:
             logger.debug("Vector service not ready yet")
             return []
         
-        return svc.search(query, n_results=n_results)
+        return svc.search(query, n_results=n_results, **filters)
     except Exception as e:
         logger.warning(f"Vector search error: {e}")
         return []
@@ -88,6 +89,7 @@ def get_vector_status() -> Dict:
             "initialized": stats.get('initialized', False),
             "loading": stats.get('loading', False),
             "documents": stats.get('total_vectors', 0),
+            "embedding_cache": stats.get('embedding_cache'),
             "error": stats.get('error')
         }
     except Exception as e:
@@ -4,23 +4,35 @@ Vector Service - Load Pre-built Index Only
 FILE: backend/services/vector_service.py
 
 This version:
-- Downloads pre-built FAISS index from Cloud Storage
+- Resolves the pre-built index local-first: FAISS_DIR, then the copy
+  bundled in the image, then a content-addressed cache; Cloud Storage
+  (or any INDEX_REMOTE_URL) is only an optional fallback
 - Does NOT generate embeddings on startup
-- Only uses OpenAI for search queries (fast!)
+- Embeds search queries with the same provider that built the index
+  (OpenAI API or a local sentence-transformers model, fully offline)
+- Caches query embeddings (in-process LRU + optional SQLite on disk)
+- Supports flat / SQ8 / HNSW / IVF-PQ indexes keyed by fund ID, with
+  category, riskometer and reliability pre-filters via an ID selector
+- Memory-maps index.faiss and an offset-indexed metadata store, so a
+  local copy opens in milliseconds and workers share the page cache
 - Falls back gracefully if index not available
 
-The index must be pre-built locally and uploaded to GCS.
-Run build_and_upload_index.py to create it.
+The index must be pre-built locally (and bundled in the image or uploaded
+to GCS). Run build_and_upload_index.py to create it.
 """
 
 import os
-import json
 import numpy as np
 from pathlib import Path
 from typing import List, Dict, Optional
 import logging
 import threading
 
+from services.embedding_cache import EmbeddingCache
+from services.embedding_provider import BaseEmbeddingProvider, get_embedding_provider
+from services.index_source import LEGACY_META_FILE, get_remote_source, read_manifest, resolve_index_dir
+from services.metadata_store import MetadataStore, convert_legacy_metadata, store_exists
+
 logger = logging.getLogger(__name__)
 
 # ============================================================
@@ -28,7 +40,6 @@ logger = logging.getLogger(__name__)
 # ============================================================
 IS_CLOUD = os.environ.get('K_SERVICE') is not None
 GCS_BUCKET = os.environ.get('GCS_BUCKET', 'run-sources-mf-advisor-487108-asia-south1')
-OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', '')
 
 if IS_CLOUD:
     DATA_DIR = "/tmp/data"
@@ -37,203 +48,319 @@ else:
     DATA_DIR = os.environ.get('DATA_DIR', './data')
     FAISS_DIR = os.environ.get('FAISS_DIR', './data/faiss_index')
 
-EMBEDDING_MODEL = "text-embedding-ada-002"
-EMBEDDING_DIM = 1536
+# Index sources (see services/index_source.py). The Dockerfile copies
+# backend/ to /app, so an index built before deploy lands here.
+BUNDLED_INDEX_DIR = os.environ.get('BUNDLED_INDEX_DIR', '/app/data/faiss_index')
+INDEX_CACHE_DIR = os.environ.get('INDEX_CACHE_DIR', os.path.join(DATA_DIR, "index_cache"))
+INDEX_REMOTE_URL = os.environ.get(
+    'INDEX_REMOTE_URL', f"gs://{GCS_BUCKET}/faiss_index" if GCS_BUCKET else ""
+)
+
+# How long a search waits for a cold-start load instead of returning []
+INDEX_WAIT_SECONDS = float(os.environ.get('INDEX_WAIT_SECONDS', '10'))
+
+# Used only for indexes built before the builder recorded its provider
+DEFAULT_EMBEDDING = {"provider": "openai", "model": "text-embedding-ada-002", "dim": 1536}
+
+# Query embedding cache (set EMBEDDING_CACHE_DB="" to keep it in memory only)
+EMBEDDING_CACHE_SIZE = int(os.environ.get('EMBEDDING_CACHE_SIZE', '2048'))
+EMBEDDING_CACHE_DB = os.environ.get('EMBEDDING_CACHE_DB', os.path.join(DATA_DIR, "query_embeddings.sqlite"))
+
+# Search-time tuning for approximate indexes
+IVF_NPROBE = int(os.environ.get('FAISS_NPROBE', '16'))
+HNSW_EF_SEARCH = int(os.environ.get('FAISS_EF_SEARCH', '64'))
 
 
 class VectorService:
     """
     Vector service that loads pre-built FAISS index.
-    Index must be uploaded to GCS beforehand.
+    Index must be bundled, cached or available from the remote source.
     """
     
     def __init__(self):
         self.index = None
-        self.documents: List[str] = []
-        self.metadata: List[Dict] = []
-        self.openai_client = None
-        self.embedding_dim = EMBEDDING_DIM
+        self.store: Optional[MetadataStore] = None
+        self.embedder: Optional[BaseEmbeddingProvider] = None
+        self.embedding_info: Dict = dict(DEFAULT_EMBEDDING)
+        self.index_type = "flat"
+        self.mmap_enabled = False
+        self.index_dir: Optional[str] = None
+        self.index_source: Optional[str] = None
+        self.index_version: Optional[str] = None
         
         # Status
         self._initialized = False
         self._loading = False
         self._error: Optional[str] = None
+        self._load_done = threading.Event()
         
         # Create directories
         Path(DATA_DIR).mkdir(parents=True, exist_ok=True)
-        Path(FAISS_DIR).mkdir(parents=True, exist_ok=True)
         
-        # Initialize OpenAI (for search queries only)
-        self._init_openai()
+        # Query embedding cache
+        self.embedding_cache = EmbeddingCache(
+            max_entries=EMBEDDING_CACHE_SIZE,
+            db_path=EMBEDDING_CACHE_DB or None
+        )
         
-        # Start background loading
-        self._start_background_load()
+        # A local, bundled or cached copy opens synchronously (mmap, milliseconds);
+        # otherwise fetch from the remote source in the background
+        local_dirs = [("local", FAISS_DIR), ("bundled", BUNDLED_INDEX_DIR)]
+        index_dir, source = resolve_index_dir(local_dirs, INDEX_CACHE_DIR or None)
+        opened = index_dir is not None and self._open_index_dir(index_dir, source)
+        self._start_background_load(fetch_remote=not opened)
     
-    def _init_openai(self):
-        """Initialize OpenAI client for search queries."""
-        if not OPENAI_API_KEY:
-            logger.warning("⚠️ OPENAI_API_KEY not set - search won't work")
-            return
+    def _init_embedder(self):
+        """Create the query embedder matching the provider that built the index."""
+        provider = self.embedding_info.get("provider")
+        model = self.embedding_info.get("model")
         
         try:
-            from openai import OpenAI
-            self.openai_client = OpenAI(api_key=OPENAI_API_KEY)
-            logger.info("✅ OpenAI client ready")
+            self.embedder = get_embedding_provider(provider, model=model)
         except Exception as e:
-            logger.error(f"OpenAI init error: {e}")
+            logger.warning(f"⚠️ Embedding provider '{provider}' unavailable - search won't work: {e}")
+            return
+        
+        if self.embedder.dim != self.index.d:
+            logger.error(f"❌ Embedder dim {self.embedder.dim} != index dim {self.index.d}")
+            self.embedder = None
     
-    def _start_background_load(self):
-        """Load index in background thread."""
+    def _start_background_load(self, fetch_remote: bool = True):
+        """Fetch the index (if needed) and load the embedder in a background thread."""
         if self._loading:
             return
         
         self._loading = True
-        thread = threading.Thread(target=self._load_index, daemon=True)
+        thread = threading.Thread(target=self._load_index, args=(fetch_remote,), daemon=True)
         thread.start()
         logger.info("🔄 Background index loading started...")
     
-    def _load_index(self):
-        """Download and load pre-built index."""
+    def _load_index(self, fetch_remote: bool = True):
+        """Fetch pre-built index from the remote source (if needed), then the embedder."""
         try:
-            # Download from GCS
-            if not self._download_index_from_gcs():
-                self._error = "Could not download index from GCS"
-                logger.warning(f"⚠️ {self._error}")
-                self._loading = False
-                return
-            
-            # Load FAISS index
-            import faiss
-            
-            index_file = os.path.join(FAISS_DIR, "index.faiss")
-            meta_file = os.path.join(FAISS_DIR, "metadata.json")
-            
-            if not os.path.exists(index_file) or not os.path.exists(meta_file):
-                self._error = "Index files not found after download"
-                logger.warning(f"⚠️ {self._error}")
-                self._loading = False
-                return
-            
-            # Load index
-            self.index = faiss.read_index(index_file)
-            
-            # Load metadata
-            with open(meta_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.documents = data.get('documents', [])
-                self.metadata = data.get('metadata', [])
+            if fetch_remote:
+                remote = get_remote_source(INDEX_REMOTE_URL)
+                index_dir, source = resolve_index_dir([], INDEX_CACHE_DIR or None, remote)
+                
+                if index_dir is None:
+                    self._error = "No index available (local, bundled, cache or remote)"
+                    logger.warning(f"⚠️ {self._error}")
+                    return
+                
+                if not self._open_index_dir(index_dir, source):
+                    self._error = self._error or "Index files not found after download"
+                    logger.warning(f"⚠️ {self._error}")
+                    return
             
-            self._initialized = True
-            logger.info(f"✅ Loaded index: {self.index.ntotal} vectors")
+            # Query embedder must match the index (local models load here, off the request path)
+            self._init_embedder()
             
         except Exception as e:
             self._error = str(e)
             logger.error(f"❌ Index load error: {e}")
         finally:
             self._loading = False
+            self._load_done.set()
     
-    def _download_index_from_gcs(self) -> bool:
-        """Download index files from Cloud Storage."""
-        if not GCS_BUCKET:
-            logger.warning("GCS_BUCKET not set")
+    def _open_index_dir(self, index_dir: str, source: Optional[str]) -> bool:
+        """
+        Open index.faiss + metadata store in place without reading them
+        into RAM. Converts a legacy metadata.json on first open.
+        """
+        index_file = os.path.join(index_dir, "index.faiss")
+        legacy_meta = os.path.join(index_dir, LEGACY_META_FILE)
+        
+        if not os.path.exists(index_file):
             return False
+        if not store_exists(index_dir):
+            if not os.path.exists(legacy_meta) or not convert_legacy_metadata(legacy_meta, index_dir):
+                return False
         
         try:
-            from google.cloud import storage
-            
-            logger.info(f"📥 Downloading index from gs://{GCS_BUCKET}/faiss_index/...")
-            
-            client = storage.Client()
-            bucket = client.bucket(GCS_BUCKET)
-            
-            files = [
-                ("faiss_index/index.faiss", os.path.join(FAISS_DIR, "index.faiss")),
-                ("faiss_index/metadata.json", os.path.join(FAISS_DIR, "metadata.json")),
-            ]
-            
-            for gcs_path, local_path in files:
-                blob = bucket.blob(gcs_path)
-                if blob.exists():
-                    blob.download_to_filename(local_path)
-                    logger.info(f"   ✅ Downloaded: {gcs_path}")
-                else:
-                    logger.warning(f"   ⚠️ Not found: {gcs_path}")
-                    return False
-            
-            return True
-            
-        except ImportError:
-            logger.warning("google-cloud-storage not installed")
-            return False
+            self.index = self._read_faiss_index(index_file)
+            self.store = MetadataStore.open(index_dir)
         except Exception as e:
-            logger.error(f"GCS download error: {e}")
+            self._error = str(e)
+            logger.error(f"❌ Index open error: {e}")
             return False
+        
+        self.embedding_info = self.store.header.get('embedding') or dict(DEFAULT_EMBEDDING)
+        self.index_type = self.store.header.get('index_type', 'flat')
+        self.index_dir = index_dir
+        self.index_source = source
+        self.index_version = (read_manifest(index_dir) or {}).get('version')
+        self._initialized = True
+        logger.info(f"✅ Opened index from {source}: {self.index.ntotal} vectors (mmap={self.mmap_enabled})")
+        return True
+    
+    def _read_faiss_index(self, index_file: str):
+        """
+        Memory-map the index read-only; fall back to a full read if unsupported.
+        IO_FLAG_MMAP_IFC maps flat/SQ/HNSW codes, plain IO_FLAG_MMAP maps IVF lists.
+        """
+        import faiss
+        
+        base = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+        ifc = getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+        
+        for flags in ([base | ifc, base] if ifc else [base]):
+            try:
+                index = faiss.read_index(index_file, flags)
+                self.mmap_enabled = True
+                return index
+            except RuntimeError as e:
+                last_error = e
+        
+        logger.warning(f"⚠️ mmap load unsupported ({last_error}), reading index into RAM")
+        self.mmap_enabled = False
+        return faiss.read_index(index_file)
+    
+    def _allowed_ids(self, category=None, risk_level=None, reliable_only: bool = False) -> Optional[np.ndarray]:
+        """
+        Resolve filters to the allowed vector IDs.
+        Returns None when no filter applies. category/risk_level accept a
+        string or a list of strings (any match on sub or main category).
+        """
+        allowed = None
+        if category:
+            allowed = np.union1d(
+                self.store.ids_matching("category", category),
+                self.store.ids_matching("main_category", category)
+            )
+        if risk_level:
+            ids = self.store.ids_matching("risk_level", risk_level)
+            allowed = ids if allowed is None else np.intersect1d(allowed, ids)
+        if reliable_only:
+            ids = self.store.reliable_ids()
+            allowed = ids if allowed is None else np.intersect1d(allowed, ids)
+        
+        return allowed
+    
+    def _search_params(self, allowed: Optional[np.ndarray]):
+        """
+        Build FAISS search parameters (ID selector + per-type tuning).
+        Returns (params, selector); the caller holds the selector while searching.
+        """
+        import faiss
+        
+        sel = faiss.IDSelectorBatch(allowed) if allowed is not None else None
+        
+        if self.index_type == "ivfpq":
+            params = faiss.SearchParametersIVF(nprobe=IVF_NPROBE)
+        elif self.index_type == "hnsw":
+            params = faiss.SearchParametersHNSW(efSearch=HNSW_EF_SEARCH)
+        else:
+            if sel is None:
+                return None, None
+            params = faiss.SearchParameters()
+        
+        if sel is not None:
+            params.sel = sel
+        return params, sel
     
     def _get_embedding(self, text: str) -> Optional[np.ndarray]:
-        """Get embedding for search query."""
-        if not self.openai_client:
+        """Get embedding for search query (cached)."""
+        model = self.embedding_info.get("model", "")
+        
+        cached = self.embedding_cache.get(text, model)
+        if cached is not None:
+            return cached
+        
+        # First query after a cold start: wait for the embedder rather than return nothing
+        if self.embedder is None and self._loading:
+            self._load_done.wait(INDEX_WAIT_SECONDS)
+        
+        if not self.embedder:
             return None
         
         try:
-            response = self.openai_client.embeddings.create(
-                model=EMBEDDING_MODEL,
-                input=text[:8000]
-            )
-            emb = np.array(response.data[0].embedding, dtype=np.float32)
-            emb = emb / np.linalg.norm(emb)
+            emb = self.embedder.embed_query(text)
+            self.embedding_cache.put(text, model, emb)
             return emb
         except Exception as e:
             logger.error(f"Embedding error: {e}")
             return None
     
-    def search(self, query: str, n_results: int = 5, **kwargs) -> List[Dict]:
-        """Search for similar funds."""
+    def search(
+        self,
+        query: str,
+        n_results: int = 5,
+        category=None,
+        risk_level=None,
+        reliable_only: bool = False,
+        **kwargs
+    ) -> List[Dict]:
+        """
+        Search for similar funds.
+        
+        Filters (category, risk_level, reliable_only) are applied inside
+        FAISS via an ID selector, so every returned neighbour matches.
+        """
+        if not self.is_ready() and self._loading:
+            self._load_done.wait(INDEX_WAIT_SECONDS)
+        
         if not self.is_ready():
             return []
         
         if not query:
             return []
         
+        allowed = self._allowed_ids(category, risk_level, reliable_only)
+        if allowed is not None and len(allowed) == 0:
+            return []
+        
         # Get query embedding
         emb = self._get_embedding(query)
         if emb is None:
             return []
         
+        k = min(n_results, self.index.ntotal if allowed is None else len(allowed))
+        
         try:
-            # Search FAISS
-            scores, indices = self.index.search(
-                emb.reshape(1, -1),
-                min(n_results * 2, self.index.ntotal)
-            )
+            scores, ids = self._faiss_search(emb.reshape(1, -1), k, allowed)
             
             results = []
-            for score, idx in zip(scores[0], indices[0]):
-                if idx < 0 or idx >= len(self.documents):
+            for score, doc_id in zip(scores[0], ids[0]):
+                row = self.store.row_for_id(int(doc_id))
+                if row is None:
                     continue
                 
-                meta = self.metadata[idx] if idx < len(self.metadata) else {}
+                # Decode only the rows being returned
+                meta = self.store.get(row)
                 
                 results.append({
-                    "content": self.documents[idx],
+                    "content": meta.get("content", ""),
                     "fund_code": meta.get("fund_code"),
                     "fund_name": meta.get("fund_name"),
                     "category": meta.get("category"),
                     "risk_level": meta.get("risk_level"),
                     "relevance_score": round(float(score), 4)
                 })
-                
-                if len(results) >= n_results:
-                    break
             
-            return results
+            return results[:n_results]
             
         except Exception as e:
             logger.error(f"Search error: {e}")
             return []
     
+    def _faiss_search(self, x: np.ndarray, k: int, allowed: Optional[np.ndarray]):
+        """Run the FAISS search, falling back to over-fetch + post-filter if selectors are unsupported."""
+        try:
+            params, sel = self._search_params(allowed)
+            if params is None:
+                return self.index.search(x, k)
+            return self.index.search(x, k, params=params)
+        except (TypeError, RuntimeError) as e:
+            if allowed is None:
+                return self.index.search(x, k)
+            logger.warning(f"ID selector unsupported ({e}), post-filtering")
+            scores, ids = self.index.search(x, min(self.index.ntotal, k * 10))
+            mask = np.isin(ids[0], allowed)
+            return scores[:, mask][:, :k], ids[:, mask][:, :k]
+    
     def is_ready(self) -> bool:
         """Check if service is ready for queries."""
-        return self._initialized and self.index is not None and self.index.ntotal > 0
+        return self._initialized and self.index is not None and self.store is not None and self.index.ntotal > 0
     
     def get_stats(self) -> Dict:
         """Get service statistics."""
@@ -241,10 +368,17 @@ class VectorService:
             "initialized": self._initialized,
             "loading": self._loading,
             "total_vectors": self.index.ntotal if self.index else 0,
-            "total_documents": len(self.documents),
+            "total_documents": len(self.store) if self.store else 0,
+            "mmap": self.mmap_enabled,
             "error": self._error,
             "is_cloud": IS_CLOUD,
-            "gcs_bucket": GCS_BUCKET
+            "gcs_bucket": GCS_BUCKET,
+            "index_source": self.index_source,
+            "index_version": self.index_version,
+            "embedding": self.embedding_info,
+            "index_type": self.index_type,
+            "embedder_ready": self.embedder is not None,
+            "embedding_cache": self.embedding_cache.get_stats()
         }
     
     def get_status(self) -> str:
@@ -0,0 +1,28 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from routers.analytics import build_manager_index, parse_fund_managers  # noqa: E402
+
+
+def test_manager_string_with_comma_inside_parentheses():
+    fund = {"fund_managers": "Mr. Rahul Shah (since April 1, 2020), Ms. Priya Rao"}
+    managers = parse_fund_managers(fund)
+
+    assert [m["key"] for m in managers] == ["rahul shah", "priya rao"]
+    assert managers[0]["since"].strftime("%Y-%m-%d") == "2020-04-01"
+    assert managers[1]["since"] is None
+
+
+def test_manager_aum_weighting_ignores_non_numeric_aum():
+    raw = {
+        "A": {"fund_managers": "Rahul Shah", "aum": 300.0, "metrics": {"cagr": 10.0}},
+        "B": {"fund_managers": "Rahul Shah", "aum": 100.0, "metrics": {"cagr": 20.0}},
+        "C": {"fund_managers": "Priya Rao", "aum": "0", "metrics": {"cagr": 5.0}},
+    }
+    index = build_manager_index(raw)
+
+    assert index["rahul shah"]["weighting"] == "aum"
+    assert index["rahul shah"]["aggregate_metrics"]["cagr"] == 12.5
+    assert index["priya rao"]["weighting"] == "equal"
@@ -0,0 +1,90 @@
+import hashlib
+import os
+import sys
+
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import build_and_upload_index as builder  # noqa: E402
+from services.embedding_pipeline import document_hash  # noqa: E402
+from services.embedding_provider import BaseEmbeddingProvider  # noqa: E402
+
+DIM = 64
+
+
+class HashEmbedder(BaseEmbeddingProvider):
+    """Deterministic unit vector per text, no network."""
+
+    name = "test"
+    model = "hash"
+    dim = DIM
+
+    def embed_documents(self, texts, batch_size=64):
+        out = []
+        for text in texts:
+            seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+            out.append(np.random.default_rng(seed).standard_normal(DIM))
+        out = np.array(out, dtype=np.float32)
+        return out / np.linalg.norm(out, axis=1, keepdims=True)
+
+
+def corpus(n, version=""):
+    docs = [f"fund {i} {version if i % 7 == 0 else ''}" for i in range(n)]
+    metas = [{"id": 1000 + i, "fund_name": f"Fund {i}"} for i in range(n)]
+    for doc, meta in zip(docs, metas):
+        meta["content_hash"] = document_hash(doc, HashEmbedder.model)
+    return docs, metas
+
+
+def top1_matches(index, embedder, docs, metas):
+    _, labels = index.search(embedder.embed_documents(docs), 1)
+    return float(np.mean(labels[:, 0] == np.array([m["id"] for m in metas])))
+
+
+@pytest.mark.parametrize("index_type", ["flat", "sq8"])
+def test_incremental_update_keeps_search_results(index_type):
+    embedder = HashEmbedder()
+    docs, metas = corpus(600)
+    index = builder.build_faiss_index(embedder.embed_documents(docs), metas, embedder.describe(), index_type)
+    previous = {m["id"]: m["content_hash"] for m in metas}
+
+    # Every 7th fund changes, the last 30 are removed, 20 new ones arrive
+    new_docs, new_metas = corpus(620, version="v2")
+    del new_docs[570:600], new_metas[570:600]
+
+    index, counts = builder.update_faiss_index(index, previous, embedder, new_docs, new_metas)
+
+    assert counts == {"added": 20, "changed": 82, "removed": 30}
+    assert index.ntotal == len(new_metas)
+    assert top1_matches(index, embedder, new_docs, new_metas) == 1.0
+
+
+def test_ivfpq_previous_build_forces_full_rebuild(tmp_path, monkeypatch):
+    monkeypatch.setattr(builder, "OUTPUT_DIR", str(tmp_path))
+    embedder = HashEmbedder()
+    docs, metas = corpus(600)
+    index = builder.build_faiss_index(embedder.embed_documents(docs), metas, embedder.describe(), "ivfpq")
+    builder.save_index(index, docs, metas, embedder.describe(), "ivfpq", {"mode": "full"})
+
+    assert builder.load_previous_build("ivfpq", embedder.describe()) is None
+
+
+def test_flat_previous_build_is_reused(tmp_path, monkeypatch):
+    monkeypatch.setattr(builder, "OUTPUT_DIR", str(tmp_path))
+    embedder = HashEmbedder()
+    docs, metas = corpus(100)
+    index = builder.build_faiss_index(embedder.embed_documents(docs), metas, embedder.describe(), "flat")
+    builder.save_index(index, docs, metas, embedder.describe(), "flat", {"mode": "full"})
+
+    loaded, hashes, _ = builder.load_previous_build("flat", embedder.describe())
+    assert hashes == {m["id"]: m["content_hash"] for m in metas}
+    assert top1_matches(loaded, embedder, docs, metas) == 1.0
+
+
+def test_local_provider_index_is_not_uploaded():
+    assert builder.can_upload({"provider": "openai", "model": "text-embedding-3-small", "dim": 1536})
+    assert not builder.can_upload({"provider": "local", "model": "BAAI/bge-small-en-v1.5", "dim": 384})
@@ -45,6 +45,7 @@ export const API_ENDPOINTS = {
 
    // Chat / AI
   CHAT_MESSAGE: `${API_URL}/api/chat/message`,
+  CHAT_STREAM: `${API_URL}/api/chat/stream`,                 // SSE: tokens + fund cards as they arrive
   CHAT_HEALTH: `${API_URL}/api/chat/health`,
   RISK_PROFILE: `${API_URL}/api/chat/risk-profile`,
   QUICK_RISK: `${API_URL}/api/chat/quick-risk`,
@@ -58,6 +59,7 @@ export const API_ENDPOINTS = {
   SECTOR_ALLOCATION: `${API_URL}/api/analytics/sector-allocation`, // + /{fund_code}
   OVERLAP_ANALYSIS: `${API_URL}/api/analytics/overlap-analysis`, // POST
   FUND_MANAGER: `${API_URL}/api/analytics/fund-manager`, // + /{fund_code}
+  MANAGER: `${API_URL}/api/analytics/manager`, // + /{manager_name}
   SEARCH_FUNDS: `${API_URL}/api/analytics/search`, // + ?q=query
   LIST_FUNDS: `${API_URL}/api/analytics/list-funds`, // + ?limit=20
 };
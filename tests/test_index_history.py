@@ -0,0 +1,20 @@
+from types import SimpleNamespace
+
+import pandas as pd
+
+from app.index_history import bse_parse
+
+
+def test_bse_parse_mixed_date_formats():
+    csv = (
+        "Date,Open,High,Low,Close\n"
+        "2024-02-06,1,2,0.5,1.5\n"
+        "01/02/2024,\"1,000\",2,1,2\n"
+        "7-February-2024,1,2,1,2\n"
+        "2024-02-13,1,2,1,2\n"
+    )
+    out = bse_parse(SimpleNamespace(text=csv))
+
+    assert list(out["date"]) == [pd.Timestamp(d) for d in
+                                 ("2024-02-06", "2024-02-01", "2024-02-07", "2024-02-13")]
+    assert out["open"].tolist() == [1, 1000, 1, 1]